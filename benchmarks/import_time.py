@@ -0,0 +1,49 @@
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from typing import List, Tuple
+
+MODULES = ["tinkoff_invest", "tinkoff_invest.models.candle", "tinkoff_invest.models.portfolio",
+           "tinkoff_invest.subscriptions"]
+HEAVY_MODULES = ["requests", "urllib3", "websocket", "prettytable", "iso8601", "multiprocessing", "numpy"]
+
+_MEASURE_CODE = """
+import sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(elapsed)
+print(",".join(name for name in {heavy!r} if name in sys.modules))
+"""
+
+
+def measure(module: str, runs: int) -> Tuple[List[float], str]:
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=root + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    times, loaded = [], ""
+    for _ in range(runs):
+        # Every run is a fresh interpreter, so nothing is cached in sys.modules
+        output = subprocess.run([sys.executable, "-c", _MEASURE_CODE.format(module=module, heavy=HEAVY_MODULES)],
+                                env=env, check=True, capture_output=True, text=True).stdout.splitlines()
+        times.append(float(output[0]))
+        loaded = output[1] if len(output) > 1 else ""
+    return times, loaded
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measures import time of tinkoff_invest modules")
+    parser.add_argument("modules", nargs="*", default=MODULES)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    print("{:<36} {:>10} {:>10}  {}".format("Module", "Median, ms", "Min, ms", "Heavy modules loaded"))
+    for module in args.modules:
+        times, loaded = measure(module, args.runs)
+        print("{:<36} {:>10.1f} {:>10.1f}  {}".format(module, statistics.median(times) * 1000, min(times) * 1000,
+                                                      loaded or "-"))
+
+
+if __name__ == "__main__":
+    main()
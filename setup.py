@@ -9,6 +9,9 @@ setup(
     install_requires=[
         "prettytable", "iso8601", "requests", "ujson", "urllib3", "websocket-client"
     ],
+    extras_require={
+        "analytics": ["numpy"]
+    },
     license='MIT',
     author='Alexey Sakharov',
     author_email='alexey.sakharov@gmail.com',
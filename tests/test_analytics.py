@@ -0,0 +1,72 @@
+import logging
+
+import pytest
+
+from tinkoff_invest.analytics import OperationsFrame
+from tinkoff_invest.models.operation import Operation
+from tinkoff_invest.models.types import Currency, OperationType
+
+
+def _operation(minute: int, figi: str, operation_type: str, quantity: int = 0, price: float = 0.0,
+               payment: float = 0.0, currency: str = "RUB", status: str = "Done") -> Operation:
+    return Operation({"id": str(minute), "date": "2021-03-01T10:{:02d}:00+03:00".format(minute), "figi": figi,
+                      "operationType": operation_type, "quantityExecuted": quantity, "price": price,
+                      "payment": payment, "currency": currency, "status": status})
+
+
+def _frame(*operations: Operation) -> OperationsFrame:
+    return OperationsFrame.from_operations(operations)
+
+
+def test_realized_pnl_is_matched_in_fifo_order():
+    frame = _frame(_operation(0, "A", "Buy", 10, 100.0),
+                   _operation(1, "A", "Buy", 10, 110.0),
+                   _operation(2, "A", "Sell", 15, 120.0),
+                   _operation(3, "B", "Buy", 5, 10.0),
+                   _operation(4, "B", "Sell", 5, 9.0))
+
+    pnl = frame.realized_pnl()
+    assert pnl["A"] == pytest.approx(15 * 120.0 - (10 * 100.0 + 5 * 110.0))
+    assert pnl["B"] == pytest.approx(-5.0)
+
+
+def test_operations_are_ordered_by_time():
+    frame = _frame(_operation(5, "A", "Sell", 10, 120.0),
+                   _operation(1, "A", "Buy", 10, 100.0))
+
+    assert frame.realized_pnl() == {"A": pytest.approx(200.0)}
+
+
+def test_short_sale_is_not_matched_with_later_buy(caplog):
+    frame = _frame(_operation(0, "G", "Sell", 10, 120.0),
+                   _operation(1, "G", "Buy", 10, 100.0))
+
+    with caplog.at_level(logging.WARNING):
+        assert frame.realized_pnl() == {"G": 0.0}
+    assert "G 10" in caplog.text
+
+
+def test_only_bought_part_of_sale_is_matched(caplog):
+    frame = _frame(_operation(0, "G", "Buy", 5, 100.0),
+                   _operation(1, "G", "Sell", 10, 120.0),
+                   _operation(2, "G", "Buy", 10, 90.0),
+                   _operation(3, "G", "Sell", 10, 95.0))
+
+    with caplog.at_level(logging.WARNING):
+        pnl = frame.realized_pnl()
+    assert pnl["G"] == pytest.approx(5 * 20.0 + 10 * 5.0)
+    assert "G 5" in caplog.text
+
+
+def test_totals():
+    frame = _frame(_operation(0, "", "BrokerCommission", payment=-3.0),
+                   _operation(1, "", "ExchangeCommission", payment=-1.5, currency="USD"),
+                   _operation(2, "A", "Dividend", payment=50.0),
+                   _operation(3, "A", "TaxDividend", payment=-6.5),
+                   _operation(4, "A", "Buy", 1, 10.0, payment=-10.0, status="Progress"))
+
+    assert frame.fee_totals() == {Currency.RUB: -3.0, Currency.USD: -1.5}
+    assert frame.income_totals() == {Currency.RUB: 50.0}
+    assert frame.tax_totals() == {Currency.RUB: -6.5}
+    assert frame.totals_by_type()[(OperationType.DIVIDEND, Currency.RUB)] == 50.0
+    assert len(frame) == 4
@@ -0,0 +1,106 @@
+import types
+from typing import List
+
+import ujson
+
+from tinkoff_invest import base_session
+from tinkoff_invest.models.money import Money
+from tinkoff_invest.models.operation import Operation
+from tinkoff_invest.models.order import Order, OrderRequest
+from tinkoff_invest.models.types import OperationType
+from tinkoff_invest.session import ProductionSession
+
+
+class FakeResponse:
+    def __init__(self, status_code: int, body: dict):
+        self.status_code = status_code
+        self.text = ujson.dumps(body)
+        self.url = "url"
+
+
+class FakeHttpSession:
+    def __init__(self, *responses: FakeResponse):
+        self.responses = list(responses)
+        self.urls: List[str] = []
+
+    def get(self, url: str, headers: dict) -> FakeResponse:
+        self.urls.append(url)
+        return self.responses.pop(0)
+
+    def post(self, url: str, headers: dict, data: str) -> FakeResponse:
+        return self.get(url, headers)
+
+
+def _create_session(*responses: FakeResponse) -> ProductionSession:
+    session = ProductionSession("token", server_address="https://server/", account_id="ACC")
+    session._http = FakeHttpSession(*responses)
+    return session
+
+
+def test_http_client_is_imported_once():
+    assert base_session._get_http_client() is base_session._get_http_client()
+
+
+def test_get_escapes_query_and_passes_account(monkeypatch):
+    monkeypatch.setattr(base_session, "_RETRY_TIMEOUT_SEC", 0)
+    session = _create_session(FakeResponse(429, {}), FakeResponse(200, {"payload": {"orders": []}}))
+
+    assert session._get("operations?from=2021-03-01T10:00:00+03:00") == {"payload": {"orders": []}}
+    assert session._http.urls[-1] == "https://server/operations?from=2021-03-01T10%3A00%3A00%2B03%3A00" \
+                                     "&brokerAccountId=ACC"
+    assert len(session._http.urls) == 2
+
+
+def test_post_retries_rate_limited_requests(monkeypatch):
+    monkeypatch.setattr(base_session, "_RETRY_TIMEOUT_SEC", 0)
+    session = _create_session(FakeResponse(429, {}), FakeResponse(200, {"payload": {"orderId": "1"}}))
+
+    assert session._post("orders/cancel?orderId=1", {}) == {"payload": {"orderId": "1"}}
+
+
+def test_batch_results_keep_request_order_and_errors(monkeypatch):
+    session = _create_session()
+
+    def _post(query: str, data: dict, account_id=None) -> dict:
+        if "figi=B" in query:
+            raise ValueError("rejected")
+        if query.startswith("orders/cancel"):
+            return {"payload": {}}
+        return {"payload": {"orderId": query.rsplit("=", 1)[-1], "operation": data["operation"], "status": "New",
+                            "requestedLots": data["lots"], "executedLots": 0}}
+
+    monkeypatch.setattr(session, "_post", _post)
+    results = session.place_orders([OrderRequest(OperationType.BUY, "A", 1, 10.0),
+                                    OrderRequest(OperationType.SELL, "B", 2),
+                                    OrderRequest(OperationType.SELL, "C", 3)])
+
+    assert [result.request.figi for result in results] == ["A", "B", "C"]
+    assert [result.order.id if result.order else None for result in results] == ["A", None, "C"]
+    assert isinstance(results[1].error, ValueError)
+    assert session.cancel_orders(["1", "2"]) == {"1": None, "2": None}
+
+
+def test_completion_waits_for_commission_of_done_operation(monkeypatch):
+    monkeypatch.setattr(base_session, "time", types.SimpleNamespace(sleep=lambda _: None))
+    session = _create_session()
+    operation = {"id": "1", "figi": "A", "operationType": "Buy", "status": "Done", "currency": "RUB",
+                 "payment": -100.0, "price": 100.0, "quantityExecuted": 1, "date": "2021-03-01T10:00:00+03:00"}
+    reported = [Operation(operation), Operation(dict(operation, commission={"currency": "RUB", "value": -0.05}))]
+    requests = []
+
+    def get_operations(start_time, finish_time, figi):
+        requests.append(figi)
+        return [reported[len(requests) - 1]]
+
+    class Callback:
+        def on_order_completed(self, order, op):
+            self.operation = op
+
+    monkeypatch.setattr(session, "get_orders", lambda: [])
+    monkeypatch.setattr(session, "get_operations", get_operations)
+    callback = Callback()
+    session.wait_for_order_completion(Order({"orderId": "1", "figi": "A", "operation": "Buy", "status": "New",
+                                             "requestedLots": 1, "executedLots": 0}), callback)
+
+    assert requests == ["A", "A"]
+    assert callback.operation.commission == Money.from_float(0.05)
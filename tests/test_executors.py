@@ -0,0 +1,104 @@
+import threading
+import time
+
+from tinkoff_invest.executors import EventExecutor
+
+
+def _wait(condition, timeout_sec: float = 5) -> None:
+    deadline = time.monotonic() + timeout_sec
+    while not condition():
+        assert time.monotonic() < deadline, "Condition has not been met"
+        time.sleep(0.01)
+
+
+def test_submitted_tasks_are_processed():
+    executor = EventExecutor("test", 2)
+    executor.start()
+    results = []
+    for value in range(100):
+        executor.submit(results.append, value)
+    executor.wait_until_idle()
+    executor.shutdown()
+
+    assert sorted(results) == list(range(100))
+
+
+def test_errors_are_passed_to_handler():
+    errors = []
+    executor = EventExecutor("test", 1, on_error=errors.append)
+    executor.start()
+    executor.submit(lambda: 1 / 0)
+    executor.wait_until_idle()
+    executor.shutdown()
+
+    assert len(errors) == 1 and isinstance(errors[0], ZeroDivisionError)
+
+
+def test_restart_is_not_affected_by_stop_requests_of_busy_workers():
+    release = threading.Event()
+    executor = EventExecutor("test", 2)
+    executor.start()
+    executor.submit(release.wait)
+    time.sleep(0.1)
+    executor.shutdown()
+    executor.start()
+    release.set()
+
+    done = []
+    for value in range(10):
+        executor.submit(done.append, value)
+    executor.wait_until_idle()
+    time.sleep(0.1)
+
+    assert sorted(done) == list(range(10))
+    assert sum(worker.is_alive() for worker in executor._workers) == 2
+    executor.shutdown()
+
+
+def test_resize():
+    executor = EventExecutor("test", 1)
+    executor.start()
+    executor.resize(3)
+    assert sum(worker.is_alive() for worker in executor._workers) == 3
+
+    executor.resize(1)
+    _wait(lambda: sum(worker.is_alive() for worker in executor._workers) == 1)
+    assert executor.workers_count == 1
+    executor.shutdown()
+
+
+def test_ordered_tasks_keep_order_of_their_key():
+    executor = EventExecutor("test", 4)
+    executor.start()
+    results = {key: [] for key in range(3)}
+
+    def append(key: int, value: int) -> None:
+        # Uneven delays let other workers overtake the current one unless tasks of the key are serialized
+        if value % 7 == 0:
+            time.sleep(0.001)
+        results[key].append(value)
+
+    for value in range(1000):
+        for key in results:
+            executor.submit_ordered(key, append, key, value)
+    executor.wait_until_idle()
+    executor.shutdown()
+
+    assert all(values == list(range(1000)) for values in results.values())
+    assert not executor._lanes
+
+
+def test_ordered_lanes_survive_restart():
+    release = threading.Event()
+    executor = EventExecutor("test", 2)
+    executor.start()
+    executor.submit(release.wait)
+    time.sleep(0.1)
+    executor.shutdown()
+    done = []
+    executor.submit_ordered("key", done.append, 1)
+    executor.start()
+    executor.submit_ordered("key", done.append, 2)
+    release.set()
+    _wait(lambda: done == [1, 2])
+    executor.shutdown()
@@ -0,0 +1,62 @@
+import datetime
+from typing import List
+
+from tinkoff_invest.ledger import OperationsLedger
+from tinkoff_invest.models.operation import Operation
+from tinkoff_invest.models.types import OperationType
+
+
+def _operation(operation_id: str, figi: str, operation_type: str, status: str = "Done") -> dict:
+    return {"id": operation_id, "date": "2021-03-01T10:00:00+03:00", "figi": figi, "operationType": operation_type,
+            "payment": -100.0, "currency": "RUB", "status": status}
+
+
+class FakeSession:
+    def __init__(self, operations: List[dict]):
+        self.operations: List[dict] = operations
+        self.start_times: List[datetime.datetime] = []
+
+    def iter_operations(self, start_time, finish_time, window, account_id):
+        self.start_times.append(start_time)
+        return [Operation(dict(raw)) for raw in self.operations]
+
+
+def test_operations_survive_reload_and_are_indexed(tmp_path):
+    path = str(tmp_path / "ledger.jsonl")
+    session = FakeSession([_operation("1", "A", "Buy"), _operation("2", "B", "Sell")])
+    ledger = OperationsLedger(session, path)
+    assert ledger.sync(datetime.datetime(2021, 1, 1)) == 2
+
+    reloaded = OperationsLedger(session, path)
+    assert len(reloaded) == 2
+    assert reloaded.synced_to == ledger.synced_to
+    assert [operation.id for operation in reloaded.get_operations_by_figi("A")] == ["1"]
+    assert [operation.id for operation in reloaded.get_operations_by_type(OperationType.SELL)] == ["2"]
+
+
+def test_changed_operations_are_updated(tmp_path):
+    path = str(tmp_path / "ledger.jsonl")
+    session = FakeSession([_operation("1", "A", "Buy", "Progress")])
+    ledger = OperationsLedger(session, path)
+    ledger.sync(datetime.datetime(2021, 1, 1))
+    synced_to = ledger.synced_to
+
+    session.operations = [_operation("1", "A", "Buy")]
+    assert ledger.sync() == 1
+    assert ledger.sync() == 0
+    assert session.start_times[1] == synced_to - datetime.timedelta(days=1)
+    assert OperationsLedger(session, path).get_operation("1")._data["status"] == "Done"
+
+
+def test_incomplete_last_record_is_skipped(tmp_path):
+    path = tmp_path / "ledger.jsonl"
+    path.write_text('{"operation": {"id": "1", "figi": "A", "operationType": "Buy"}}\n{"operation": {"id"')
+
+    session = FakeSession([_operation("2", "B", "Sell")])
+    ledger = OperationsLedger(session, str(path))
+    assert len(ledger) == 1
+
+    ledger.sync(datetime.datetime(2021, 1, 1))
+    reloaded = OperationsLedger(session, str(path))
+    assert reloaded.get_operation("2") is not None
+    assert len(reloaded) == 2
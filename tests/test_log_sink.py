@@ -0,0 +1,45 @@
+import logging
+import types
+
+from tinkoff_invest import log_sink
+
+
+def test_debug_messages_are_sampled(caplog):
+    log_sink.set_sampling_rate("test_sampled", 3)
+    with caplog.at_level(logging.DEBUG):
+        for index in range(7):
+            log_sink.debug_sampled("test_sampled", "Event %d", index)
+
+    assert [record.getMessage() for record in caplog.records] == ["Event 0", "Event 3", "Event 6"]
+
+
+def test_repeated_warnings_are_suppressed(caplog, monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(log_sink, "time", types.SimpleNamespace(monotonic=lambda: now[0]))
+    with caplog.at_level(logging.WARNING):
+        for _ in range(3):
+            log_sink.warning_rate_limited("test_warning", "Queue is %s", "full", interval_sec=10)
+        now[0] += 10
+        log_sink.warning_rate_limited("test_warning", "Queue is %s", "full", interval_sec=10)
+
+    assert [record.getMessage() for record in caplog.records] == [
+        "Queue is full", "Queue is full (2 similar messages suppressed)"]
+
+
+def test_async_logging_keeps_handlers():
+    records = []
+    handler = logging.Handler()
+    handler.emit = records.append
+    root = logging.getLogger()
+    root.addHandler(handler)
+    try:
+        listener = log_sink.enable_async_logging()
+        assert handler not in root.handlers
+        logging.warning("Async message")
+        log_sink.disable_async_logging()
+        assert handler in root.handlers
+        assert listener is not None
+        assert "Async message" in [record.getMessage() for record in records]
+    finally:
+        log_sink.disable_async_logging()
+        root.removeHandler(handler)
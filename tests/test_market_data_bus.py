@@ -0,0 +1,99 @@
+import multiprocessing
+import uuid
+
+import pytest
+
+from tinkoff_invest.base_strategy import BaseStrategy
+from tinkoff_invest.market_data_bus import MarketDataBusClient, MarketDataBusServer
+from tinkoff_invest.models.candle import Candle
+from tinkoff_invest.models.order_book import OrderBook
+from tinkoff_invest.models.types import SubscriptionEventType, SubscriptionInterval
+from tinkoff_invest.subscriptions import SubscriptionManager, build_subscription_name
+
+_AUTHKEY = b"secret"
+
+
+def _create_server() -> MarketDataBusServer:
+    manager = SubscriptionManager("ws://localhost", "token", workers_count=1)
+    manager.enable_offline_mode()
+    return MarketDataBusServer(manager, _AUTHKEY, "tinkoff_invest_test_" + uuid.uuid4().hex[:8], 4096)
+
+
+def test_events_are_delivered_to_clients():
+    server = _create_server()
+    client = MarketDataBusClient(_AUTHKEY, server.name)
+    try:
+        client.subscribe_to_candles("FIGI", SubscriptionInterval.MINUTES_1, BaseStrategy())
+        server.on_candle(Candle({"figi": "FIGI", "interval": "1min", "o": 1.5, "c": 2, "h": 2, "l": 1, "v": 10,
+                                 "time": "2021-03-01T10:00:00Z"}))
+
+        name = build_subscription_name("FIGI", "candle", "1min")
+        records = list(client._read_records())
+        assert [record[:2] for record in records] == [(name, SubscriptionEventType.CANDLE)]
+        assert client._decode(*records[0]) == {"figi": "FIGI", "interval": "1min", "o": 1.5, "c": 2, "h": 2,
+                                               "l": 1, "v": 10, "time": "2021-03-01T10:00:00Z"}
+    finally:
+        client.stop()
+        server.close()
+
+
+def test_order_books_are_passed_as_binary_records():
+    server = _create_server()
+    client = MarketDataBusClient(_AUTHKEY, server.name)
+    try:
+        client.subscribe_to_order_book("FIGI", 2, BaseStrategy())
+        streamed = {"figi": "FIGI", "depth": 2, "bids": [[99.5, 3], [99, 1]], "asks": [[100, 5]]}
+        snapshot = dict(streamed, lastPrice=99.7, closePrice=98, tradeStatus="NormalTrading")
+        server.on_order_book(OrderBook(streamed))
+        server.on_order_book(OrderBook(snapshot))
+
+        records = list(client._read_records())
+        assert b"bids" not in records[0][2]
+        assert [client._decode(*record) for record in records] == [streamed, snapshot]
+    finally:
+        client.stop()
+        server.close()
+
+
+def test_server_unsubscribes_on_close():
+    server = _create_server()
+    manager = server._manager
+    server.subscribe_to_order_book("FIGI", 10)
+    assert build_subscription_name("FIGI", "orderbook", "10") in manager._subscriptions
+
+    server.close()
+    assert manager._subscriptions == {}
+
+
+def test_clients_without_key_are_rejected():
+    server = _create_server()
+    try:
+        with pytest.raises(AssertionError):
+            MarketDataBusClient(b"", server.name)
+        with pytest.raises(multiprocessing.AuthenticationError):
+            MarketDataBusClient(b"wrong", server.name)
+    finally:
+        server.close()
+
+
+def test_running_bus_is_not_replaced():
+    server = _create_server()
+    try:
+        with pytest.raises(FileExistsError):
+            MarketDataBusServer(server._manager, _AUTHKEY, server.name, 4096)
+        MarketDataBusClient(_AUTHKEY, server.name).stop()
+    finally:
+        server.close()
+
+
+def test_stale_bus_is_replaced():
+    crashed = _create_server()
+    # A crashed server leaves its shared memory behind, but nobody listens to its control channel
+    crashed._is_running = False
+    crashed._listener.close()
+
+    server = MarketDataBusServer(crashed._manager, _AUTHKEY, crashed.name, 4096)
+    client = MarketDataBusClient(_AUTHKEY, server.name)
+    client.stop()
+    server.close()
+    crashed._memory.close()
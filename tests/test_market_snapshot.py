@@ -0,0 +1,48 @@
+import math
+import threading
+
+from tinkoff_invest.market_snapshot import MarketSnapshot, TRADING_STATUSES
+from tinkoff_invest.models.candle import Candle
+from tinkoff_invest.models.instrument_status import InstrumentStatus
+from tinkoff_invest.models.order_book import OrderBook
+from tinkoff_invest.models.types import TradingStatus
+
+
+def _candle(figi: str, close: float) -> Candle:
+    return Candle({"figi": figi, "interval": "1min", "o": 1.0, "c": close, "h": 3.0, "l": 0.5, "v": 10,
+                   "time": "2021-03-01T10:00:00Z"})
+
+
+def test_events_update_rows_of_their_instruments():
+    market = MarketSnapshot(["A"], capacity=1)
+    market.on_candle(_candle("B", 2.0))
+    market.on_order_book(OrderBook({"figi": "A", "depth": 1, "bids": [[9.5, 3]], "asks": []}))
+    market.on_instrument_info(InstrumentStatus({"figi": "A", "trade_status": "break_in_trading",
+                                                "limit_up": 11.0, "limit_down": 9.0}))
+
+    snapshot = market.snapshot()
+    assert snapshot.figis == ["A", "B"]
+    assert snapshot.column("close")[1] == 2.0
+    assert snapshot.row("A")[5:7].tolist() == [9.5, 3.0]
+    assert math.isnan(snapshot.column("ask")[0])
+    assert TRADING_STATUSES[int(snapshot.column("trading_status")[0])] == TradingStatus.BREAK
+    assert snapshot.version == 3
+
+
+def test_handlers_get_batches_of_updates():
+    market = MarketSnapshot(batch_interval_sec=0.01)
+    batches = []
+    received = threading.Event()
+
+    def _handler(snapshot) -> None:
+        batches.append(snapshot.updated_figis)
+        received.set()
+
+    market.on_candle(_candle("A", 1.0))
+    market.on_candle(_candle("B", 1.0))
+    market.add_handler(_handler)
+    assert received.wait(5)
+    market.stop()
+
+    assert batches[0] == ["A", "B"]
+    assert not market.snapshot().updated.any()
@@ -0,0 +1,68 @@
+from decimal import Decimal
+
+import pytest
+
+from tinkoff_invest.models.money import Money, MoneyAmount, build_money, build_money_amount, sum_money, sum_values
+from tinkoff_invest.models.operation import Operation
+from tinkoff_invest.models.portfolio import PositionPortfolio
+from tinkoff_invest.models.types import Currency
+
+
+def test_from_float_keeps_every_digit_of_large_amounts():
+    assert Money.from_float(286778225.42).units == 286778225420000000
+    assert Money.from_float("12345678.123456789").units == 12345678123456789
+    assert Money.from_float(Decimal("0.1")).units == 100000000
+    assert Money.from_float(0.1) + Money.from_float(0.2) == Money.from_float(0.3)
+
+
+def test_missing_amount_takes_currency_of_other_operand():
+    zero = build_money(None)
+    usd = Money.from_float(10.5, Currency.USD)
+
+    assert zero.currency is None
+    assert (usd + zero) == usd
+    assert (zero + usd) == usd
+    assert zero <= usd
+
+
+def test_operation_without_commission_is_summed_with_payment_in_its_currency():
+    operation = Operation({"id": "1", "date": "2021-03-01T10:00:00+03:00", "operationType": "Buy",
+                           "payment": -100.0, "currency": "USD", "status": "Done"})
+
+    assert operation.commission == Money(0, Currency.USD)
+    assert operation.payment + operation.commission == Money.from_float(100.0, Currency.USD)
+
+
+def test_position_amounts_are_in_position_currency():
+    position = PositionPortfolio({"averagePositionPrice": {"currency": "USD", "value": 120.5}})
+
+    assert position.expected_yield == Money(0, Currency.USD)
+    assert position.average_price_no_nkd == Money(0, Currency.USD)
+
+
+def test_different_currencies_are_not_mixed():
+    with pytest.raises(AssertionError):
+        _ = Money(1, Currency.USD) + Money(1, Currency.RUB)
+
+
+def test_sums_are_exact_and_grouped_by_currency():
+    totals = sum_money([Money.from_float(0.1, Currency.USD), Money.from_float(0.2, Currency.USD),
+                        Money.from_float(1.0), build_money(None)])
+
+    assert totals == {Currency.USD: Money.from_float("0.3", Currency.USD), Currency.RUB: Money.from_float(1.0)}
+    assert sum_values([0.1] * 10) == Money.from_float(1)
+
+
+def test_zero_amounts_are_false():
+    assert not build_money(None)
+    assert not Money(0, Currency.USD)
+    assert Money.from_float(-0.01)
+
+
+def test_deprecated_amounts_are_money():
+    with pytest.warns(DeprecationWarning):
+        amount = MoneyAmount({"currency": "USD", "value": -1.5})
+    with pytest.warns(DeprecationWarning):
+        assert build_money_amount(-1.5, Currency.USD) == amount == Money.from_float(1.5, Currency.USD)
+    with pytest.warns(DeprecationWarning):
+        assert MoneyAmount() == Money(0, Currency.RUB)
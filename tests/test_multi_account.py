@@ -0,0 +1,39 @@
+import threading
+
+from tinkoff_invest.models.account import Account
+from tinkoff_invest.models.types import AccountType
+from tinkoff_invest.multi_account import MultiAccountSession
+
+
+class FakeSession:
+    def __init__(self):
+        self.threads = set()
+        self.accounts = [Account({"brokerAccountId": "1", "brokerAccountType": "Tinkoff"}),
+                         Account({"brokerAccountId": "2", "brokerAccountType": "TinkoffIis"})]
+
+    def get_portfolio(self, account_id=None):
+        self.threads.add(threading.current_thread().name)
+        return "portfolio " + account_id
+
+    def get_orders(self, account_id=None):
+        return ["order of " + account_id]
+
+
+def test_requests_are_made_for_every_account():
+    session = FakeSession()
+    accounts = MultiAccountSession(session)
+
+    assert accounts.account_ids == ["1", "2"]
+    assert accounts.get_portfolios() == {"1": "portfolio 1", "2": "portfolio 2"}
+    assert accounts.get_orders() == {"1": ["order of 1"], "2": ["order of 2"]}
+    assert all(name.startswith("tinkoff_invest_accounts") for name in session.threads)
+    accounts.close()
+
+
+def test_accounts_can_be_selected():
+    accounts = MultiAccountSession(FakeSession(), ["2"])
+
+    assert accounts.get_portfolios() == {"2": "portfolio 2"}
+    assert accounts.get_account_id(AccountType.TINKOFF_IIS) == "2"
+    assert accounts.get_account_id(AccountType.TINKOFF) is None
+    accounts.close()
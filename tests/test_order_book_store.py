@@ -0,0 +1,73 @@
+import datetime
+import threading
+import time
+
+from tinkoff_invest.models.order_book import OrderBook
+from tinkoff_invest.order_book_store import OrderBookHistory, OrderBookStore
+from tinkoff_invest.subscriptions import SubscriptionManager
+
+_START = datetime.datetime(2021, 3, 1, 10, tzinfo=datetime.timezone.utc)
+_START_NS = int(_START.timestamp()) * 10 ** 9
+
+
+def _order_book(bid: float) -> OrderBook:
+    return OrderBook({"figi": "FIGI", "depth": 2, "bids": [[bid, 1], [bid - 1, 2]], "asks": [[bid + 1, 3]],
+                      "lastPrice": bid, "tradeStatus": "NormalTrading"})
+
+
+def test_order_books_are_queried_as_of_moment(tmp_path):
+    store = OrderBookStore(str(tmp_path), chunk_size=3)
+    for second in range(7):
+        store.append(_order_book(100.0 + second), _START_NS + second * 10 ** 9)
+    store.close()
+
+    history = OrderBookHistory(str(tmp_path))
+    book = history.as_of("FIGI", _START + datetime.timedelta(seconds=4, milliseconds=500))
+    assert book.bids[0] == [104.0, 1]
+    assert history.as_of("FIGI", _START - datetime.timedelta(seconds=1)) is None
+
+    columns = history.range("FIGI", _START + datetime.timedelta(seconds=2), _START + datetime.timedelta(seconds=5))
+    assert columns.last_price.tolist() == [102.0, 103.0, 104.0, 105.0]
+    assert columns.bids[:, 1, 0].tolist() == [101.0, 102.0, 103.0, 104.0]
+    history.close()
+
+
+def test_chunks_are_written_by_writer_thread(tmp_path, monkeypatch):
+    threads = set()
+    original = OrderBookStore._write_chunk
+
+    def _write_chunk(store, *args):
+        threads.add(threading.current_thread().name)
+        original(store, *args)
+
+    monkeypatch.setattr(OrderBookStore, "_write_chunk", _write_chunk)
+    store = OrderBookStore(str(tmp_path), chunk_size=2)
+    for second in range(5):
+        store.append(_order_book(100.0), _START_NS + second * 10 ** 9)
+    store.close()
+
+    assert threads == {"tinkoff_invest_order_book_store"}
+
+
+def test_partial_chunks_are_written_after_interval(tmp_path):
+    store = OrderBookStore(str(tmp_path), flush_interval_sec=0.05)
+    store.append(_order_book(100.0), _START_NS)
+    history = OrderBookHistory(str(tmp_path))
+    deadline = time.monotonic() + 5
+    while history.as_of("FIGI", _START) is None and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert history.as_of("FIGI", _START).bids == [[100.0, 1], [99.0, 2]]
+    history.close()
+    store.close()
+
+
+def test_close_removes_store_from_listeners(tmp_path):
+    manager = SubscriptionManager("ws://localhost", "token", workers_count=1)
+    store = manager.create_order_book_store(str(tmp_path))
+    assert store in manager._market_data_listeners
+
+    store.close()
+    assert store not in manager._market_data_listeners
+    store.append(_order_book(100.0), _START_NS)
+    assert store.records_count == 0
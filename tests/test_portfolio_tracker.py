@@ -0,0 +1,164 @@
+import datetime
+
+from tinkoff_invest.base_strategy import BaseStrategy
+from tinkoff_invest.models.candle import Candle
+from tinkoff_invest.models.instrument import Instrument
+from tinkoff_invest.models.operation import Operation
+from tinkoff_invest.models.order import Order
+from tinkoff_invest.models.portfolio import Portfolio
+from tinkoff_invest.models.types import Currency
+from tinkoff_invest.portfolio_tracker import PortfolioTracker
+
+
+def _time(minutes: int) -> str:
+    return (datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(minutes=minutes)).isoformat()
+
+
+def _position(figi: str, balance: float, price: float) -> dict:
+    return {"figi": figi, "ticker": figi + "_T", "name": figi, "isin": "", "instrumentType": "Stock",
+            "balance": balance, "lots": balance / 10, "blocked": 0,
+            "averagePositionPrice": {"currency": "RUB", "value": price}}
+
+
+class FakeSession:
+    def __init__(self):
+        self.positions = [_position("A", 10, 100.0)]
+        self.rub = 1000.0
+        self.operations = []
+        self.subscriptions = []
+        self.instrument_requests = 0
+        self.on_get_portfolio = None
+
+    def get_portfolio(self) -> Portfolio:
+        if self.on_get_portfolio:
+            self.on_get_portfolio()
+        return Portfolio({"payload": {"positions": list(self.positions)}},
+                         {"payload": {"currencies": [{"currency": "RUB", "balance": self.rub}]}})
+
+    def get_operations(self, start_time, finish_time, figi=""):
+        return [Operation(raw) for raw in self.operations]
+
+    def get_instrument_by_figi(self, figi: str) -> Instrument:
+        self.instrument_requests += 1
+        return Instrument({"figi": figi, "ticker": figi + "_T", "name": figi, "type": "Stock", "currency": "RUB",
+                           "lot": 10})
+
+    def subscribe_to_candles(self, figi, interval, strategy):
+        self.subscriptions.append(strategy)
+
+    def add_market_data_listener(self, listener):
+        pass
+
+    def add_order_listener(self, listener):
+        pass
+
+    def remove_market_data_listener(self, listener):
+        pass
+
+    def remove_order_listener(self, listener):
+        pass
+
+
+def _operation(order_id: str, figi: str, trades: list) -> dict:
+    return {"id": order_id, "figi": figi, "operationType": "Buy", "status": "Done", "currency": "RUB",
+            "payment": -sum(price * quantity for _, price, quantity, _ in trades), "date": _time(0),
+            "trades": [{"tradeId": trade_id, "price": price, "quantity": quantity, "date": date}
+                       for trade_id, price, quantity, date in trades]}
+
+
+def _order(order_id: str, figi: str, executed_lots: int) -> Order:
+    return Order({"orderId": order_id, "figi": figi, "operation": "Buy", "status": "PartiallyFill",
+                  "requestedLots": 2, "executedLots": executed_lots, "price": 200.0})
+
+
+def _create_tracker():
+    session = FakeSession()
+    return session, PortfolioTracker(session, resync_interval_sec=0)
+
+
+def test_fills_are_booked_at_execution_prices():
+    session, tracker = _create_tracker()
+    session.operations = [_operation("1", "A", [("t1", 110.0, 10, _time(1))])]
+    tracker.on_order_updated(_order("1", "A", 1))
+
+    position = tracker.get_position_by_figi("A")
+    assert position.balance == 20
+    assert position.lots == 2
+    assert position.average_price == 105.0
+    assert tracker.get_currency_balance(Currency.RUB) == 1000.0 - 1100.0
+
+
+def test_trades_are_booked_once():
+    session, tracker = _create_tracker()
+    session.operations = [_operation("1", "A", [("t1", 110.0, 10, _time(1))])]
+    tracker.on_order_updated(_order("1", "A", 1))
+    session.operations = [_operation("1", "A", [("t1", 110.0, 10, _time(1)), ("t2", 120.0, 10, _time(2))])]
+    tracker.on_order_completed(_order("1", "A", 2), Operation(session.operations[0]))
+    tracker.on_order_completed(_order("1", "A", 2), Operation(session.operations[0]))
+
+    assert tracker.get_position_by_figi("A").balance == 30
+    assert tracker.get_currency_balance(Currency.RUB) == 1000.0 - 1100.0 - 1200.0
+
+
+def test_trades_included_in_synchronized_portfolio_are_not_counted_twice():
+    session, tracker = _create_tracker()
+    session.positions = [_position("A", 20, 105.0)]
+    tracker.sync()
+    tracker.on_order_completed(_order("1", "A", 1),
+                               Operation(_operation("1", "A", [("t1", 110.0, 10, _time(-1))])))
+
+    assert tracker.get_position_by_figi("A").balance == 20
+
+
+def test_trades_booked_during_sync_are_kept():
+    session, tracker = _create_tracker()
+    operation = Operation(_operation("1", "B", [("t1", 50.0, 10, _time(1))]))
+    session.on_get_portfolio = lambda: tracker.on_order_completed(_order("1", "B", 1), operation)
+    tracker.sync()
+
+    assert tracker.get_position_by_figi("B").balance == 10
+    assert session.instrument_requests == 1
+
+
+def test_track_does_not_subscribe_tracker_itself():
+    session, tracker = _create_tracker()
+    tracker.track("A")
+    tracker.on_candle(Candle({"figi": "A", "c": 130.0}))
+
+    assert len(session.subscriptions) == 1 and session.subscriptions[0] is not tracker
+    assert isinstance(session.subscriptions[0], BaseStrategy)
+    assert tracker.get_position_by_figi("A").last_price == 130.0
+
+
+def test_commission_is_booked_once_per_operation():
+    session, tracker = _create_tracker()
+    raw = dict(_operation("1", "A", [("t1", 110.0, 10, _time(1))]), commission={"currency": "RUB", "value": -5.5})
+    session.operations = [raw]
+    tracker.on_order_updated(_order("1", "A", 1))
+    tracker.on_order_completed(_order("1", "A", 1), Operation(raw))
+
+    assert tracker.get_currency_balance(Currency.RUB) == 1000.0 - 1100.0 - 5.5
+
+
+def test_position_without_prices_takes_instrument_currency():
+    session, tracker = _create_tracker()
+    session.positions = [{"figi": "B", "ticker": "B_T", "name": "B", "isin": "", "instrumentType": "Stock",
+                          "balance": 10, "lots": 1, "blocked": 0}]
+    tracker.sync()
+
+    assert tracker.get_position_by_figi("B").currency == Currency.RUB
+
+
+def test_booked_trades_are_forgotten_after_sync():
+    session, tracker = _create_tracker()
+    operation = Operation(_operation("1", "A", [("t1", 110.0, 10, _time(-1))]))
+    tracker._synced_at = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(minutes=2)
+    tracker.on_order_completed(_order("1", "A", 1), operation)
+    assert "t1" in tracker._booked_trades
+
+    session.positions = [_position("A", 20, 105.0)]
+    tracker.sync()
+    tracker.on_order_completed(_order("1", "A", 1), operation)
+
+    assert tracker._booked_trades == {}
+    assert tracker.get_position_by_figi("A").balance == 20
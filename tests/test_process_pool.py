@@ -0,0 +1,87 @@
+import logging
+import time
+
+import pytest
+
+from tinkoff_invest.base_strategy import BaseStrategy
+from tinkoff_invest.models.candle import Candle
+from tinkoff_invest.process_pool import StrategyProcessPool
+
+
+class CountingStrategy(BaseStrategy):
+    def __init__(self, path: str):
+        self.path = path
+        self.counter = 0
+
+    def on_candle(self, candle: Candle) -> None:
+        self.counter += 1
+        with open(self.path, "a") as file:
+            file.write("{} {}\n".format(candle.figi, self.counter))
+
+
+def _wait_for_lines(path, count: int, timeout_sec: float = 30):
+    deadline = time.monotonic() + timeout_sec
+    while time.monotonic() < deadline:
+        if path.exists() and len(path.read_text().splitlines()) >= count:
+            return path.read_text().splitlines()
+        time.sleep(0.05)
+    raise AssertionError("Strategy has not processed {} events".format(count))
+
+
+@pytest.fixture
+def pool():
+    pool = StrategyProcessPool(1)
+    yield pool
+    pool.shutdown()
+
+
+def test_events_are_processed_by_a_copy_of_strategy(pool, tmp_path):
+    path = tmp_path / "events.txt"
+    strategy = CountingStrategy(str(path))
+    proxy = pool.host(strategy)
+    proxy.on_candle(Candle({"figi": "A"}))
+    proxy.on_candle(Candle({"figi": "B"}))
+
+    assert _wait_for_lines(path, 2) == ["A 1", "B 2"]
+    assert strategy.counter == 0
+    assert pool.host(strategy) is proxy
+
+
+def test_restarted_process_restores_state_of_hosting(pool, tmp_path):
+    path = tmp_path / "events.txt"
+    proxy = pool.host(CountingStrategy(str(path)))
+    proxy.on_candle(Candle({"figi": "A"}))
+    _wait_for_lines(path, 1)
+
+    crashed = pool._processes[0]
+    crashed.terminate()
+    crashed.join()
+    deadline = time.monotonic() + 30
+    while pool._processes[0] is crashed and time.monotonic() < deadline:
+        time.sleep(0.05)
+    proxy.on_candle(Candle({"figi": "B"}))
+
+    assert _wait_for_lines(path, 2) == ["A 1", "B 1"]
+
+
+def test_failed_restart_is_logged_and_retried(pool, monkeypatch, caplog):
+    attempts = []
+
+    def fail(index: int) -> None:
+        attempts.append(index)
+        raise OSError("spawn failed")
+
+    monkeypatch.setattr(pool, "_restart_process", fail)
+    with caplog.at_level(logging.ERROR):
+        pool._connections[0].close()
+        pool._send(0, ("event", 0))
+        assert attempts == [0]
+        assert "Unable to restart strategy process 0: spawn failed" in caplog.messages
+
+        # Dead process is restarted by the monitor until it succeeds
+        pool._processes[0].terminate()
+        deadline = time.monotonic() + 10
+        while len(attempts) < 3 and time.monotonic() < deadline:
+            time.sleep(0.05)
+
+    assert attempts[:3] == [0, 0, 0]
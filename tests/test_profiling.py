@@ -0,0 +1,58 @@
+import time
+
+import pytest
+
+from tinkoff_invest.models.types import SubscriptionEventType
+from tinkoff_invest.profiling import CallbackProfiler, CallbackStatistics
+
+
+class NamedStrategy:
+    name = "named"
+
+
+def test_slow_callbacks_are_counted_and_reported():
+    reported = []
+    profiler = CallbackProfiler(0.01, lambda *args: reported.append(args))
+
+    profiler.measure(NamedStrategy(), SubscriptionEventType.CANDLE, "FIGI", lambda _: None, None)
+    profiler.measure(NamedStrategy(), SubscriptionEventType.CANDLE, "FIGI", lambda _: time.sleep(0.02), None)
+
+    statistics = profiler.statistics[("named", "FIGI", SubscriptionEventType.CANDLE)]
+    assert (statistics.count, statistics.slow_count) == (2, 1)
+    assert [args[:3] for args in reported] == [("named", SubscriptionEventType.CANDLE, "FIGI")]
+    assert reported[0][3] >= 0.02
+
+
+def test_instances_trading_different_instruments_are_measured_separately():
+    profiler = CallbackProfiler()
+    for figi in ("A", "B", "B"):
+        profiler.measure(NamedStrategy(), SubscriptionEventType.CANDLE, figi, lambda _: None, None)
+
+    assert {key: stat.count for key, stat in profiler.statistics.items()} == {
+        ("named", "A", SubscriptionEventType.CANDLE): 1, ("named", "B", SubscriptionEventType.CANDLE): 2}
+    assert str(profiler).count(" named ") == 2
+
+
+def test_failed_callback_is_measured():
+    profiler = CallbackProfiler()
+
+    def _fail(_):
+        raise ValueError()
+
+    try:
+        profiler.measure(object(), SubscriptionEventType.ORDER_BOOK, "FIGI", _fail, None)
+    except ValueError:
+        pass
+    assert profiler.statistics[("object", "FIGI", SubscriptionEventType.ORDER_BOOK)].count == 1
+    assert profiler._active_callbacks == {}
+
+
+def test_percentiles_of_samples():
+    statistics = CallbackStatistics()
+    for duration in range(1, 101):
+        statistics.add(duration / 1000, False)
+
+    assert statistics.percentile(0) == 0.001
+    assert statistics.percentile(50) == 0.051
+    assert statistics.percentile(100) == 0.1
+    assert statistics.mean_time == pytest.approx(0.0505)
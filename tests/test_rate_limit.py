@@ -0,0 +1,50 @@
+from typing import List
+
+import pytest
+
+from tinkoff_invest import rate_limit
+from tinkoff_invest.rate_limit import RateLimiter
+
+
+class _Clock:
+    def __init__(self):
+        self.now: float = 1000.0
+        self.sleeps: List[float] = []
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def sleep(self, delay: float) -> None:
+        self.sleeps.append(delay)
+        self.now += delay
+
+
+@pytest.fixture
+def clock(monkeypatch) -> _Clock:
+    clock = _Clock()
+    monkeypatch.setattr(rate_limit, "time", clock)
+    return clock
+
+
+def test_no_period_contains_more_than_requests_count(clock):
+    limiter = RateLimiter(5, 60)
+    times = []
+    for _ in range(12):
+        limiter.acquire()
+        times.append(clock.now)
+        clock.now += 1
+
+    for index, start in enumerate(times):
+        assert len([item for item in times[index:] if item < start + 60]) <= 5
+    assert times[5] == pytest.approx(times[0] + 60)
+
+
+def test_requests_are_not_delayed_below_limit(clock):
+    limiter = RateLimiter(3, 10)
+    for _ in range(3):
+        limiter.acquire()
+
+    assert clock.sleeps == []
+    clock.now += 10
+    limiter.acquire()
+    assert clock.sleeps == []
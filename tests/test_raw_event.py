@@ -0,0 +1,72 @@
+from typing import List
+
+import ujson
+
+from tinkoff_invest.base_strategy import BaseStrategy, RawSubscriber
+from tinkoff_invest.models.raw_event import RawEvent
+from tinkoff_invest.models.types import SubscriptionEventType, SubscriptionInterval
+from tinkoff_invest.subscriptions import SubscriptionManager
+
+_ORDER_BOOK = {"figi": "FIGI", "depth": 2, "bids": [[99.0, 1]], "asks": [[101.0, 1]]}
+
+
+class RawRecorder(RawSubscriber):
+    def __init__(self):
+        self.events: List[RawEvent] = []
+
+    def on_raw_event(self, event: RawEvent) -> None:
+        self.events.append(event)
+
+
+class OrderBookStrategy(BaseStrategy):
+    def __init__(self):
+        self.order_books = []
+
+    def on_order_book(self, order_book) -> None:
+        self.order_books.append(order_book)
+
+
+class SnapshotManager(SubscriptionManager):
+    def _load_order_book(self, figi, depth):
+        return dict(_ORDER_BOOK, bids=[[98.0, 3]])
+
+
+def _create_manager() -> SubscriptionManager:
+    manager = SnapshotManager("ws://localhost", "token", workers_count=1)
+    manager.enable_offline_mode()
+    manager._initialize_workers()
+    return manager
+
+
+def test_routing_does_not_depend_on_formatting():
+    compact = RawEvent(ujson.dumps({"event": "orderbook", "payload": _ORDER_BOOK}))
+    spaced = RawEvent('{ "payload" : {"depth" : 2, "figi" : "FIGI"}, "event" : "orderbook" }')
+    escaped = RawEvent('{"event": "candle", "payload": {"figi": "FI\\u0047I", "interval": "1min"}}')
+
+    for event in (compact, spaced):
+        assert (event.event, event.figi, event.parameter) == (SubscriptionEventType.ORDER_BOOK, "FIGI", "2")
+    assert (escaped.event, escaped.figi, escaped.parameter) == (SubscriptionEventType.CANDLE, "FIGI", "1min")
+    assert not RawEvent(b'{"event": "unknown"}').is_routable
+
+
+def test_raw_subscribers_get_resynced_order_book():
+    manager = _create_manager()
+    raw = RawRecorder()
+    strategy = OrderBookStrategy()
+    manager.subscribe_to_order_book("FIGI", 2, raw)
+    manager.subscribe_to_order_book("FIGI", 2, strategy)
+
+    manager._refresh_order_book("FIGI_orderbook_2", {"figi": "FIGI", "depth": 2})
+    manager._wait_until_idle()
+
+    assert [event.payload["bids"] for event in raw.events] == [[[98.0, 3]]]
+    assert len(strategy.order_books) == 1
+
+
+def test_raw_flag_is_reset_on_unsubscribe():
+    manager = _create_manager()
+    manager.subscribe_to_candles("FIGI", SubscriptionInterval.MINUTES_1, RawRecorder())
+    assert manager._has_raw_subscribers
+
+    manager.unsubscribe_from_candles("FIGI", SubscriptionInterval.MINUTES_1)
+    assert not manager._has_raw_subscribers
@@ -0,0 +1,66 @@
+import os
+import random
+import time
+
+from tinkoff_invest.recorder import EventRecorder, EventReplayer
+
+
+def _frames(count: int):
+    # Random payload keeps the compressed size close to the raw one, so files are rotated
+    return ['{{"event": "candle", "n": {}, "data": "{:032x}"}}'.format(index, random.getrandbits(128))
+            for index in range(count)]
+
+
+def _list_files(directory):
+    return sorted(os.path.join(directory, name) for name in os.listdir(directory))
+
+
+def test_recorded_events_are_replayed_in_order(tmp_path):
+    frames = _frames(1000)
+    recorder = EventRecorder(str(tmp_path))
+    for index, frame in enumerate(frames):
+        recorder.write(frame, receive_time=float(index))
+    recorder.close()
+
+    assert list(EventReplayer(str(tmp_path))) == [(float(index), frame) for index, frame in enumerate(frames)]
+    assert recorder.records_count == 1000
+
+
+def test_files_are_rotated_by_compressed_size(tmp_path):
+    frames = _frames(5000)
+    recorder = EventRecorder(str(tmp_path), max_file_size=32 * 1024)
+    for frame in frames:
+        recorder.write(frame)
+    recorder.close()
+
+    files = _list_files(str(tmp_path))
+    assert len(files) > 1
+    for path in files[:-1]:
+        assert 32 * 1024 <= os.path.getsize(path) < 48 * 1024
+    assert [frame for _, frame in EventReplayer(str(tmp_path))] == frames
+
+
+def test_events_are_readable_after_periodic_flush(tmp_path):
+    recorder = EventRecorder(str(tmp_path), flush_interval_sec=0.05)
+    recorder.write("first")
+    time.sleep(0.3)
+
+    assert [frame for _, frame in EventReplayer(str(tmp_path))] == ["first"]
+    recorder.close()
+
+
+def test_incomplete_member_does_not_stop_replay(tmp_path):
+    recorder = EventRecorder(str(tmp_path))
+    recorder.write("flushed")
+    recorder.flush()
+    recorder.write("lost")
+    recorder.close()
+    recorder = EventRecorder(str(tmp_path))
+    recorder.write("next file")
+    recorder.close()
+
+    first_file = _list_files(str(tmp_path))[0]
+    with open(first_file, "rb+") as file:
+        file.truncate(os.path.getsize(first_file) - 10)
+
+    assert [frame for _, frame in EventReplayer(str(tmp_path))] == ["flushed", "next file"]
@@ -0,0 +1,58 @@
+import threading
+from typing import List
+
+from tinkoff_invest.response_cache import ResponseCache
+
+
+def test_cached_response_cannot_be_changed_by_callers():
+    cache = ResponseCache(10, {"market/stocks": 60})
+    calls: List[str] = []
+
+    def _load(query: str) -> dict:
+        calls.append(query)
+        return {"payload": {"instruments": [{"figi": "A"}]}}
+
+    first = cache.get("market/stocks", _load)
+    first["payload"]["instruments"].clear()
+    second = cache.get("market/stocks", _load)
+
+    assert second == {"payload": {"instruments": [{"figi": "A"}]}}
+    assert calls == ["market/stocks"]
+    assert cache.statistics.hits == 1
+
+
+def test_concurrent_requests_are_coalesced_into_copies():
+    cache = ResponseCache(10, {"market/stocks": 60})
+    started = threading.Event()
+    release = threading.Event()
+    results: List[dict] = []
+
+    def _load(_: str) -> dict:
+        started.set()
+        release.wait(5)
+        return {"payload": []}
+
+    owner = threading.Thread(target=lambda: results.append(cache.get("market/stocks", _load)))
+    owner.start()
+    started.wait(5)
+    waiter = threading.Thread(target=lambda: results.append(cache.get("market/stocks", _load)))
+    waiter.start()
+    while cache.statistics.coalesced == 0:
+        release.wait(0.01)
+    release.set()
+    owner.join(5)
+    waiter.join(5)
+
+    assert results == [{"payload": []}, {"payload": []}]
+    assert results[0] is not results[1]
+    assert cache.statistics.misses == 1
+
+
+def test_uncached_endpoint_is_loaded_every_time():
+    cache = ResponseCache(10, {})
+    calls: List[str] = []
+
+    cache.get("orders", lambda query: calls.append(query) or {})
+    cache.get("orders", lambda query: calls.append(query) or {})
+
+    assert calls == ["orders", "orders"]
@@ -0,0 +1,90 @@
+import threading
+import time
+
+import ujson
+
+from tinkoff_invest.base_strategy import BaseStrategy
+from tinkoff_invest.models.types import SubscriptionInterval
+from tinkoff_invest.subscriptions import SubscriptionManager
+
+
+def _candle_payload(minute: int, close: float) -> dict:
+    return {"o": close, "c": close, "h": close, "l": close, "v": 1, "figi": "FIGI", "interval": "1min",
+            "time": "2021-03-01T10:{:02d}:00Z".format(minute)}
+
+
+class CandlesStrategy(BaseStrategy):
+    def __init__(self):
+        self.minutes = []
+
+    def on_candle(self, candle) -> None:
+        self.minutes.append(candle.time.minute)
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.sent = []
+
+    def send(self, data: str) -> None:
+        self.sent.append(ujson.loads(data))
+
+
+class BackfillingManager(SubscriptionManager):
+    def __init__(self, missed: list):
+        super().__init__("ws://localhost", "token", workers_count=1)
+        self.missed = missed
+        self.gap_starts = []
+        self.loaded = threading.Event()
+
+    def _load_candles(self, figi, interval, start_time):
+        self.gap_starts.append(start_time)
+        self.loaded.wait(5)
+        if self.missed is None:
+            raise ConnectionError("Server is not available")
+        return self.missed
+
+
+def _create_manager(missed: list):
+    manager = BackfillingManager(missed)
+    manager.enable_offline_mode()
+    manager._initialize_workers()
+    strategy = CandlesStrategy()
+    manager.subscribe_to_candles("FIGI", SubscriptionInterval.MINUTES_1, strategy)
+    manager._on_subscription_event(None, ujson.dumps({"event": "candle", "payload": _candle_payload(0, 100)}))
+    manager._wait_until_idle()
+    manager._web_socket = FakeWebSocket()
+    return manager, strategy
+
+
+def _wait_for_candles(strategy: CandlesStrategy, count: int) -> None:
+    deadline = time.monotonic() + 5
+    while len(strategy.minutes) < count and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_live_candles_are_merged_with_missed_ones():
+    manager, strategy = _create_manager([_candle_payload(minute, 100 + minute) for minute in range(0, 6)])
+    manager._resubscribe()
+    manager._on_subscription_event(None, ujson.dumps({"event": "candle", "payload": _candle_payload(5, 105)}))
+    manager._on_subscription_event(None, ujson.dumps({"event": "candle", "payload": _candle_payload(6, 106)}))
+    manager._wait_until_idle()
+    assert strategy.minutes == [0]
+
+    manager.loaded.set()
+    _wait_for_candles(strategy, 7)
+
+    assert strategy.minutes == [0, 1, 2, 3, 4, 5, 6]
+    assert [gap_start.minute for gap_start in manager.gap_starts] == [0]
+    assert manager._web_socket.sent == [{"event": "candle:subscribe", "figi": "FIGI", "interval": "1min"}]
+    assert not manager._held_candles
+
+
+def test_held_candles_are_released_when_loading_fails():
+    manager, strategy = _create_manager(None)
+    manager._resubscribe()
+    manager._on_subscription_event(None, ujson.dumps({"event": "candle", "payload": _candle_payload(3, 103)}))
+    manager.loaded.set()
+    _wait_for_candles(strategy, 2)
+
+    assert strategy.minutes == [0, 3]
+    assert not manager._held_candles
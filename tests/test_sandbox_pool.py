@@ -0,0 +1,45 @@
+from typing import List
+
+from tinkoff_invest.models.sandbox_fixture import SandboxFixture
+from tinkoff_invest.models.types import Currency
+from tinkoff_invest.sandbox_pool import SandboxSessionPool
+from tinkoff_invest.session import SandboxSession
+
+
+def _fake_post(requests: List[tuple]):
+    def _post(session, query: str, data: dict, account_id=None) -> dict:
+        requests.append((session.account_id, query, data))
+        return {"status": "Ok", "payload": {"brokerAccountId": "SB{}".format(len(requests))}}
+    return _post
+
+
+def test_session_keeps_default_account_unless_bound(monkeypatch):
+    monkeypatch.setattr(SandboxSession, "_post", _fake_post([]))
+
+    assert SandboxSession("token").account_id == ""
+    assert SandboxSession("token", bind_account=True).account_id == "SB2"
+    assert SandboxSession("token", account_id="ACC", bind_account=True).account_id == "ACC"
+
+
+def test_pooled_sessions_are_seeded_with_fixture(monkeypatch):
+    requests: List[tuple] = []
+    monkeypatch.setattr(SandboxSession, "_post", _fake_post(requests))
+    fixture = SandboxFixture.build({Currency.USD: 100.0}, {"FIGI": 10})
+
+    pool = SandboxSessionPool("token", 2, fixture)
+    accounts = sorted(session.account_id for session in pool.sessions)
+    assert len(set(accounts)) == 2
+    for account in accounts:
+        assert (account, 'sandbox/currencies/balance', {"currency": "USD", "balance": 100.0}) in requests
+        assert (account, 'sandbox/positions/balance', {"figi": "FIGI", "balance": 10}) in requests
+    pool.close(remove=False)
+
+
+def test_release_after_close_returns_session(monkeypatch):
+    monkeypatch.setattr(SandboxSession, "_post", _fake_post([]))
+    pool = SandboxSessionPool("token", 1)
+    session = pool.lease()
+    pool.close()
+
+    pool.release(session)
+    assert pool.free_count == 1
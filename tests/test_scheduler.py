@@ -0,0 +1,56 @@
+import threading
+import time
+from typing import List
+
+from tinkoff_invest.base_strategy import BaseStrategy
+from tinkoff_invest.scheduler import Timer, TimerScheduler
+
+
+class TimerEvents:
+    def __init__(self, expected_count: int):
+        self.names: List[str] = []
+        self.expected_count: int = expected_count
+        self.done: threading.Event = threading.Event()
+
+    def dispatch(self, timer: Timer) -> None:
+        self.names.append(timer.name)
+        if len(self.names) >= self.expected_count:
+            self.done.set()
+
+
+def test_timers_fire_in_deadline_order():
+    events = TimerEvents(2)
+    scheduler = TimerScheduler(events.dispatch)
+    strategy = BaseStrategy()
+    scheduler.schedule(strategy, 0.1, "late")
+    scheduler.schedule(strategy, 0.02, "early")
+
+    assert events.done.wait(5)
+    scheduler.stop()
+    assert events.names == ["early", "late"]
+
+
+def test_recurring_timer_fires_until_cancelled():
+    events = TimerEvents(3)
+    scheduler = TimerScheduler(events.dispatch)
+    timer = scheduler.schedule(BaseStrategy(), 0, "tick", interval_sec=0.01)
+
+    assert events.done.wait(5)
+    timer.cancel()
+    fired_count = len(events.names)
+    time.sleep(0.05)
+    scheduler.stop()
+    assert fired_count <= len(events.names) <= fired_count + 1
+    assert scheduler.timers_count == 0
+
+
+def test_cancel_all_cancels_timers_of_strategy_only():
+    scheduler = TimerScheduler(lambda timer: None)
+    first, second = BaseStrategy(), BaseStrategy()
+    scheduler.schedule(first, 60, "first")
+    kept = scheduler.schedule(second, 60, "second")
+
+    scheduler.cancel_all(first)
+    scheduler.stop()
+    assert scheduler.timers_count == 1
+    assert not kept.is_cancelled
@@ -0,0 +1,102 @@
+import threading
+import time
+
+import ujson
+
+from tinkoff_invest.base_strategy import BaseStrategy
+from tinkoff_invest.models.types import SubscriptionInterval
+from tinkoff_invest.subscriptions import SubscriptionManager
+
+
+class ThreadRecordingStrategy(BaseStrategy):
+    def __init__(self):
+        self.candles = []
+        self.threads = set()
+
+    def on_candle(self, candle) -> None:
+        self.candles.append(candle.close_price)
+        self.threads.add(threading.current_thread().name)
+
+
+def _candle_frame(minute: int, close: float, figi: str = "FIGI") -> str:
+    return ujson.dumps({"event": "candle", "payload": {
+        "o": close, "c": close, "h": close, "l": close, "v": 1, "figi": figi, "interval": "1min",
+        "time": "2021-03-01T10:{:02d}:00Z".format(minute)}})
+
+
+def _create_manager() -> SubscriptionManager:
+    manager = SubscriptionManager("ws://localhost", "token", workers_count=1)
+    manager.enable_offline_mode()
+    manager._initialize_workers()
+    return manager
+
+
+def test_frames_are_decoded_by_workers():
+    manager = _create_manager()
+    strategy = ThreadRecordingStrategy()
+    manager.subscribe_to_candles("FIGI", SubscriptionInterval.MINUTES_1, strategy)
+    for minute in range(3):
+        manager._on_subscription_event(None, _candle_frame(minute, 100 + minute))
+    manager._wait_until_idle()
+
+    assert strategy.candles == [100, 101, 102]
+    assert strategy.threads == {"tinkoff_invest_default_worker"}
+    assert threading.current_thread().name not in strategy.threads
+
+
+def test_strategies_of_other_executors_are_called_by_their_workers():
+    manager = _create_manager()
+    manager.add_executor("slow", 1)
+    strategy = ThreadRecordingStrategy()
+    manager.subscribe_to_candles("FIGI", SubscriptionInterval.MINUTES_1, strategy, executor="slow")
+    manager._on_subscription_event(None, _candle_frame(0, 100))
+    manager._wait_until_idle()
+
+    assert strategy.threads == {"tinkoff_invest_slow_worker"}
+
+
+def test_busy_default_workers_do_not_delay_other_executors():
+    manager = _create_manager()
+    manager.add_executor("fast", 1)
+    release = threading.Event()
+    blocked = ThreadRecordingStrategy()
+    blocked.on_candle = lambda candle: release.wait(5)
+    strategy = ThreadRecordingStrategy()
+    manager.subscribe_to_candles("FIGI", SubscriptionInterval.MINUTES_1, blocked)
+    manager.subscribe_to_candles("OTHER", SubscriptionInterval.MINUTES_1, strategy, executor="fast")
+    manager._on_subscription_event(None, _candle_frame(0, 100))
+    manager._on_subscription_event(None, _candle_frame(0, 200, figi="OTHER"))
+    manager._decoder.wait_until_idle()
+    manager._executors["fast"].wait_until_idle()
+
+    assert strategy.candles == [200]
+    release.set()
+    manager._wait_until_idle()
+
+
+class OrderBookRecordingStrategy(BaseStrategy):
+    def __init__(self):
+        self.prices = []
+
+    def on_order_book(self, order_book) -> None:
+        # Uneven delays let other workers overtake the current one unless events are serialized
+        if order_book.last_price % 13 == 0:
+            time.sleep(0.0005)
+        self.prices.append(order_book.last_price)
+
+
+def test_events_of_instrument_are_delivered_in_order_by_several_workers():
+    manager = SubscriptionManager("ws://localhost", "token", workers_count=4)
+    manager.enable_offline_mode()
+    manager._initialize_workers()
+    strategies = [OrderBookRecordingStrategy() for _ in range(3)]
+    for index, strategy in enumerate(strategies):
+        manager.subscribe_to_order_book("FIGI{}".format(index % 2), 1, strategy)
+    for price in range(2000):
+        for figi in ("FIGI0", "FIGI1"):
+            manager._on_subscription_event(None, ujson.dumps({"event": "orderbook", "payload": {
+                "figi": figi, "depth": 1, "bids": [], "asks": [], "lastPrice": price}}))
+    manager._wait_until_idle()
+    manager._deinitialize_workers()
+
+    assert all(strategy.prices == list(range(2000)) for strategy in strategies)
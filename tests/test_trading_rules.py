@@ -0,0 +1,53 @@
+import pytest
+
+from tinkoff_invest.exceptions import OrderValidationError
+from tinkoff_invest.models.types import OperationType, TradingStatus
+from tinkoff_invest.trading_rules import TradingRules
+
+
+def _rules(**kwargs) -> TradingRules:
+    return TradingRules("FIGI", 0.01, 10, **kwargs)
+
+
+def test_price_is_rounded_by_side():
+    rules = _rules()
+
+    assert rules.round_price(100.017, OperationType.BUY) == pytest.approx(100.01)
+    assert rules.round_price(100.011, OperationType.SELL) == pytest.approx(100.02)
+    assert rules.round_price(100.01, OperationType.SELL) == pytest.approx(100.01)
+    assert rules.validate(100.017, 1, OperationType.BUY) == pytest.approx(100.01)
+
+
+def test_off_tick_price_is_rejected_without_side():
+    rules = TradingRules("FIGI", 0.0025, 1)
+
+    assert rules.validate(0.1025, 1) == pytest.approx(0.1025)
+    with pytest.raises(OrderValidationError):
+        rules.validate(0.1026, 1)
+
+
+@pytest.mark.parametrize("lots", [0, -1, 1.5])
+def test_invalid_lots_are_rejected(lots):
+    with pytest.raises(OrderValidationError):
+        _rules().validate(None, lots)
+
+
+def test_quantity_below_minimum_is_rejected():
+    rules = _rules(min_quantity=30)
+
+    with pytest.raises(OrderValidationError):
+        rules.validate(None, 2)
+    assert rules.validate(None, 3) is None
+
+
+def test_limits_and_status_are_checked():
+    rules = _rules(limit_up=110.0, limit_down=90.0)
+
+    with pytest.raises(OrderValidationError):
+        rules.validate(110.01, 1, OperationType.BUY)
+    with pytest.raises(OrderValidationError):
+        rules.validate(89.99, 1, OperationType.SELL)
+
+    rules.trading_status = TradingStatus.BREAK
+    with pytest.raises(OrderValidationError):
+        rules.validate(100.0, 1, OperationType.BUY)
@@ -0,0 +1,199 @@
+import logging
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+from tinkoff_invest.models.operation import Operation
+from tinkoff_invest.models.types import Currency, OperationStatus, OperationType
+
+_OPERATION_TYPES = list(OperationType)
+_OPERATION_TYPE_CODES = {item.value: code for code, item in enumerate(_OPERATION_TYPES)}
+_CURRENCIES = list(Currency)
+_CURRENCY_CODES = {item.value: code for code, item in enumerate(_CURRENCIES)}
+_UNKNOWN_CODE = -1
+
+_BUY_TYPES = [OperationType.BUY, OperationType.BUY_CARD]
+_SELL_TYPES = [OperationType.SELL]
+_FEE_TYPES = [OperationType.BROKER_COMMISSION, OperationType.EXCHANGE_COMMISSION, OperationType.SERVICE_COMMISSION,
+              OperationType.MARGIN_COMMISSION]
+_INCOME_TYPES = [OperationType.DIVIDEND, OperationType.COUPON]
+_TAX_TYPES = [OperationType.TAX, OperationType.TAX_DIVIDEND, OperationType.TAX_LUCRE, OperationType.TAX_COUPON,
+              OperationType.TAX_BACK]
+
+
+def _codes(types: Iterable[OperationType]) -> np.ndarray:
+    return np.array([_OPERATION_TYPE_CODES[item.value] for item in types], dtype=np.int8)
+
+
+def _parse_dates(dates: List[str]) -> np.ndarray:
+    # numpy parses ISO 8601 dates without time zones only, so offsets are cut off and applied separately
+    local_dates, offsets = [], []
+    for date in dates:
+        if date.endswith("Z"):
+            local_dates.append(date[:-1])
+            offsets.append(0)
+        elif len(date) > 6 and date[-6] in "+-" and date[-3] == ":":
+            local_dates.append(date[:-6])
+            offsets.append((1 if date[-6] == "+" else -1) * (int(date[-5:-3]) * 60 + int(date[-2:])))
+        else:
+            local_dates.append(date)
+            offsets.append(0)
+    return np.array(local_dates, dtype="datetime64[ns]") - np.array(offsets, dtype="timedelta64[m]")
+
+
+def _group_sum(keys: np.ndarray, values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    unique_keys, inverse = np.unique(keys, return_inverse=True)
+    return unique_keys, np.bincount(inverse, weights=values, minlength=len(unique_keys))
+
+
+class OperationsFrame:
+    def __init__(self, time: np.ndarray, figi: np.ndarray, operation_type: np.ndarray, quantity: np.ndarray,
+                 price: np.ndarray, payment: np.ndarray, currency: np.ndarray, commission: np.ndarray,
+                 commission_currency: np.ndarray):
+        self._time: np.ndarray = time
+        self._figi: np.ndarray = figi
+        self._operation_type: np.ndarray = operation_type
+        self._quantity: np.ndarray = quantity
+        self._price: np.ndarray = price
+        self._payment: np.ndarray = payment
+        self._currency: np.ndarray = currency
+        self._commission: np.ndarray = commission
+        self._commission_currency: np.ndarray = commission_currency
+
+    @staticmethod
+    def from_operations(operations: Iterable[Operation], only_done: bool = True) -> 'OperationsFrame':
+        time, figi, operation_type, quantity, price, payment, currency, commission, commission_currency = \
+            [], [], [], [], [], [], [], [], []
+        for operation in operations:
+            data = operation._data
+            if only_done and data.get("status") != OperationStatus.DONE.value:
+                continue
+            time.append(data["date"])
+            figi.append(data.get("figi", ""))
+            operation_type.append(_OPERATION_TYPE_CODES.get(data["operationType"], _UNKNOWN_CODE))
+            quantity.append(data.get("quantityExecuted", 0))
+            price.append(data.get("price", 0.0))
+            payment.append(data.get("payment", 0.0))
+            currency.append(_CURRENCY_CODES.get(data.get("currency"), _UNKNOWN_CODE))
+            raw_commission = data.get("commission") or {}
+            commission.append(raw_commission.get("value", 0.0))
+            commission_currency.append(_CURRENCY_CODES.get(raw_commission.get("currency"), _UNKNOWN_CODE))
+
+        return OperationsFrame(_parse_dates(time), np.array(figi, dtype=str),
+                               np.array(operation_type, dtype=np.int8), np.array(quantity, dtype=np.int64),
+                               np.array(price, dtype=np.float64), np.array(payment, dtype=np.float64),
+                               np.array(currency, dtype=np.int8), np.array(commission, dtype=np.float64),
+                               np.array(commission_currency, dtype=np.int8))
+
+    @property
+    def time(self) -> np.ndarray:
+        return self._time
+
+    @property
+    def figi(self) -> np.ndarray:
+        return self._figi
+
+    @property
+    def quantity(self) -> np.ndarray:
+        return self._quantity
+
+    @property
+    def price(self) -> np.ndarray:
+        return self._price
+
+    @property
+    def payment(self) -> np.ndarray:
+        return self._payment
+
+    @property
+    def commission(self) -> np.ndarray:
+        return self._commission
+
+    def is_type(self, *operation_types: OperationType) -> np.ndarray:
+        return np.isin(self._operation_type, _codes(operation_types))
+
+    def totals_by_type(self) -> Dict[Tuple[OperationType, Currency], float]:
+        known = (self._operation_type != _UNKNOWN_CODE) & (self._currency != _UNKNOWN_CODE)
+        keys = self._operation_type[known].astype(np.int64) * len(_CURRENCIES) + self._currency[known]
+        unique_keys, sums = _group_sum(keys, self._payment[known])
+        return {(_OPERATION_TYPES[key // len(_CURRENCIES)], _CURRENCIES[key % len(_CURRENCIES)]): value
+                for key, value in zip(unique_keys.tolist(), sums.tolist())}
+
+    # Commissions are charged by separate operations, so the commission field of trades is not summed here
+    def fee_totals(self) -> Dict[Currency, float]:
+        return self._totals_by_currency(self.is_type(*_FEE_TYPES))
+
+    def income_totals(self) -> Dict[Currency, float]:
+        return self._totals_by_currency(self.is_type(*_INCOME_TYPES))
+
+    def tax_totals(self) -> Dict[Currency, float]:
+        return self._totals_by_currency(self.is_type(*_TAX_TYPES))
+
+    def payments_by_figi(self) -> Dict[str, float]:
+        unique_figi, sums = _group_sum(self._figi, self._payment)
+        return dict(zip(unique_figi.tolist(), sums.tolist()))
+
+    def commissions_by_figi(self) -> Dict[str, float]:
+        unique_figi, sums = _group_sum(self._figi, self._commission)
+        return dict(zip(unique_figi.tolist(), sums.tolist()))
+
+    def positions_by_figi(self) -> Dict[str, int]:
+        signed = np.where(self.is_type(*_BUY_TYPES), self._quantity, 0) - \
+            np.where(self.is_type(*_SELL_TYPES), self._quantity, 0)
+        unique_figi, sums = _group_sum(self._figi, signed.astype(np.float64))
+        return {figi: int(value) for figi, value in zip(unique_figi.tolist(), sums.tolist())}
+
+    def realized_pnl(self) -> Dict[str, float]:
+        # Trades are grouped by figi and ordered by time, then every instrument is mapped to its own segment of the
+        # cumulative bought quantity axis. FIFO cost of a sale is the growth of cumulative buy cost over the
+        # quantity range it consumes, which is a piecewise linear interpolation. Short sales are not matched: a sale
+        # consumes only the quantity bought before it and the rest of it is excluded from the result.
+        trades = self.is_type(*_BUY_TYPES, *_SELL_TYPES) & (self._quantity > 0)
+        order = np.lexsort((self._time[trades], self._figi[trades]))
+        figi = self._figi[trades][order]
+        if not len(figi):
+            return {}
+        is_buy = self.is_type(*_BUY_TYPES)[trades][order]
+        quantity = self._quantity[trades][order].astype(np.float64)
+        price = self._price[trades][order]
+
+        unique_figi, group = np.unique(figi, return_inverse=True)
+        buy_quantity = np.where(is_buy, quantity, 0.0)
+        sell_quantity = np.where(is_buy, 0.0, quantity)
+        bought = np.bincount(group, weights=buy_quantity, minlength=len(unique_figi))
+        sold = np.bincount(group, weights=sell_quantity, minlength=len(unique_figi))
+        offsets = np.concatenate(([0.0], np.cumsum(bought)[:-1]))
+        sell_offsets = np.concatenate(([0.0], np.cumsum(sold)[:-1]))
+        bought_to_date = np.cumsum(buy_quantity) - offsets[group]
+        sold_to_date = np.cumsum(sell_quantity) - sell_offsets[group]
+
+        # Position of the sales on the bought axis follows matched_i = min(matched_i-1 + sold_i, bought_to_date_i),
+        # which is sold_to_date_i + min(0, running minimum of bought_to_date - sold_to_date) within the instrument
+        group_starts = np.flatnonzero(np.diff(group)) + 1
+        running_minimum = np.concatenate([np.minimum.accumulate(part) for part in
+                                          np.split(bought_to_date - sold_to_date, group_starts)])
+        matched_to = sold_to_date + np.minimum(running_minimum, 0.0)
+        matched_from = np.concatenate(([0.0], matched_to[:-1]))
+        matched_from[group_starts] = 0.0
+        matched_quantity = matched_to - matched_from
+
+        unmatched = np.bincount(group, weights=sell_quantity - matched_quantity, minlength=len(unique_figi))
+        if np.any(unmatched > 0):
+            logging.warning("Sales without bought quantity are excluded from realized PnL: %s",
+                            ", ".join("{} {:g}".format(item, value)
+                                      for item, value in zip(unique_figi.tolist(), unmatched.tolist()) if value > 0))
+
+        cumulative_bought = np.concatenate(([0.0], np.cumsum(buy_quantity)[is_buy]))
+        cumulative_cost = np.concatenate(([0.0], np.cumsum(buy_quantity * price)[is_buy]))
+        cost = np.interp(offsets[group] + matched_to, cumulative_bought, cumulative_cost) - \
+            np.interp(offsets[group] + matched_from, cumulative_bought, cumulative_cost)
+        pnl = np.where(is_buy, 0.0, matched_quantity * price - cost)
+        return dict(zip(unique_figi.tolist(), np.bincount(group, weights=pnl, minlength=len(unique_figi)).tolist()))
+
+    def _totals_by_currency(self, mask: np.ndarray) -> Dict[Currency, float]:
+        mask = mask & (self._currency != _UNKNOWN_CODE)
+        unique_currencies, sums = _group_sum(self._currency[mask], self._payment[mask])
+        return {_CURRENCIES[code]: value for code, value in zip(unique_currencies.tolist(), sums.tolist())}
+
+    def __len__(self) -> int:
+        return len(self._time)
@@ -1,26 +1,49 @@
 import datetime
 import logging
+import threading
 import time
-from typing import Dict, List
+from concurrent.futures import ThreadPoolExecutor
+from types import ModuleType
+from typing import Dict, List, Optional, Iterator, Tuple, Type, TYPE_CHECKING
 
-import requests
 import ujson
-from prettytable import PrettyTable
-from urllib3.exceptions import NewConnectionError
 
+from tinkoff_invest.config import EVENTS_PROCESSING_WORKERS_COUNT, HTTP_CONNECTIONS_POOL_SIZE, \
+    OPERATIONS_WINDOW_DAYS, OPERATIONS_WORKERS_COUNT, ORDERS_REQUESTS_PER_MINUTE, ORDER_CANCELS_PER_MINUTE, \
+    RESPONSE_CACHE_SIZE, RESPONSE_CACHE_TTL_SEC
 from tinkoff_invest.exceptions import RequestProcessingError
+from tinkoff_invest.log_sink import debug_sampled
 from tinkoff_invest.models.account import Account
 from tinkoff_invest.models.candle import Candle
 from tinkoff_invest.models.instrument import Instrument
 from tinkoff_invest.models.operation import Operation
-from tinkoff_invest.models.order import Order
+from tinkoff_invest.models.order import Order, OrderRequest, OrderResult
 from tinkoff_invest.models.order_book import OrderBook
 from tinkoff_invest.models.portfolio import Portfolio, CurrencyPortfolio, PositionPortfolio
 from tinkoff_invest.models.types import SubscriptionInterval, OperationType, OperationStatus
+from tinkoff_invest.rate_limit import RateLimiter
+from tinkoff_invest.response_cache import CacheStatistics, ResponseCache
 from tinkoff_invest.subscriptions import SubscriptionManager
+from tinkoff_invest.trading_rules import TradingRulesTable
+
+# HTTP client is imported with the first request, so scripts which only replay events or build models start faster
+if TYPE_CHECKING:
+    import requests
 
 _HTTP_RETRIES_COUNT = 10
 _RETRY_TIMEOUT_SEC = 3
+_MOSCOW_TIMEZONE = datetime.timezone(datetime.timedelta(hours=3))
+_http_client: Optional[Tuple[ModuleType, Type[Exception]]] = None
+
+
+def _get_http_client() -> Tuple[ModuleType, Type[Exception]]:
+    global _http_client
+    if _http_client is None:
+        import requests
+        from urllib3.exceptions import NewConnectionError
+
+        _http_client = (requests, NewConnectionError)
+    return _http_client
 
 
 class OrderNotification:
@@ -33,29 +56,59 @@ class OrderNotification:
     def on_order_status_changed(self, order: Order) -> None:
         pass
 
+    def on_order_updated(self, order: Order) -> None:
+        pass
+
+
+def _build_account_argument(query: str, account_id: str) -> str:
+    if not account_id:
+        return ""
+    return "{}brokerAccountId={}".format("&" if "?" in query else "?", account_id)
+
+
+def _split_time_range(start_time: datetime.datetime, finish_time: datetime.datetime,
+                      window: datetime.timedelta) -> List[Tuple[datetime.datetime, datetime.datetime]]:
+    windows = []
+    while start_time < finish_time:
+        windows.append((start_time, min(start_time + window, finish_time)))
+        start_time += window
+    return windows
+
 
 class Session(SubscriptionManager):
-    def __init__(self, server_address: str, access_token: str, web_socket_server_address: str, account_id: str):
-        super().__init__(web_socket_server_address, access_token)
+    def __init__(self, server_address: str, access_token: str, web_socket_server_address: str, account_id: str,
+                 workers_count: int = EVENTS_PROCESSING_WORKERS_COUNT):
+        super().__init__(web_socket_server_address, access_token, workers_count)
         self._server: str = server_address
         self._auth_headers: Dict[str, str] = {"Authorization": "Bearer " + access_token}
         self._account_id: str = account_id
+        self._http: Optional['requests.Session'] = None
+        self._http_lock: threading.Lock = threading.Lock()
         self._cached_stocks: Dict[str, Instrument] = {}
         self._cached_currencies: Dict[str, Instrument] = {}
         self._cached_bonds: Dict[str, Instrument] = {}
         self._cached_etfs: Dict[str, Instrument] = {}
+        self._order_listeners: List[OrderNotification] = []
+        self._orders_rate_limiter: RateLimiter = RateLimiter(ORDERS_REQUESTS_PER_MINUTE, 60)
+        self._cancels_rate_limiter: RateLimiter = RateLimiter(ORDER_CANCELS_PER_MINUTE, 60)
+        self._trading_rules: Optional[TradingRulesTable] = None
+        self._response_cache: ResponseCache = ResponseCache(RESPONSE_CACHE_SIZE, RESPONSE_CACHE_TTL_SEC)
+
+    @property
+    def account_id(self) -> str:
+        return self._account_id
 
-    def get_portfolio(self) -> Portfolio:
-        positions = self._get('portfolio')
-        currencies = self._get('portfolio/currencies')
+    def get_portfolio(self, account_id: Optional[str] = None) -> Portfolio:
+        positions = self._get('portfolio', account_id)
+        currencies = self._get('portfolio/currencies', account_id)
         return Portfolio(positions, currencies)
 
-    def get_portfolio_currencies(self) -> List[CurrencyPortfolio]:
-        currencies = self._get('portfolio/currencies')
+    def get_portfolio_currencies(self, account_id: Optional[str] = None) -> List[CurrencyPortfolio]:
+        currencies = self._get('portfolio/currencies', account_id)
         return [CurrencyPortfolio(iterator) for iterator in currencies["payload"]["currencies"]]
 
-    def get_portfolio_positions(self) -> List[PositionPortfolio]:
-        positions = self._get('portfolio')
+    def get_portfolio_positions(self, account_id: Optional[str] = None) -> List[PositionPortfolio]:
+        positions = self._get('portfolio', account_id)
         return [PositionPortfolio(iterator) for iterator in positions["payload"]["positions"]]
 
     @property
@@ -81,40 +134,88 @@ class Session(SubscriptionManager):
 
     def get_candles(self, figi: str, start_time: datetime, finish_time: datetime,
                     interval: SubscriptionInterval) -> List[Candle]:
-        candles = self._get('market/candles?figi={}&from={}+03:00&to={}+03:00&interval={}'.format(
-            figi, start_time.isoformat(), finish_time.isoformat(), interval.value))['payload']['candles']
-        return [Candle(iterator) for iterator in candles]
+        return [Candle(iterator) for iterator in self._get_candles_payload(figi, start_time, finish_time, interval)]
 
     def get_orderbook(self, figi: str, depth: int) -> OrderBook:
         assert (1 <= depth <= 20), "Depth should be in range [1..20]"
-        response = self._get('market/orderbook?figi={}&depth={}'.format(figi, depth))
+        response = self._get_market_data('market/orderbook?figi={}&depth={}'.format(figi, depth))
         return OrderBook(response["payload"])
 
     def get_instrument_by_ticker(self, ticker: str) -> Instrument:
-        instrument = self._get('market/search/by-ticker?ticker={}'.format(ticker))
+        instrument = self._get_market_data('market/search/by-ticker?ticker={}'.format(ticker))
         assert (instrument["payload"]["total"] == 1), \
             "An unexpected number {} (1 expected) of stocks for ticker '{}'.".format(
                 instrument["payload"]["total"], ticker)
         return Instrument(instrument["payload"]["instruments"][0])
 
     def get_instrument_by_figi(self, figi: str) -> Instrument:
-        instrument = self._get('market/search/by-figi?figi={}'.format(figi))
+        instrument = self._get_market_data('market/search/by-figi?figi={}'.format(figi))
         return Instrument(instrument["payload"])
 
-    def get_orders(self) -> List[Order]:
-        return [Order(iterator) for iterator in self._get('orders')['payload']]
+    def add_order_listener(self, listener: OrderNotification) -> None:
+        if listener not in self._order_listeners:
+            self._order_listeners = self._order_listeners + [listener]
+
+    def remove_order_listener(self, listener: OrderNotification) -> None:
+        self._order_listeners = [item for item in self._order_listeners if item is not listener]
+
+    @property
+    def response_cache(self) -> ResponseCache:
+        return self._response_cache
+
+    @property
+    def cache_statistics(self) -> CacheStatistics:
+        return self._response_cache.statistics
 
-    def create_limit_order(self, operation: OperationType, figi: str, price: float, lots: int) -> Order:
+    @property
+    def trading_rules(self) -> Optional[TradingRulesTable]:
+        return self._trading_rules
+
+    def enable_order_validation(self) -> TradingRulesTable:
+        if self._trading_rules is None:
+            table = TradingRulesTable()
+            for instruments in (self.stocks, self.bonds, self.etfs, self.currencies):
+                table.load(instruments.values())
+            # Every instrument_info event updates limits, so subscribe_to_instrument_info() keeps them current
+            self.add_market_data_listener(table)
+            self._trading_rules = table
+        return self._trading_rules
+
+    def disable_order_validation(self) -> None:
+        if self._trading_rules is not None:
+            self.remove_market_data_listener(self._trading_rules)
+            self._trading_rules = None
+
+    def get_orders(self, account_id: Optional[str] = None) -> List[Order]:
+        orders = [Order(iterator) for iterator in self._get('orders', account_id)['payload']]
+        for order in orders:
+            self._notify_order_listeners(order)
+        return orders
+
+    def create_limit_order(self, operation: OperationType, figi: str, price: float, lots: int,
+                           account_id: Optional[str] = None) -> Order:
+        trading_rules = self._trading_rules
+        if trading_rules is not None:
+            price = trading_rules.validate(figi, price, lots, operation)
         logging.info("Creating limit order %s, figi=%s, price=%f, lots=%d", operation.value, figi, price, lots)
+        self._orders_rate_limiter.acquire()
         order = self._post('orders/limit-order?figi={}'.format(figi),
-                           {"lots": lots, "operation": operation.value, "price": price})
-        return Order(order["payload"])
-
-    def create_market_order(self, operation: OperationType, figi: str, lots: int) -> Order:
+                           {"lots": lots, "operation": operation.value, "price": price}, account_id)
+        order["payload"].setdefault("figi", figi)
+        order["payload"].setdefault("price", price)
+        return self._notify_order_listeners(Order(order["payload"]))
+
+    def create_market_order(self, operation: OperationType, figi: str, lots: int,
+                            account_id: Optional[str] = None) -> Order:
+        trading_rules = self._trading_rules
+        if trading_rules is not None:
+            trading_rules.validate(figi, None, lots)
         logging.info("Creating market order %s, figi=%s, lots=%d", operation.value, figi, lots)
+        self._orders_rate_limiter.acquire()
         order = self._post('orders/market-order?figi={}'.format(figi),
-                           {"lots": lots, "operation": operation.value})
-        return Order(order["payload"])
+                           {"lots": lots, "operation": operation.value}, account_id)
+        order["payload"].setdefault("figi", figi)
+        return self._notify_order_listeners(Order(order["payload"]))
 
     def wait_for_order_completion(self, order: Order, callback_object: OrderNotification) -> None:
         prev_status = order.status
@@ -140,34 +241,101 @@ class Session(SubscriptionManager):
                 today = datetime.datetime.utcnow()
                 day_start = datetime.datetime(year=today.year, month=today.month, day=today.day, hour=0, second=0)
                 day_end = day_start + datetime.timedelta(days=1)
-                operations = self.get_operations(day_start,
-                                                 day_end)  # TODO: add order.figi parameter once it will appear API
+                operations = self.get_operations(day_start, day_end, order.figi)
                 for op in operations:
                     if op.id == order.id:
                         if op.status == OperationStatus.DONE and (not op.price or not op.quantity or not op.commission):
                             break  # TODO:remove after https://github.com/TinkoffCreditSystems/invest-openapi/issues/588
                         callback_object.on_order_completed(order, op)
+                        for listener in self._order_listeners:
+                            listener.on_order_completed(order, op)
                         return
                 time.sleep(1)
 
-    def cancel_order(self, order_id: str) -> None:
-        self._post('orders/cancel?orderId={}'.format(order_id), {})
+    def cancel_order(self, order_id: str, account_id: Optional[str] = None) -> None:
+        self._cancels_rate_limiter.acquire()
+        self._post('orders/cancel?orderId={}'.format(order_id), {}, account_id)
 
-    def get_operations(self, start_time: datetime, finish_time: datetime, figi: str = "") -> List[Operation]:
+    def place_orders(self, order_requests: List[OrderRequest], account_id: Optional[str] = None) -> List[OrderResult]:
+        def place(request: OrderRequest) -> OrderResult:
+            try:
+                if request.price is None:
+                    order = self.create_market_order(request.operation, request.figi, request.lots, account_id)
+                else:
+                    order = self.create_limit_order(request.operation, request.figi, request.price, request.lots,
+                                                    account_id)
+                return OrderResult(request, order=order)
+            except Exception as err:
+                return OrderResult(request, error=err)
+
+        with ThreadPoolExecutor(max_workers=HTTP_CONNECTIONS_POOL_SIZE) as pool:
+            return list(pool.map(place, order_requests))
+
+    def cancel_orders(self, order_ids: List[str], account_id: Optional[str] = None) -> Dict[str, Optional[Exception]]:
+        def cancel(order_id: str) -> Optional[Exception]:
+            try:
+                self.cancel_order(order_id, account_id)
+                return None
+            except Exception as err:
+                return err
+
+        with ThreadPoolExecutor(max_workers=HTTP_CONNECTIONS_POOL_SIZE) as pool:
+            return dict(zip(order_ids, pool.map(cancel, order_ids)))
+
+    def cancel_all(self, figi: Optional[str] = None,
+                   account_id: Optional[str] = None) -> Dict[str, Optional[Exception]]:
+        orders = self.get_orders(account_id)
+        order_ids = [order.id for order in orders if figi is None or order.figi == figi]
+        logging.info("Cancelling %d orders", len(order_ids))
+        return self.cancel_orders(order_ids, account_id)
+
+    def get_operations(self, start_time: datetime, finish_time: datetime, figi: str = "",
+                       account_id: Optional[str] = None) -> List[Operation]:
+        return [Operation(op) for op in self._get_operations_payload(start_time, finish_time, figi, account_id)]
+
+    def iter_operations(self, start_time: datetime, finish_time: datetime, figi: str = "",
+                        window: datetime.timedelta = datetime.timedelta(days=OPERATIONS_WINDOW_DAYS),
+                        account_id: Optional[str] = None) -> Iterator[Operation]:
+        seen = set()
+        with ThreadPoolExecutor(max_workers=OPERATIONS_WORKERS_COUNT) as pool:
+            futures = [pool.submit(self._get_operations_payload, window_start, window_finish, figi, account_id)
+                       for window_start, window_finish in _split_time_range(start_time, finish_time, window)]
+            for future in futures:
+                for raw in future.result():
+                    # Operations made right on a window border are returned for both windows
+                    if raw["id"] not in seen:
+                        seen.add(raw["id"])
+                        yield Operation(raw)
+
+    def _get_operations_payload(self, start_time: datetime, finish_time: datetime, figi: str,
+                                account_id: Optional[str]) -> List[dict]:
         request = 'operations?from={}+03:00&to={}+03:00'.format(start_time.isoformat(), finish_time.isoformat())
         if figi:
             request = request + '&figi=' + figi
-        return [Operation(op) for op in self._get(request)["payload"]["operations"]]
-
-    def _get(self, query: str) -> dict:
-        logging.debug("Making request GET '%s%s'", self._server, query)
-        account = "" if not self._account_id else "&brokerAccountId={}".format(self._account_id) if "?" in query \
-            else "?brokerAccountId={}".format(self._account_id)
+        return self._get(request, account_id)["payload"]["operations"]
+
+    def _get_http_session(self) -> 'requests.Session':
+        if self._http is None:
+            with self._http_lock:
+                if self._http is None:
+                    requests, _ = _get_http_client()
+                    http = requests.Session()
+                    adapter = requests.adapters.HTTPAdapter(pool_connections=HTTP_CONNECTIONS_POOL_SIZE,
+                                                            pool_maxsize=HTTP_CONNECTIONS_POOL_SIZE)
+                    http.mount("https://", adapter)
+                    http.mount("http://", adapter)
+                    self._http = http
+        return self._http
+
+    def _get(self, query: str, account_id: Optional[str] = None) -> dict:
+        requests, new_connection_error = _get_http_client()
+        debug_sampled("requests", "Making request GET '%s%s'", self._server, query)
+        account = _build_account_argument(query, self._account_id if account_id is None else account_id)
         response = None
         for i in range(_HTTP_RETRIES_COUNT):
             try:
-                response = requests.get(self._server + query.replace(':', '%3A').replace('+', '%2B') + account,
-                                        headers=self._auth_headers)
+                url = self._server + query.replace(':', '%3A').replace('+', '%2B') + account
+                response = self._get_http_session().get(url, headers=self._auth_headers)
                 if response.status_code != requests.codes.ok:
                     if response.status_code == requests.codes.too_many_requests:
                         time.sleep(_RETRY_TIMEOUT_SEC)
@@ -180,12 +348,12 @@ class Session(SubscriptionManager):
                     logging.error("Request failed:\nURL: %s\nStatus: %d\nResponse: %s", response.url,
                                   response.status_code, message)
                     raise RequestProcessingError(response.url, response.status_code, response.text)
-                logging.debug("Response is '%s'", response.text)
+                debug_sampled("responses", "Response is '%s'", response.text)
                 return ujson.loads(response.text)
             except ConnectionError as err:
                 logging.error("Unable to process '{}' request due to connection error: {}".format(query, err))
                 time.sleep(_RETRY_TIMEOUT_SEC)
-            except NewConnectionError as err:
+            except new_connection_error as err:
                 logging.error("Unable to process '{}' request due to connection error: {}".format(query, err))
                 time.sleep(_RETRY_TIMEOUT_SEC)
             except ValueError as err:
@@ -193,9 +361,22 @@ class Session(SubscriptionManager):
                     query, response.text if response else "", err))
         raise RequestProcessingError(response.url, response.status_code, response.text)
 
-    def _post(self, query: str, data: dict) -> dict:
-        logging.debug("Making request POST '%s%s' with body '%s'", self._server, query, data)
-        response = requests.post(self._server + query, headers=self._auth_headers, data=ujson.dumps(data))
+    def _get_market_data(self, query: str) -> dict:
+        return self._response_cache.get(query, self._get)
+
+    def _post(self, query: str, data: dict, account_id: Optional[str] = None) -> dict:
+        requests, _ = _get_http_client()
+        debug_sampled("requests", "Making request POST '%s%s' with body '%s'", self._server, query, data)
+        # POST requests are sent to the session account as GET requests are, the broker picks the default account
+        # only for sessions created without one
+        account = _build_account_argument(query, self._account_id if account_id is None else account_id)
+        for i in range(_HTTP_RETRIES_COUNT):
+            response = self._get_http_session().post(self._server + query + account, headers=self._auth_headers,
+                                                     data=ujson.dumps(data))
+            # Requests rejected by the rate limit have not been processed, so it is safe to send them again
+            if response.status_code != requests.codes.too_many_requests:
+                break
+            time.sleep(_RETRY_TIMEOUT_SEC)
         if response.status_code != requests.codes.ok:
             message = response.text
             if response.status_code not in [requests.codes.service_unavailable, requests.codes.unauthorized]:
@@ -203,20 +384,41 @@ class Session(SubscriptionManager):
             logging.error("Request failed:\nURL: %s\nBody %s\nStatus: %d\nResponse: %s", response.url,
                           str(data), response.status_code, message)
             raise RequestProcessingError(response.url, response.status_code, response.text)
-        logging.debug("Response is '%s'", response.text)
+        debug_sampled("responses", "Response is '%s'", response.text)
         return ujson.loads(response.text)
 
+    def _notify_order_listeners(self, order: Order) -> Order:
+        for listener in self._order_listeners:
+            listener.on_order_updated(order)
+        return order
+
+    def _get_candles_payload(self, figi: str, start_time: datetime, finish_time: datetime,
+                             interval: SubscriptionInterval) -> List[dict]:
+        return self._get_market_data('market/candles?figi={}&from={}+03:00&to={}+03:00&interval={}'.format(
+            figi, start_time.isoformat(), finish_time.isoformat(), interval.value))['payload']['candles']
+
+    def _load_candles(self, figi: str, interval: SubscriptionInterval, start_time: datetime.datetime) -> List[dict]:
+        start_time = start_time.astimezone(_MOSCOW_TIMEZONE).replace(tzinfo=None)
+        finish_time = datetime.datetime.now(_MOSCOW_TIMEZONE).replace(tzinfo=None)
+        return self._get_candles_payload(figi, start_time, finish_time, interval)
+
+    def _load_order_book(self, figi: str, depth: int) -> dict:
+        payload = self._get('market/orderbook?figi={}&depth={}'.format(figi, depth))["payload"]
+        # Streaming order books keep price levels as [price, quantity] pairs
+        payload["bids"] = [[level["price"], level["quantity"]] for level in payload["bids"]]
+        payload["asks"] = [[level["price"], level["quantity"]] for level in payload["asks"]]
+        return payload
+
     def _get_instruments(self, cache: Dict[str, Instrument], url: str) -> Dict[str, Instrument]:
         if cache:
             return cache
         instruments = self._get(url)
-        cache = {}
-        for raw in instruments["payload"]["instruments"]:
-            inst = Instrument(raw)
-            cache[inst.ticker] = inst
+        cache.update({raw["ticker"]: Instrument(raw) for raw in instruments["payload"]["instruments"]})
         return cache
 
     def __str__(self) -> str:
+        from prettytable import PrettyTable
+
         result = "Accounts:\n{}"
         table = PrettyTable(field_names=['ID', 'Type'])
         for acc in self.accounts:
@@ -1,6 +1,15 @@
 from tinkoff_invest.models.candle import Candle
 from tinkoff_invest.models.instrument_status import InstrumentStatus
 from tinkoff_invest.models.order_book import OrderBook
+from tinkoff_invest.models.raw_event import RawEvent
+from tinkoff_invest.models.types import SubscriptionEventType
+from tinkoff_invest.scheduler import Timer
+
+STRATEGY_CALLBACKS = {
+    SubscriptionEventType.CANDLE: "on_candle",
+    SubscriptionEventType.ORDER_BOOK: "on_order_book",
+    SubscriptionEventType.INSTRUMENT: "on_instrument_info"
+}
 
 
 class BaseStrategy:
@@ -12,3 +21,11 @@ class BaseStrategy:
 
     def on_instrument_info(self, instrument: InstrumentStatus) -> None:
         pass
+
+    def on_timer(self, timer: Timer) -> None:
+        pass
+
+
+class RawSubscriber:
+    def on_raw_event(self, event: RawEvent) -> None:
+        pass
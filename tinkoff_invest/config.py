@@ -2,3 +2,31 @@ SANDBOX_SERVER = 'https://api-invest.tinkoff.ru/openapi/sandbox/'
 PRODUCTION_SERVER = 'https://api-invest.tinkoff.ru/openapi/'
 WEB_SOCKETS_SERVER = 'wss://api-invest.tinkoff.ru/openapi/md/v1/md-openapi/ws'
 EVENTS_PROCESSING_WORKERS_COUNT = 5
+SLOW_CALLBACK_THRESHOLD_SEC = 0.1
+RECORDER_MAX_FILE_SIZE = 64 * 1024 * 1024
+RECORDER_FLUSH_INTERVAL_SEC = 1
+PORTFOLIO_RESYNC_INTERVAL_SEC = 60
+HTTP_CONNECTIONS_POOL_SIZE = 20
+OPERATIONS_WINDOW_DAYS = 30
+OPERATIONS_WORKERS_COUNT = 4
+ORDERS_REQUESTS_PER_MINUTE = 100
+ORDER_CANCELS_PER_MINUTE = 50
+RESPONSE_CACHE_SIZE = 1024
+RESPONSE_CACHE_TTL_SEC = {
+    'market/orderbook': 0.5,
+    'market/candles': 5,
+    'market/search': 3600
+}
+MARKET_DATA_BUS_NAME = 'tinkoff_invest_market_data'
+MARKET_DATA_BUS_SIZE = 16 * 1024 * 1024
+MARKET_DATA_BUS_POLL_INTERVAL_SEC = 0.001
+LOG_SAMPLING_RATES = {
+    'events': 100,
+    'responses': 10
+}
+LOG_RATE_LIMIT_INTERVAL_SEC = 10
+SNAPSHOT_BATCH_INTERVAL_SEC = 0.1
+SANDBOX_POOL_SIZE = 4
+ORDER_BOOK_CHUNK_SIZE = 1024
+ORDER_BOOK_COMPRESSION_LEVEL = 6
+ORDER_BOOK_FLUSH_INTERVAL_SEC = 5
@@ -17,3 +17,18 @@ class RequestProcessingError(Exception):
     @property
     def error_code(self) -> int:
         return self._error_code
+
+
+class OrderValidationError(Exception):
+    def __init__(self, figi: str, reason: str):
+        super().__init__("Order for '{}' is rejected before sending: {}".format(figi, reason))
+        self._figi = figi
+        self._reason = reason
+
+    @property
+    def figi(self) -> str:
+        return self._figi
+
+    @property
+    def reason(self) -> str:
+        return self._reason
@@ -0,0 +1,162 @@
+import logging
+import threading
+from collections import deque
+from queue import Queue
+from typing import Callable, Deque, Dict, Hashable, List, Optional, Set, Tuple
+
+from tinkoff_invest.log_sink import warning_rate_limited
+
+DEFAULT_EXECUTOR = "default"
+
+_STOP_WORKER = None
+# Worker gives a busy lane back to the queue after this number of tasks, so one hot lane never takes a worker for good
+_LANE_BATCH_SIZE = 100
+
+ErrorHandler = Callable[[Exception], None]
+
+
+class EventExecutor:
+    def __init__(self, name: str, workers_count: int, on_error: Optional[ErrorHandler] = None):
+        assert (workers_count > 0), "Workers count should be > 0"
+        self._name: str = name
+        self._workers_count: int = workers_count
+        self._on_error: Optional[ErrorHandler] = on_error
+        self._queue: Queue = Queue()
+        self._workers: List[threading.Thread] = []
+        self._lock: threading.Lock = threading.Lock()
+        self._is_running: bool = False
+        self._lanes: Dict[Hashable, Deque[Tuple[Callable[..., None], tuple]]] = {}
+        self._running_lanes: Set[Hashable] = set()
+        self._lanes_lock: threading.Lock = threading.Lock()
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def workers_count(self) -> int:
+        return self._workers_count
+
+    @property
+    def queue_size(self) -> int:
+        return self._queue.qsize()
+
+    @property
+    def is_running(self) -> bool:
+        return self._is_running
+
+    def start(self) -> None:
+        with self._lock:
+            if self._is_running:
+                return
+            self._is_running = True
+            # Workers of the previous run may still be busy, so they keep the old queue with their stop requests
+            # and the new workers never take those requests
+            self._queue = Queue()
+            # Lanes whose runners were left in the old queue are scheduled again, running lanes reschedule themselves
+            with self._lanes_lock:
+                for key in self._lanes:
+                    if key not in self._running_lanes:
+                        self._queue.put((self._run_lane, (key,)))
+            self._start_workers(self._workers_count)
+        logging.info("%d workers of '%s' executor are ready to process events", self._workers_count, self._name)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if not self._is_running:
+                return
+            logging.info("Shutdown '%s' executor workers", self._name)
+            self._is_running = False
+            workers, self._workers = self._workers, []
+            for _ in workers:
+                self._queue.put(_STOP_WORKER)
+        for worker in workers:
+            try:
+                if worker.is_alive() and worker is not threading.current_thread():
+                    worker.join(1)
+            except Exception as err:
+                logging.error("Unable to join tread, {}".format(err))
+
+    def resize(self, workers_count: int) -> None:
+        assert (workers_count > 0), "Workers count should be > 0"
+        with self._lock:
+            if self._is_running:
+                self._workers = [worker for worker in self._workers if worker.is_alive()]
+                if workers_count > len(self._workers):
+                    self._start_workers(workers_count - len(self._workers))
+                else:
+                    # Extra workers leave once they have processed the events queued before resizing
+                    for _ in range(len(self._workers) - workers_count):
+                        self._queue.put(_STOP_WORKER)
+            self._workers_count = workers_count
+        logging.info("'%s' executor has been resized to %d workers", self._name, workers_count)
+
+    def wait_until_idle(self) -> None:
+        self._queue.join()
+
+    def submit(self, task: Callable[..., None], *args) -> None:
+        self._queue.put((task, args))
+
+    def submit_ordered(self, key: Hashable, task: Callable[..., None], *args) -> None:
+        # Tasks with the same key are run one by one in the order of submission, whatever the workers count is
+        with self._lanes_lock:
+            lane = self._lanes.get(key)
+            is_new = lane is None
+            if is_new:
+                lane = self._lanes[key] = deque()
+            lane.append((task, args))
+        if is_new:
+            self._queue.put((self._run_lane, (key,)))
+
+    def _run_lane(self, key: Hashable) -> None:
+        with self._lanes_lock:
+            if key in self._running_lanes or key not in self._lanes:
+                return
+            self._running_lanes.add(key)
+        for _ in range(_LANE_BATCH_SIZE):
+            with self._lanes_lock:
+                lane = self._lanes[key]
+                if not lane:
+                    del self._lanes[key]
+                    self._running_lanes.discard(key)
+                    return
+                task, args = lane.popleft()
+            self._run_task(task, args)
+        with self._lanes_lock:
+            self._running_lanes.discard(key)
+        self._queue.put((self._run_lane, (key,)))
+
+    def _run_task(self, task: Callable[..., None], args: tuple) -> None:
+        try:
+            task(*args)
+        except Exception as err:
+            if self._on_error:
+                self._on_error(err)
+            else:
+                logging.exception(err)
+
+    def _start_workers(self, count: int) -> None:
+        for _ in range(count):
+            thread = threading.Thread(target=self._worker, args=(self._queue,), daemon=True,
+                                      name="tinkoff_invest_{}_worker".format(self._name))
+            thread.start()
+            self._workers.append(thread)
+
+    def _worker(self, queue: Queue) -> None:
+        while True:
+            queue_size = queue.qsize()
+            if queue_size >= self._workers_count:
+                warning_rate_limited("executor_" + self._name, "Too many events to process by '%s' executor: %d",
+                                     self._name, queue_size)
+
+            item = queue.get()
+            if item is _STOP_WORKER:
+                queue.task_done()
+                logging.info("Shutdown '%s' executor worker", self._name)
+                break
+
+            task, args = item
+            try:
+                self._run_task(task, args)
+            finally:
+                queue.task_done()
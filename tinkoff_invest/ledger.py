@@ -0,0 +1,110 @@
+import datetime
+import logging
+import os
+import threading
+from typing import Dict, List, Optional
+
+import ujson
+
+from tinkoff_invest.base_session import Session
+from tinkoff_invest.config import OPERATIONS_WINDOW_DAYS
+from tinkoff_invest.models.operation import Operation
+from tinkoff_invest.models.types import OperationType
+
+_MOSCOW_TIMEZONE = datetime.timezone(datetime.timedelta(hours=3))
+# Operations still in progress may change during this period, so they are requested again on every sync
+_SYNC_OVERLAP = datetime.timedelta(days=1)
+
+
+class OperationsLedger:
+    def __init__(self, session: Session, path: str, account_id: Optional[str] = None):
+        self._session: Session = session
+        self._path: str = path
+        self._account_id: Optional[str] = account_id
+        self._lock: threading.Lock = threading.Lock()
+        self._operations: Dict[str, Operation] = {}
+        self._by_figi: Dict[str, Dict[str, Operation]] = {}
+        self._by_type: Dict[OperationType, Dict[str, Operation]] = {}
+        self._synced_to: Optional[datetime.datetime] = None
+        self._load()
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    @property
+    def synced_to(self) -> Optional[datetime.datetime]:
+        return self._synced_to
+
+    @property
+    def operations(self) -> List[Operation]:
+        return list(self._operations.values())
+
+    def get_operation(self, operation_id: str) -> Optional[Operation]:
+        return self._operations.get(operation_id)
+
+    def get_operations_by_figi(self, figi: str) -> List[Operation]:
+        return list(self._by_figi.get(figi, {}).values())
+
+    def get_operations_by_type(self, operation_type: OperationType) -> List[Operation]:
+        return list(self._by_type.get(operation_type, {}).values())
+
+    def sync(self, start_time: Optional[datetime.datetime] = None,
+             window: datetime.timedelta = datetime.timedelta(days=OPERATIONS_WINDOW_DAYS)) -> int:
+        if start_time is None:
+            assert (self._synced_to is not None), "Start time is required for the first synchronization"
+            start_time = self._synced_to - _SYNC_OVERLAP
+        finish_time = datetime.datetime.now(_MOSCOW_TIMEZONE).replace(tzinfo=None)
+
+        updated = 0
+        with self._lock, open(self._path, "a") as file:
+            for operation in self._session.iter_operations(start_time, finish_time, window=window,
+                                                           account_id=self._account_id):
+                stored = self._operations.get(operation.id)
+                if stored is not None and stored._data == operation._data:
+                    continue
+                file.write(ujson.dumps({"operation": operation._data}) + "\n")
+                self._add(operation)
+                updated += 1
+            self._synced_to = max(finish_time, self._synced_to) if self._synced_to else finish_time
+            file.write(ujson.dumps({"synced_to": self._synced_to.isoformat()}) + "\n")
+        logging.info("%d operations have been synchronized to %s", updated, self._path)
+        return updated
+
+    def __len__(self) -> int:
+        return len(self._operations)
+
+    def _load(self) -> None:
+        if not os.path.exists(self._path):
+            return
+
+        with open(self._path, "rb") as file:
+            content = file.read()
+        # The last record might be incomplete if the process was interrupted while writing it. It is cut off,
+        # otherwise the next appended record would be glued to it and lost.
+        complete_size = content.rfind(b"\n") + 1
+        if complete_size < len(content):
+            logging.warning("Removing an incomplete record at the end of %s", self._path)
+            with open(self._path, "r+b") as file:
+                file.truncate(complete_size)
+
+        for line in content[:complete_size].splitlines():
+            try:
+                record = ujson.loads(line)
+            except ValueError:
+                logging.warning("Skipping an invalid record in %s", self._path)
+                continue
+            if "operation" in record:
+                self._add(Operation(record["operation"]))
+            elif "synced_to" in record:
+                self._synced_to = datetime.datetime.fromisoformat(record["synced_to"])
+        logging.info("%d operations have been loaded from %s", len(self._operations), self._path)
+
+    def _add(self, operation: Operation) -> None:
+        previous = self._operations.get(operation.id)
+        if previous is not None:
+            self._by_figi.get(previous.figi, {}).pop(previous.id, None)
+            self._by_type.get(previous.operation, {}).pop(previous.id, None)
+        self._operations[operation.id] = operation
+        self._by_figi.setdefault(operation.figi, {})[operation.id] = operation
+        self._by_type.setdefault(operation.operation, {})[operation.id] = operation
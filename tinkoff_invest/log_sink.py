@@ -0,0 +1,90 @@
+import itertools
+import logging
+import queue
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from tinkoff_invest.config import LOG_SAMPLING_RATES, LOG_RATE_LIMIT_INTERVAL_SEC
+
+_sampling_rates: Dict[str, int] = dict(LOG_SAMPLING_RATES)
+_counters: Dict[str, Iterator[int]] = {}
+_rate_limits: Dict[str, Tuple[float, int]] = {}
+_rate_limits_lock: threading.Lock = threading.Lock()
+_listener: Optional[QueueListener] = None
+_replaced_handlers: List[logging.Handler] = []
+
+
+def set_sampling_rate(category: str, rate: int) -> None:
+    assert (rate > 0), "Sampling rate should be > 0"
+    _sampling_rates[category] = rate
+    _counters.pop(category, None)
+
+
+def get_sampling_rate(category: str) -> int:
+    return _sampling_rates.get(category, 1)
+
+
+def debug_sampled(category: str, message: str, *args) -> None:
+    # Level is checked first, so disabled debug logging costs a cached lookup only
+    if not logging.root.isEnabledFor(logging.DEBUG):
+        return
+    rate = _sampling_rates.get(category, 1)
+    if rate > 1:
+        counter = _counters.get(category)
+        if counter is None:
+            counter = _counters.setdefault(category, itertools.count())
+        # next() of itertools.count is atomic, so no lock is needed to count events of many threads
+        if next(counter) % rate:
+            return
+    logging.debug(message, *args)
+
+
+def warning_rate_limited(key: str, message: str, *args,
+                         interval_sec: float = LOG_RATE_LIMIT_INTERVAL_SEC) -> None:
+    now = time.monotonic()
+    with _rate_limits_lock:
+        last_time, suppressed = _rate_limits.get(key, (0.0, 0))
+        if last_time and now - last_time < interval_sec:
+            _rate_limits[key] = (last_time, suppressed + 1)
+            return
+        _rate_limits[key] = (now, 0)
+    if suppressed:
+        logging.warning(message + " (%d similar messages suppressed)", *args, suppressed)
+    else:
+        logging.warning(message, *args)
+
+
+def enable_async_logging(max_queue_size: int = 0) -> QueueListener:
+    global _listener
+    if _listener:
+        return _listener
+
+    # Handlers of the root logger are moved to a background thread, callers only put records into a queue
+    root = logging.getLogger()
+    _replaced_handlers[:] = root.handlers
+    records: queue.Queue = queue.Queue(max_queue_size)
+    # Without configured handlers warnings are printed by the last resort handler, it is kept in the listener
+    _listener = QueueListener(records, *(_replaced_handlers or [logging.lastResort]), respect_handler_level=True)
+    for handler in _replaced_handlers:
+        root.removeHandler(handler)
+    root.addHandler(QueueHandler(records))
+    _listener.start()
+    logging.info("Asynchronous logging enabled for %d handlers", len(_replaced_handlers))
+    return _listener
+
+
+def disable_async_logging() -> None:
+    global _listener
+    if not _listener:
+        return
+
+    root = logging.getLogger()
+    for handler in [handler for handler in root.handlers if isinstance(handler, QueueHandler)]:
+        root.removeHandler(handler)
+    _listener.stop()
+    _listener = None
+    for handler in _replaced_handlers:
+        root.addHandler(handler)
+    _replaced_handlers.clear()
@@ -0,0 +1,423 @@
+import logging
+import math
+import struct
+import threading
+import time
+from multiprocessing import resource_tracker
+from multiprocessing.connection import Client, Connection, Listener
+from multiprocessing.shared_memory import SharedMemory
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import ujson
+
+from tinkoff_invest.base_strategy import BaseStrategy, STRATEGY_CALLBACKS
+from tinkoff_invest.config import MARKET_DATA_BUS_NAME, MARKET_DATA_BUS_SIZE, MARKET_DATA_BUS_POLL_INTERVAL_SEC
+from tinkoff_invest.models.candle import Candle
+from tinkoff_invest.models.instrument_status import InstrumentStatus
+from tinkoff_invest.models.order_book import OrderBook
+from tinkoff_invest.models.types import SubscriptionEventType, SubscriptionInterval
+from tinkoff_invest.subscriptions import SubscriptionManager, build_subscription_name
+
+_MARKET_DATA_BUS_EXECUTOR = "market_data_bus"
+_MAGIC = b"TIMB"
+# Header keeps the capacity, the reserved and committed write positions and the control channel address.
+# Positions only grow, an offset in the buffer is the position modulo the capacity.
+_HEADER = struct.Struct("<4s4xQQQ")
+_ADDRESS_HEADER = struct.Struct("<H")
+_ADDRESS_OFFSET = _HEADER.size
+_POSITIONS_OFFSET = 16
+_POSITIONS = struct.Struct("<QQ")
+_DATA_OFFSET = 256
+# Record is its total size, event type code and subscription name size followed by the name and payload.
+# Candles and order books are packed into fixed-layout records, so clients never parse JSON for them. Figi and
+# interval or depth are taken from the subscription name, missing prices are passed as NaN.
+_RECORD = struct.Struct("<IBH")
+_WRAP_MARKER = 0
+# Open, close, high and low prices, volume and the size of the time string following them
+_CANDLE = struct.Struct("<5dB")
+# Counts of bids and asks, prices of the book and the size of the trade status string following the price levels
+_ORDER_BOOK = struct.Struct("<BB6dB")
+_ORDER_BOOK_PRICES = ("faceValue", "lastPrice", "closePrice", "limitUp", "limitDown", "minPriceIncrement")
+_PRICE_LEVEL = struct.Struct("<2d")
+
+_EVENT_TYPES = list(SubscriptionEventType)
+_EVENT_TYPE_CODES = {event_type: code for code, event_type in enumerate(_EVENT_TYPES)}
+_EVENT_MODELS = {
+    SubscriptionEventType.CANDLE: Candle,
+    SubscriptionEventType.ORDER_BOOK: OrderBook,
+    SubscriptionEventType.INSTRUMENT: InstrumentStatus
+}
+
+
+def _encode_candle(payload: dict) -> bytes:
+    time = payload["time"].encode()
+    return _CANDLE.pack(payload["o"], payload["c"], payload["h"], payload["l"], payload["v"], len(time)) + time
+
+
+def _decode_candle(figi: str, interval: str, body: bytes) -> dict:
+    open_price, close_price, high_price, low_price, volume, time_size = _CANDLE.unpack_from(body)
+    return {"figi": figi, "interval": interval, "o": open_price, "c": close_price, "h": high_price, "l": low_price,
+            "v": volume, "time": body[_CANDLE.size:_CANDLE.size + time_size].decode()}
+
+
+def _encode_order_book(payload: dict) -> bytes:
+    bids, asks = payload["bids"], payload["asks"]
+    status = payload.get("tradeStatus", "").encode()
+    prices = (payload.get(key, math.nan) for key in _ORDER_BOOK_PRICES)
+    levels = b"".join(_PRICE_LEVEL.pack(price, quantity) for price, quantity in bids + asks)
+    return _ORDER_BOOK.pack(len(bids), len(asks), *prices, len(status)) + levels + status
+
+
+def _decode_order_book(figi: str, depth: str, body: bytes) -> dict:
+    bids_count, asks_count, *prices, status_size = _ORDER_BOOK.unpack_from(body)
+    levels = [list(level) for level in _PRICE_LEVEL.iter_unpack(
+        body[_ORDER_BOOK.size:_ORDER_BOOK.size + (bids_count + asks_count) * _PRICE_LEVEL.size])]
+    payload = {"figi": figi, "depth": int(depth), "bids": levels[:bids_count], "asks": levels[bids_count:]}
+    payload.update((key, price) for key, price in zip(_ORDER_BOOK_PRICES, prices) if not math.isnan(price))
+    if status_size:
+        payload["tradeStatus"] = body[len(body) - status_size:].decode()
+    return payload
+
+
+def _encode_json(payload: dict) -> bytes:
+    return ujson.dumps(payload).encode()
+
+
+def _decode_json(_1: str, _2: str, body: bytes) -> dict:
+    return ujson.loads(body)
+
+
+# Instrument status events are rare, so they are passed as JSON
+_ENCODERS = {
+    SubscriptionEventType.CANDLE: _encode_candle,
+    SubscriptionEventType.ORDER_BOOK: _encode_order_book,
+    SubscriptionEventType.INSTRUMENT: _encode_json
+}
+_DECODERS = {
+    SubscriptionEventType.CANDLE: _decode_candle,
+    SubscriptionEventType.ORDER_BOOK: _decode_order_book,
+    SubscriptionEventType.INSTRUMENT: _decode_json
+}
+
+
+def _attach_shared_memory(name: str) -> SharedMemory:
+    try:
+        return SharedMemory(name, track=False)
+    except TypeError:
+        # Before Python 3.13 every attached process registers the segment and removes it on exit,
+        # while only the server owns it
+        memory = SharedMemory(name)
+        resource_tracker.unregister(memory._name, "shared_memory")
+        return memory
+
+
+def _read_address(memory: SharedMemory) -> str:
+    address_size, = _ADDRESS_HEADER.unpack_from(memory.buf, _ADDRESS_OFFSET)
+    address_start = _ADDRESS_OFFSET + _ADDRESS_HEADER.size
+    return bytes(memory.buf[address_start:address_start + address_size]).decode()
+
+
+def _is_stale_bus(name: str) -> bool:
+    memory = _attach_shared_memory(name)
+    try:
+        if memory.size < _DATA_OFFSET or _HEADER.unpack_from(memory.buf, 0)[0] != _MAGIC:
+            return False
+        address = _read_address(memory)
+    finally:
+        memory.close()
+    # Bus is stale only if nobody listens to its control channel anymore
+    try:
+        Client(address).close()
+    except OSError:
+        return True
+    return False
+
+
+class MarketDataBusServer(BaseStrategy):
+    # Any local process that knows the control channel address may subscribe, so clients are authenticated
+    def __init__(self, manager: SubscriptionManager, authkey: bytes, name: str = MARKET_DATA_BUS_NAME,
+                 capacity: int = MARKET_DATA_BUS_SIZE):
+        assert (not manager.is_process_isolation_enabled), "Market data bus requires in-process subscriptions"
+        assert authkey, "Market data bus requires an authentication key"
+        self._manager: SubscriptionManager = manager
+        self._capacity: int = capacity
+        self._lock: threading.Lock = threading.Lock()
+        self._position: int = 0
+        self._published_count: int = 0
+        self._subscriptions: Dict[str, Tuple[SubscriptionEventType, str, str]] = {}
+        self._memory: SharedMemory = self._create_shared_memory(name, _DATA_OFFSET + capacity)
+        self._listener: Listener = Listener(authkey=authkey)
+        self._is_running: bool = True
+
+        address = str(self._listener.address).encode()
+        assert (_ADDRESS_OFFSET + _ADDRESS_HEADER.size + len(address) <= _DATA_OFFSET), "Too long bus address"
+        _ADDRESS_HEADER.pack_into(self._memory.buf, _ADDRESS_OFFSET, len(address))
+        self._memory.buf[_ADDRESS_OFFSET + _ADDRESS_HEADER.size:_ADDRESS_OFFSET + _ADDRESS_HEADER.size +
+                         len(address)] = address
+        _HEADER.pack_into(self._memory.buf, 0, _MAGIC, capacity, 0, 0)
+
+        # Events of an instrument are published in the order of the web socket stream, events of different
+        # instruments may be interleaved differently
+        if _MARKET_DATA_BUS_EXECUTOR not in manager.executors:
+            manager.add_executor(_MARKET_DATA_BUS_EXECUTOR, 1)
+        threading.Thread(target=self._accept_clients, daemon=True).start()
+        logging.info("Market data bus '%s' started, %d bytes buffer", name, capacity)
+
+    @property
+    def name(self) -> str:
+        return self._memory.name
+
+    @property
+    def published_count(self) -> int:
+        return self._published_count
+
+    @property
+    def subscriptions(self) -> List[str]:
+        return sorted(self._subscriptions)
+
+    def subscribe_to_candles(self, figi: str, interval: SubscriptionInterval) -> None:
+        self._subscribe(SubscriptionEventType.CANDLE, figi, interval.value)
+
+    def subscribe_to_order_book(self, figi: str, depth: int) -> None:
+        self._subscribe(SubscriptionEventType.ORDER_BOOK, figi, str(depth))
+
+    def subscribe_to_instrument_info(self, figi: str) -> None:
+        self._subscribe(SubscriptionEventType.INSTRUMENT, figi, "")
+
+    def on_candle(self, candle: Candle) -> None:
+        self._publish(SubscriptionEventType.CANDLE, candle.figi, candle._data["interval"], candle._data)
+
+    def on_order_book(self, order_book: OrderBook) -> None:
+        self._publish(SubscriptionEventType.ORDER_BOOK, order_book.figi, str(order_book._data["depth"]),
+                      order_book._data)
+
+    def on_instrument_info(self, instrument: InstrumentStatus) -> None:
+        self._publish(SubscriptionEventType.INSTRUMENT, instrument.figi, "", instrument._data)
+
+    def close(self) -> None:
+        if not self._is_running:
+            return
+        self._is_running = False
+        self._listener.close()
+        for event_type, figi, parameter in list(self._subscriptions.values()):
+            try:
+                self._unsubscribe(event_type, figi, parameter)
+            except Exception as err:
+                logging.error("Unable to unsubscribe market data bus from %s: %s", figi, err)
+        self._subscriptions.clear()
+        with self._lock:
+            self._memory.close()
+            self._memory.unlink()
+        logging.info("Market data bus stopped, %d events have been published", self._published_count)
+
+    def _subscribe(self, event_type: SubscriptionEventType, figi: str, parameter: str) -> None:
+        subscription_name = build_subscription_name(figi, event_type.value, parameter)
+        with self._lock:
+            if subscription_name in self._subscriptions:
+                return
+            self._subscriptions[subscription_name] = (event_type, figi, parameter)
+        # Every instrument is subscribed once for all clients and stays subscribed while the bus is running
+        if event_type == SubscriptionEventType.CANDLE:
+            self._manager.subscribe_to_candles(figi, SubscriptionInterval(parameter), self, _MARKET_DATA_BUS_EXECUTOR)
+        elif event_type == SubscriptionEventType.ORDER_BOOK:
+            self._manager.subscribe_to_order_book(figi, int(parameter), self, _MARKET_DATA_BUS_EXECUTOR)
+        else:
+            self._manager.subscribe_to_instrument_info(figi, self, _MARKET_DATA_BUS_EXECUTOR)
+
+    def _unsubscribe(self, event_type: SubscriptionEventType, figi: str, parameter: str) -> None:
+        if event_type == SubscriptionEventType.CANDLE:
+            self._manager.unsubscribe_from_candles(figi, SubscriptionInterval(parameter))
+        elif event_type == SubscriptionEventType.ORDER_BOOK:
+            self._manager.unsubscribe_from_order_book(figi, int(parameter))
+        else:
+            self._manager.unsubscribe_from_instrument_info(figi)
+
+    def _publish(self, event_type: SubscriptionEventType, figi: str, parameter: str, payload: dict) -> None:
+        name = build_subscription_name(figi, event_type.value, parameter).encode()
+        body = _ENCODERS[event_type](payload)
+        size = _RECORD.size + len(name) + len(body)
+        assert (size <= self._capacity // 2), "An event of {} bytes does not fit the bus buffer".format(size)
+
+        with self._lock:
+            if not self._is_running:
+                return
+            buffer = self._memory.buf
+            position = self._position
+            offset = position % self._capacity
+            is_wrapped = offset + size > self._capacity
+            if is_wrapped:
+                position += self._capacity - offset
+
+            # Readers check the reserved position to find out whether a record was overwritten while being copied
+            _POSITIONS.pack_into(buffer, _POSITIONS_OFFSET, position + size, self._position)
+            if is_wrapped:
+                if self._capacity - offset >= _RECORD.size:
+                    _RECORD.pack_into(buffer, _DATA_OFFSET + offset, _WRAP_MARKER, 0, 0)
+                offset = 0
+            start = _DATA_OFFSET + offset
+            _RECORD.pack_into(buffer, start, size, _EVENT_TYPE_CODES[event_type], len(name))
+            start += _RECORD.size
+            buffer[start:start + len(name)] = name
+            start += len(name)
+            buffer[start:start + len(body)] = body
+            self._position = position + size
+            _POSITIONS.pack_into(buffer, _POSITIONS_OFFSET, self._position, self._position)
+            self._published_count += 1
+
+    def _accept_clients(self) -> None:
+        while self._is_running:
+            try:
+                connection = self._listener.accept()
+            except Exception as err:
+                if self._is_running:
+                    logging.error("Unable to accept market data bus client: %s", err)
+                continue
+            threading.Thread(target=self._serve_client, args=(connection,), daemon=True).start()
+
+    def _serve_client(self, connection: Connection) -> None:
+        with connection:
+            while self._is_running:
+                try:
+                    event_type, figi, parameter = connection.recv()
+                except (EOFError, OSError):
+                    break
+                try:
+                    self._subscribe(SubscriptionEventType(event_type), figi, parameter)
+                    connection.send(None)
+                except Exception as err:
+                    logging.exception(err)
+                    connection.send(str(err))
+
+    @staticmethod
+    def _create_shared_memory(name: str, size: int) -> SharedMemory:
+        try:
+            return SharedMemory(name, create=True, size=size)
+        except FileExistsError:
+            # Segment of a running bus or of another application is never removed
+            if not _is_stale_bus(name):
+                raise FileExistsError("Shared memory '{}' is in use, market data bus has not been started".format(
+                    name))
+            logging.warning("Removing a stale market data bus '%s'", name)
+            stale = _attach_shared_memory(name)
+            stale.close()
+            stale.unlink()
+            return SharedMemory(name, create=True, size=size)
+
+
+class MarketDataBusClient:
+    def __init__(self, authkey: bytes, name: str = MARKET_DATA_BUS_NAME,
+                 poll_interval_sec: float = MARKET_DATA_BUS_POLL_INTERVAL_SEC):
+        assert authkey, "Market data bus requires an authentication key"
+        self._memory: SharedMemory = _attach_shared_memory(name)
+        magic, self._capacity, _, committed = _HEADER.unpack_from(self._memory.buf, 0)
+        assert (magic == _MAGIC), "'{}' is not a market data bus".format(name)
+        self._connection: Connection = Client(_read_address(self._memory), authkey=authkey)
+        self._connection_lock: threading.Lock = threading.Lock()
+        self._poll_interval_sec: float = poll_interval_sec
+        # New clients receive events published after they attached only
+        self._position: int = committed
+        self._overruns_count: int = 0
+        self._strategies: Dict[str, List[BaseStrategy]] = {}
+        self._parameters: Dict[str, Tuple[str, str]] = {}
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def overruns_count(self) -> int:
+        return self._overruns_count
+
+    def subscribe_to_candles(self, figi: str, interval: SubscriptionInterval, strategy: BaseStrategy) -> None:
+        self._subscribe(SubscriptionEventType.CANDLE, figi, interval.value, strategy)
+
+    def subscribe_to_order_book(self, figi: str, depth: int, strategy: BaseStrategy) -> None:
+        assert (0 < depth <= 20), "Depth should be > 0 and <= 20"
+        self._subscribe(SubscriptionEventType.ORDER_BOOK, figi, str(depth), strategy)
+
+    def subscribe_to_instrument_info(self, figi: str, strategy: BaseStrategy) -> None:
+        self._subscribe(SubscriptionEventType.INSTRUMENT, figi, "", strategy)
+
+    def start(self) -> None:
+        if not self._thread:
+            self._thread = threading.Thread(target=self._process_events, daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        thread, self._thread = self._thread, None
+        if thread and thread is not threading.current_thread():
+            thread.join()
+        self._connection.close()
+        self._memory.close()
+
+    def _subscribe(self, event_type: SubscriptionEventType, figi: str, parameter: str,
+                   strategy: BaseStrategy) -> None:
+        with self._connection_lock:
+            self._connection.send((event_type.value, figi, parameter))
+            error = self._connection.recv()
+        if error:
+            raise Exception("Unable to subscribe via market data bus: {}".format(error))
+        subscription_name = build_subscription_name(figi, event_type.value, parameter)
+        self._parameters[subscription_name] = (figi, parameter)
+        self._strategies[subscription_name] = self._strategies.get(subscription_name, []) + [strategy]
+        logging.info("Market data bus subscription created (%s)", subscription_name)
+
+    def _process_events(self) -> None:
+        current_thread = threading.current_thread()
+        while self._thread is current_thread:
+            has_events = False
+            for subscription_name, event_type, body in self._read_records():
+                has_events = True
+                # Events subscribed by other clients are skipped without decoding
+                strategies = self._strategies.get(subscription_name)
+                if not strategies:
+                    continue
+                event_object = _EVENT_MODELS[event_type](self._decode(subscription_name, event_type, body))
+                for strategy in strategies:
+                    try:
+                        getattr(strategy, STRATEGY_CALLBACKS[event_type])(event_object)
+                    except Exception as err:
+                        logging.exception(err)
+            if not has_events:
+                time.sleep(self._poll_interval_sec)
+
+    def _decode(self, subscription_name: str, event_type: SubscriptionEventType, body: bytes) -> dict:
+        figi, parameter = self._parameters[subscription_name]
+        return _DECODERS[event_type](figi, parameter, body)
+
+    def _read_records(self) -> Iterator[Tuple[str, SubscriptionEventType, bytes]]:
+        buffer = self._memory.buf
+        _, committed = _POSITIONS.unpack_from(buffer, _POSITIONS_OFFSET)
+        if committed - self._position > self._capacity:
+            self._skip_to(committed)
+            return
+
+        while self._position < committed:
+            offset = self._position % self._capacity
+            if self._capacity - offset < _RECORD.size:
+                self._position += self._capacity - offset
+                continue
+            size, event_code, name_size = _RECORD.unpack_from(buffer, _DATA_OFFSET + offset)
+            if not self._is_valid():
+                return
+            if size == _WRAP_MARKER:
+                self._position += self._capacity - offset
+                continue
+
+            record = bytes(buffer[_DATA_OFFSET + offset:_DATA_OFFSET + offset + size])
+            if not self._is_valid():
+                return
+            self._position += size
+            name_end = _RECORD.size + name_size
+            yield record[_RECORD.size:name_end].decode(), _EVENT_TYPES[event_code], record[name_end:]
+
+    def _is_valid(self) -> bool:
+        reserved, committed = _POSITIONS.unpack_from(self._memory.buf, _POSITIONS_OFFSET)
+        if reserved - self._position <= self._capacity:
+            return True
+        # The writer has wrapped around and reused the record while it was being read
+        self._skip_to(committed)
+        return False
+
+    def _skip_to(self, position: int) -> None:
+        # Lost events are not restored, strategies continue from the latest published state
+        self._overruns_count += 1
+        logging.warning("Market data bus client is too slow, skipping %d bytes of events", position - self._position)
+        self._position = position
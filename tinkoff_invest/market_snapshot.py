@@ -0,0 +1,186 @@
+import logging
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from tinkoff_invest.base_strategy import BaseStrategy
+from tinkoff_invest.config import SNAPSHOT_BATCH_INTERVAL_SEC
+from tinkoff_invest.models.candle import Candle
+from tinkoff_invest.models.instrument_status import InstrumentStatus
+from tinkoff_invest.models.order_book import OrderBook
+from tinkoff_invest.models.types import TradingStatus
+
+SNAPSHOT_FIELDS = ["open", "close", "high", "low", "volume", "bid", "bid_size", "ask", "ask_size", "limit_up",
+                   "limit_down", "trading_status", "update_time"]
+_FIELD_INDEXES = {field: index for index, field in enumerate(SNAPSHOT_FIELDS)}
+_CANDLE_COLUMNS = [_FIELD_INDEXES[field] for field in ("open", "close", "high", "low", "volume")]
+_BID = _FIELD_INDEXES["bid"]
+_ASK = _FIELD_INDEXES["ask"]
+_LIMITS_COLUMNS = [_FIELD_INDEXES["limit_up"], _FIELD_INDEXES["limit_down"]]
+_TRADING_STATUS = _FIELD_INDEXES["trading_status"]
+_UPDATE_TIME = _FIELD_INDEXES["update_time"]
+# Trading status is kept as an index in this list, so it can be filtered like any other column
+TRADING_STATUSES = list(TradingStatus)
+_TRADING_STATUS_CODES = {status: code for code, status in enumerate(TRADING_STATUSES)}
+
+SnapshotHandler = Callable[['Snapshot'], None]
+
+
+class Snapshot:
+    def __init__(self, version: int, figis: List[str], values: np.ndarray, updated: np.ndarray):
+        self._version: int = version
+        self._figis: List[str] = figis
+        self._values: np.ndarray = values
+        self._updated: np.ndarray = updated
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    @property
+    def figis(self) -> List[str]:
+        return self._figis
+
+    @property
+    def values(self) -> np.ndarray:
+        return self._values
+
+    @property
+    def updated(self) -> np.ndarray:
+        return self._updated
+
+    @property
+    def updated_figis(self) -> List[str]:
+        return [self._figis[row] for row in np.flatnonzero(self._updated)]
+
+    def column(self, field: str) -> np.ndarray:
+        return self._values[:, _FIELD_INDEXES[field]]
+
+    def row(self, figi: str) -> np.ndarray:
+        return self._values[self._figis.index(figi)]
+
+    def __len__(self) -> int:
+        return len(self._figis)
+
+
+class MarketSnapshot(BaseStrategy):
+    def __init__(self, figis: Iterable[str] = (), capacity: int = 1024,
+                 batch_interval_sec: float = SNAPSHOT_BATCH_INTERVAL_SEC):
+        self._lock: threading.Lock = threading.Lock()
+        self._values: np.ndarray = np.full((max(capacity, 1), len(SNAPSHOT_FIELDS)), np.nan)
+        self._updated: np.ndarray = np.zeros(max(capacity, 1), dtype=bool)
+        self._rows: Dict[str, int] = {}
+        self._figis: List[str] = []
+        self._version: int = 0
+        self._batch_interval_sec: float = batch_interval_sec
+        self._handlers: List[SnapshotHandler] = []
+        self._has_updates: threading.Event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        for figi in figis:
+            self.add(figi)
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    @property
+    def figis(self) -> List[str]:
+        return list(self._figis)
+
+    def get_row(self, figi: str) -> Optional[int]:
+        return self._rows.get(figi)
+
+    def add(self, figi: str) -> int:
+        with self._lock:
+            return self._get_or_add_row(figi)
+
+    def snapshot(self) -> Snapshot:
+        with self._lock:
+            return self._take_snapshot(reset_updated=False)
+
+    def add_handler(self, handler: SnapshotHandler) -> None:
+        self._handlers = self._handlers + [handler]
+        if not self._thread:
+            self._thread = threading.Thread(target=self._notify_handlers, daemon=True,
+                                            name="tinkoff_invest_snapshot")
+            self._thread.start()
+
+    def remove_handler(self, handler: SnapshotHandler) -> None:
+        self._handlers = [item for item in self._handlers if item is not handler]
+
+    def stop(self) -> None:
+        self._thread = None
+        self._has_updates.set()
+
+    def on_candle(self, candle: Candle) -> None:
+        data = candle._data
+        values = [data["o"], data["c"], data["h"], data["l"], data["v"]]
+        with self._lock:
+            row = self._get_or_add_row(data["figi"])
+            self._values[row, _CANDLE_COLUMNS] = values
+            self._commit(row)
+
+    def on_order_book(self, order_book: OrderBook) -> None:
+        bids, asks = order_book.bids, order_book.asks
+        with self._lock:
+            row = self._get_or_add_row(order_book.figi)
+            self._values[row, _BID:_BID + 2] = bids[0][:2] if bids else np.nan
+            self._values[row, _ASK:_ASK + 2] = asks[0][:2] if asks else np.nan
+            self._commit(row)
+
+    def on_instrument_info(self, instrument: InstrumentStatus) -> None:
+        data = instrument._data
+        limits = [data.get("limit_up", np.nan), data.get("limit_down", np.nan)]
+        status = _TRADING_STATUS_CODES.get(TradingStatus(data["trade_status"]), np.nan) \
+            if "trade_status" in data else np.nan
+        with self._lock:
+            row = self._get_or_add_row(instrument.figi)
+            self._values[row, _LIMITS_COLUMNS] = limits
+            self._values[row, _TRADING_STATUS] = status
+            self._commit(row)
+
+    def _get_or_add_row(self, figi: str) -> int:
+        row = self._rows.get(figi)
+        if row is not None:
+            return row
+
+        row = len(self._figis)
+        if row == len(self._values):
+            # Rows are never moved, so an index taken before growing is still valid
+            self._values = np.vstack([self._values, np.full_like(self._values, np.nan)])
+            self._updated = np.concatenate([self._updated, np.zeros_like(self._updated)])
+        self._rows[figi] = row
+        self._figis.append(figi)
+        return row
+
+    def _commit(self, row: int) -> None:
+        self._values[row, _UPDATE_TIME] = time.time()
+        self._updated[row] = True
+        self._version += 1
+        self._has_updates.set()
+
+    def _take_snapshot(self, reset_updated: bool) -> Snapshot:
+        rows = len(self._figis)
+        snapshot = Snapshot(self._version, list(self._figis), self._values[:rows].copy(), self._updated[:rows].copy())
+        if reset_updated:
+            self._updated[:rows] = False
+        return snapshot
+
+    def _notify_handlers(self) -> None:
+        current_thread = threading.current_thread()
+        while self._thread is current_thread:
+            self._has_updates.wait()
+            # Updates received during the interval are delivered together as one batch
+            time.sleep(self._batch_interval_sec)
+            if self._thread is not current_thread:
+                break
+            with self._lock:
+                self._has_updates.clear()
+                snapshot = self._take_snapshot(reset_updated=True)
+            for handler in self._handlers:
+                try:
+                    handler(snapshot)
+                except Exception as err:
+                    logging.exception(err)
@@ -1,5 +1,3 @@
-from prettytable import PrettyTable
-
 from tinkoff_invest.models.types import AccountType
 
 
@@ -16,6 +14,8 @@ class Account:
         return self._data["brokerAccountId"]
 
     def __str__(self) -> str:
+        from prettytable import PrettyTable
+
         table = PrettyTable(field_names=['ID', 'Type'])
         table.add_row([self.id, self.type.name])
         return str(table)
@@ -1,7 +1,4 @@
 import datetime
-import iso8601
-
-from prettytable import PrettyTable
 
 from tinkoff_invest.models.types import SubscriptionInterval
 
@@ -32,6 +29,8 @@ class Candle:
 
     @property
     def time(self) -> datetime.date:
+        import iso8601
+
         return iso8601.parse_date(self._data["time"])
 
     @property
@@ -43,6 +42,8 @@ class Candle:
         return self._data["figi"]
 
     def __str__(self) -> str:
+        from prettytable import PrettyTable
+
         table = PrettyTable(field_names=['Time', 'Interval', 'FIGI', 'Open', 'Close', 'High', 'Low', 'Volume'])
         table.add_row([self.time, self.interval.name, self.figi, self.open_price, self.close_price, self.highest_price,
                        self.lowest_price, self.volume])
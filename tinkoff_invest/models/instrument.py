@@ -1,6 +1,4 @@
-from prettytable import PrettyTable
-
-from tinkoff_invest.models.money import build_money_amount, MoneyAmount
+from tinkoff_invest.models.money import Money
 from tinkoff_invest.models.types import Currency, InstrumentType
 
 
@@ -33,8 +31,8 @@ class Instrument:
         return Currency(self._data["currency"])
 
     @property
-    def min_price_increment(self) -> MoneyAmount:
-        return build_money_amount(float(self._data["minPriceIncrement"]), Currency(self._data["currency"]))
+    def min_price_increment(self) -> Money:
+        return Money.from_float(self._data["minPriceIncrement"], Currency(self._data["currency"]))
 
     @property
     def lot_size(self) -> int:
@@ -45,6 +43,8 @@ class Instrument:
         return int(self._data["minQuantity"])
 
     def __str__(self) -> str:
+        from prettytable import PrettyTable
+
         table = PrettyTable(field_names=['Ticker', 'Name', 'Type', 'Min price increment', 'Lot size', 'Currency'])
         table.add_row([self.ticker, self.name, self.type.value, self.min_price_increment, self.lot_size,
                        self.currency.value])
@@ -1,7 +1,5 @@
 from typing import Optional
 
-from prettytable import PrettyTable
-
 from tinkoff_invest.models.types import TradingStatus
 
 
@@ -38,6 +36,8 @@ class InstrumentStatus:
         return self._data["figi"]
 
     def __str__(self) -> str:
+        from prettytable import PrettyTable
+
         table = PrettyTable(field_names=['FIGI', 'Status', 'Min price increment', 'Lot size', 'Limit Up', 'Limit Down'])
         table.add_row([self.figi, self.trading_status.name, self.min_price_increment, self.lot_size, self.limit_up,
                        self.limit_down])
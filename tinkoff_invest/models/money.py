@@ -1,37 +1,130 @@
-from typing import Optional
+import warnings
+from decimal import Decimal, ROUND_HALF_EVEN
+from typing import Dict, Iterable, List, Optional, Union
 
 from tinkoff_invest.models.types import Currency, CURRENCIES_SIGNS
 
+MONEY_SCALE = 10 ** 9
 
-class MoneyAmount:
-    def __init__(self, raw_data: Optional[dict] = None):
-        self._data = raw_data
+
+def _to_units(value: Union[float, str, Decimal, int]) -> int:
+    # Floats are converted by their shortest representation, which is the number received from the server,
+    # so large amounts keep every digit
+    number = Decimal(repr(value)) if isinstance(value, float) else Decimal(value)
+    return int((number * MONEY_SCALE).to_integral_value(ROUND_HALF_EVEN))
+
+
+class Money:
+    __slots__ = ("_units", "_currency")
+
+    # Amount without currency is a zero built from missing data, it takes the currency of the other operand
+    def __init__(self, units: int, currency: Optional[Currency] = Currency.RUB):
+        self._units: int = units
+        self._currency: Optional[Currency] = currency
+
+    @staticmethod
+    def from_float(value: Union[float, str, Decimal], currency: Optional[Currency] = Currency.RUB) -> 'Money':
+        return Money(_to_units(value), currency)
+
+    @property
+    def units(self) -> int:
+        return self._units
 
     @property
-    def currency(self) -> Currency:
-        return Currency(self._data["currency"]) if self._data else Currency.RUB
+    def currency(self) -> Optional[Currency]:
+        return self._currency
 
     @property
     def value(self) -> float:
-        return abs(float(self._data["value"])) if self._data else 0.0
-
-    def __add__(self, other):
-        if not self._data:
-            self._data = {"currency": other.currency, "value": other.value}
-        else:
-            assert(self._data["currency"] == self._data["currency"]), "Currencies should be the same"
-            self._data["value"] += other.value
-        return self
-
-    def __sub__(self, other):
-        assert self._data, "Decreasing number should not be empty"
-        assert(self._data["currency"] == self._data["currency"]), "Currencies should be the same"
-        self._data["value"] -= other.value
-        return self
+        return self._units / MONEY_SCALE
+
+    def __add__(self, other: 'Money') -> 'Money':
+        return Money(self._units + other._units, self._get_common_currency(other))
+
+    def __sub__(self, other: 'Money') -> 'Money':
+        return Money(self._units - other._units, self._get_common_currency(other))
+
+    def __mul__(self, factor: Union[int, float]) -> 'Money':
+        if isinstance(factor, int):
+            return Money(self._units * factor, self._currency)
+        return Money(int(round(self._units * factor)), self._currency)
+
+    __rmul__ = __mul__
+
+    def __neg__(self) -> 'Money':
+        return Money(-self._units, self._currency)
+
+    def __abs__(self) -> 'Money':
+        return Money(abs(self._units), self._currency)
+
+    def __bool__(self) -> bool:
+        return self._units != 0
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Money):
+            return NotImplemented
+        return self._units == other._units and self._currency == other._currency
+
+    def __lt__(self, other: 'Money') -> bool:
+        self._get_common_currency(other)
+        return self._units < other._units
+
+    def __le__(self, other: 'Money') -> bool:
+        self._get_common_currency(other)
+        return self._units <= other._units
+
+    def __hash__(self) -> int:
+        return hash((self._units, self._currency))
+
+    def __repr__(self) -> str:
+        return "Money({}, {})".format(self.value, self._currency.value if self._currency else None)
 
     def __str__(self) -> str:
-        return "{} {}".format(self.value, CURRENCIES_SIGNS[self.currency])
+        if self._currency is None:
+            return str(self.value)
+        return "{} {}".format(self.value, CURRENCIES_SIGNS[self._currency])
+
+    def _get_common_currency(self, other: 'Money') -> Optional[Currency]:
+        if self._currency is None:
+            return other._currency
+        if other._currency is None:
+            return self._currency
+        assert (self._currency == other._currency), "Currencies should be the same"
+        return self._currency
+
+
+def build_money(raw_data: Optional[dict], currency: Optional[Currency] = None) -> Money:
+    # Missing amounts are zeros in the currency of the model they belong to, if the model knows its currency
+    if not raw_data:
+        return Money(0, currency)
+    return Money.from_float(raw_data["value"], Currency(raw_data["currency"]))
+
+
+def sum_money(amounts: Iterable[Money]) -> Dict[Currency, Money]:
+    # Amounts are summed as integers, so the result does not depend on the order of amounts.
+    # Zeros without currency come from missing data and do not change any total
+    units: Dict[Currency, List[int]] = {}
+    for amount in amounts:
+        if amount.currency is not None:
+            units.setdefault(amount.currency, []).append(amount.units)
+    return {currency: Money(sum(values), currency) for currency, values in units.items()}
+
+
+def sum_values(values: Iterable[Union[float, str, Decimal]], currency: Currency = Currency.RUB) -> Money:
+    return Money(sum(_to_units(value) for value in values), currency)
+
+
+class MoneyAmount(Money):
+    # Deprecated float based amount, kept for the code written before Money. Like before, its value is absolute
+    # and a missing amount is a zero in roubles.
+    __slots__ = ()
+
+    def __init__(self, raw_data: Optional[dict] = None):
+        warnings.warn("MoneyAmount is deprecated, use build_money instead", DeprecationWarning, stacklevel=2)
+        amount = abs(build_money(raw_data, Currency.RUB))
+        super().__init__(amount.units, amount.currency)
 
 
-def build_money_amount(value: float, currency: Currency) -> MoneyAmount:
-    return MoneyAmount({"value": value, "currency": currency})
+def build_money_amount(value: float, currency: Currency) -> Money:
+    warnings.warn("build_money_amount is deprecated, use Money.from_float instead", DeprecationWarning, stacklevel=2)
+    return abs(Money.from_float(value, currency))
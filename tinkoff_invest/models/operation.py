@@ -1,13 +1,33 @@
 import datetime
-from typing import Optional
-from iso8601 import iso8601
+from typing import List, Optional
 
-from prettytable import PrettyTable
-
-from tinkoff_invest.models.money import MoneyAmount, build_money_amount
+from tinkoff_invest.models.money import Money, build_money
 from tinkoff_invest.models.types import OperationType, OperationStatus, Currency, InstrumentType
 
 
+class OperationTrade:
+    def __init__(self, raw_data: dict):
+        self._data = raw_data
+
+    @property
+    def id(self) -> str:
+        return self._data["tradeId"]
+
+    @property
+    def date(self) -> datetime.datetime:
+        import iso8601
+
+        return iso8601.parse_date(self._data["date"])
+
+    @property
+    def price(self) -> float:
+        return float(self._data["price"])
+
+    @property
+    def quantity(self) -> int:
+        return int(self._data["quantity"])
+
+
 class Operation:
     def __init__(self, raw_data: dict):
         self._data = raw_data
@@ -37,13 +57,12 @@ class Operation:
         return Currency(self._data["currency"])
 
     @property
-    def payment(self) -> MoneyAmount:
-        return build_money_amount(abs(float(self._data["payment"])), Currency(self._data["currency"]))
+    def payment(self) -> Money:
+        return abs(Money.from_float(self._data["payment"], Currency(self._data["currency"])))
 
     @property
-    def price(self) -> MoneyAmount:
-        return build_money_amount(float(self._data["price"]) if "price" in self._data else 0.0,
-                                  Currency(self._data["currency"]))
+    def price(self) -> Money:
+        return Money.from_float(self._data.get("price", 0.0), Currency(self._data["currency"]))
 
     @property
     def quantity(self) -> Optional[int]:
@@ -51,19 +70,25 @@ class Operation:
 
     @property
     def date(self) -> datetime.date:
+        import iso8601
+
         return iso8601.parse_date(self._data["date"])
 
+    @property
+    def trades(self) -> List[OperationTrade]:
+        return [OperationTrade(raw) for raw in self._data.get("trades") or []]
+
     @property
     def is_margin(self) -> Optional[bool]:
         return bool(self._data["isMarginCall"]) if "isMarginCall" in self._data else None
 
     @property
-    def commission(self) -> MoneyAmount:
-        if "commission" not in self._data:
-            return MoneyAmount()
-        return MoneyAmount(self._data["commission"])
+    def commission(self) -> Money:
+        return abs(build_money(self._data.get("commission"), self.currency))
 
     def __str__(self) -> str:
+        from prettytable import PrettyTable
+
         table = PrettyTable(field_names=['Date', 'Operation', 'Instrument', 'Figi', 'Payment', 'Price', 'Commission'])
         table.add_row([str(self.date), self.operation.name, self.instrument_type.name if self.instrument_type else "",
                        self.figi, self.payment, self.price if self.price else "", self.commission])
@@ -1,11 +1,37 @@
 from typing import Optional
 
-from prettytable import PrettyTable
-
-from tinkoff_invest.models.money import MoneyAmount
+from tinkoff_invest.models.money import Money, build_money
 from tinkoff_invest.models.types import OrderType, OperationType, OrderStatus
 
 
+class OrderRequest:
+    def __init__(self, operation: OperationType, figi: str, lots: int, price: Optional[float] = None):
+        self._operation = operation
+        self._figi = figi
+        self._lots = lots
+        self._price = price
+
+    @property
+    def operation(self) -> OperationType:
+        return self._operation
+
+    @property
+    def figi(self) -> str:
+        return self._figi
+
+    @property
+    def lots(self) -> int:
+        return self._lots
+
+    @property
+    def price(self) -> Optional[float]:
+        return self._price
+
+    @property
+    def type(self) -> OrderType:
+        return OrderType.MARKET if self._price is None else OrderType.LIMIT
+
+
 class Order:
     def __init__(self, raw_data: dict):
         self._data = raw_data
@@ -50,14 +76,44 @@ class Order:
             return None
 
     @property
-    def commission(self) -> MoneyAmount:
-        if "commission" not in self._data:
-            return MoneyAmount()
-        return MoneyAmount(self._data["commission"])
+    def commission(self) -> Money:
+        return abs(build_money(self._data.get("commission")))
 
     def __str__(self) -> str:
+        from prettytable import PrettyTable
+
         table = PrettyTable(field_names=['Operation', 'Figi', 'Status', 'Requested Lots', 'Executed Lots',
                                          'Commission', 'Reason'])
         table.add_row([self.operation.name, self.figi, self.status.name, self.requested_lots, self.executed_lots,
-                       "{} {}".format(self.commission.value, self.commission.currency.name), self.reject_reason])
+                       self._format_commission(), self.reject_reason])
         return str(table)
+
+    def _format_commission(self) -> str:
+        # Order has no currency of its own, so commission is shown without currency until the broker reports it
+        commission = self.commission
+        if commission.currency is None:
+            return str(commission.value)
+        return "{} {}".format(commission.value, commission.currency.name)
+
+
+class OrderResult:
+    def __init__(self, request: OrderRequest, order: Optional[Order] = None, error: Optional[Exception] = None):
+        self._request = request
+        self._order = order
+        self._error = error
+
+    @property
+    def request(self) -> OrderRequest:
+        return self._request
+
+    @property
+    def order(self) -> Optional[Order]:
+        return self._order
+
+    @property
+    def error(self) -> Optional[Exception]:
+        return self._error
+
+    @property
+    def is_successful(self) -> bool:
+        return self._error is None
@@ -1,7 +1,5 @@
 from typing import List
 
-from prettytable import PrettyTable
-
 from tinkoff_invest.models.types import TradingStatus
 
 
@@ -50,6 +48,8 @@ class OrderBook:
         return self._data["limitDown"] if "limitDown" in self._data else 0.0
 
     def __str__(self) -> str:
+        from prettytable import PrettyTable
+
         table = PrettyTable(field_names=['FIGI', 'Asks', 'Bids', 'Last price', 'Close price'])
         table.add_row([self.figi, self.asks, self.bids, self.last_price, self.close_price])
         return str(table)
@@ -1,9 +1,7 @@
 import logging
-from typing import List, Optional
+from typing import Dict, List, Optional
 
-from prettytable import PrettyTable
-
-from tinkoff_invest.models.money import MoneyAmount, build_money_amount
+from tinkoff_invest.models.money import Money, build_money
 from tinkoff_invest.models.types import InstrumentType, Currency
 
 
@@ -16,14 +14,16 @@ class CurrencyPortfolio:
         return Currency(self._data["currency"])
 
     @property
-    def balance(self) -> MoneyAmount:
-        return build_money_amount(float(self._data["balance"]), Currency(self._data["currency"]))
+    def balance(self) -> Money:
+        return Money.from_float(self._data["balance"], Currency(self._data["currency"]))
 
     @property
     def blocked(self) -> float:
         return float(self._data.get("blocked", 0.0))
 
     def __str__(self) -> str:
+        from prettytable import PrettyTable
+
         table = PrettyTable(field_names=['Name', 'Balance', 'Blocked'])
         table.add_row([self.name.name, self.balance, self.blocked])
         return str(table)
@@ -66,23 +66,31 @@ class PositionPortfolio:
         return float(self._data["blocked"])
 
     @property
-    def expected_yield(self) -> MoneyAmount:
-        return MoneyAmount(self._data["expectedYield"] if "expectedYield" in self._data else None)
+    def expected_yield(self) -> Money:
+        return build_money(self._data.get("expectedYield"), self._get_currency())
 
     @property
-    def average_price(self) -> MoneyAmount:
-        return MoneyAmount(self._data["averagePositionPrice"] if "averagePositionPrice" in self._data else None)
+    def average_price(self) -> Money:
+        return build_money(self._data.get("averagePositionPrice"), self._get_currency())
 
     @property
-    def average_price_no_nkd(self) -> MoneyAmount:
-        return MoneyAmount(self._data["averagePositionPriceNoNkd"]
-                           if "averagePositionPriceNoNkd" in self._data else None)
+    def average_price_no_nkd(self) -> Money:
+        return build_money(self._data.get("averagePositionPriceNoNkd"), self._get_currency())
 
     def __str__(self) -> str:
+        from prettytable import PrettyTable
+
         table = PrettyTable(field_names=['Ticker', 'Name', 'Type', 'Balance', 'Lots', 'Avg price'])
         table.add_row([self.ticker, self.name, self.type.value, int(self.balance), self.lots, self.average_price])
         return str(table)
 
+    def _get_currency(self) -> Optional[Currency]:
+        # Position has no currency field, all its amounts are in the currency of any of them
+        for key in ("averagePositionPrice", "expectedYield", "averagePositionPriceNoNkd"):
+            if self._data.get(key):
+                return Currency(self._data[key]["currency"])
+        return None
+
 
 class Portfolio:
     def __init__(self, positions: dict, currencies: dict):
@@ -91,6 +99,8 @@ class Portfolio:
         self._positions: List[PositionPortfolio] = sorted(self._positions, key=lambda item: item.type.value)
         self._currencies: List[CurrencyPortfolio] =\
             [CurrencyPortfolio(raw) for raw in currencies["payload"]["currencies"]]
+        self._positions_by_figi: Dict[str, PositionPortfolio] = {pos.figi: pos for pos in self._positions}
+        self._positions_by_ticker: Dict[str, PositionPortfolio] = {pos.ticker: pos for pos in self._positions}
 
     @property
     def positions(self) -> List[PositionPortfolio]:
@@ -101,20 +111,20 @@ class Portfolio:
         return self._currencies
 
     def get_position_by_figi(self, figi: str) -> Optional[PositionPortfolio]:
-        for position in self.positions:
-            if position.figi == figi:
-                return position
-        logging.warning("Position with figi == %s not found", figi)
-        return None
+        position = self._positions_by_figi.get(figi)
+        if not position:
+            logging.warning("Position with figi == %s not found", figi)
+        return position
 
     def get_position_by_ticker(self, ticker: str) -> Optional[PositionPortfolio]:
-        for position in self.positions:
-            if position.ticker == ticker:
-                return position
-        logging.warning("Position with ticker == %s not found", ticker)
-        return None
+        position = self._positions_by_ticker.get(ticker)
+        if not position:
+            logging.warning("Position with ticker == %s not found", ticker)
+        return position
 
     def __str__(self) -> str:
+        from prettytable import PrettyTable
+
         table = PrettyTable(field_names=['Currency', 'Type', 'Sum'])
         for item in self._currencies:
             table.add_row([item.name.value, "Currency", item.balance])
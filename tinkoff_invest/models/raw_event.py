@@ -0,0 +1,95 @@
+import re
+from typing import Optional, Union
+
+import ujson
+
+from tinkoff_invest.models.candle import Candle
+from tinkoff_invest.models.instrument_status import InstrumentStatus
+from tinkoff_invest.models.order_book import OrderBook
+from tinkoff_invest.models.types import SubscriptionEventType
+
+# Keys are matched with any whitespace around the colon, so frames are routed whatever their formatting is
+_EVENT_KEY = re.compile(rb'"event"\s*:\s*"([^"\\]*)"')
+_FIGI_KEY = re.compile(rb'"figi"\s*:\s*"([^"\\]*)"')
+_INTERVAL_KEY = re.compile(rb'"interval"\s*:\s*"([^"\\]*)"')
+_DEPTH_KEY = re.compile(rb'"depth"\s*:\s*"?([0-9]+)')
+_MODELS = {
+    SubscriptionEventType.CANDLE: Candle,
+    SubscriptionEventType.ORDER_BOOK: OrderBook,
+    SubscriptionEventType.INSTRUMENT: InstrumentStatus
+}
+
+
+def _find_value(frame: bytes, key: 're.Pattern[bytes]') -> Optional[str]:
+    match = key.search(frame)
+    return match.group(1).decode() if match else None
+
+
+class RawEvent:
+    __slots__ = ("_frame", "_event", "_figi", "_parameter", "_object")
+
+    def __init__(self, frame: Union[str, bytes]):
+        self._frame: bytes = frame.encode() if isinstance(frame, str) else frame
+        self._object: Optional[dict] = None
+        # Routing fields are found by a search in the frame, the payload is parsed on demand only
+        self._event: Optional[SubscriptionEventType] = None
+        self._figi: Optional[str] = None
+        self._parameter: Optional[str] = None
+        self._set_routing(_find_value(self._frame, _EVENT_KEY), _find_value(self._frame, _FIGI_KEY),
+                          _find_value(self._frame, _INTERVAL_KEY), _find_value(self._frame, _DEPTH_KEY))
+        if not self.is_routable:
+            # Escaped or unusual frames are parsed, so the search never loses an event
+            try:
+                obj = ujson.loads(self._frame)
+                payload = obj["payload"]
+                depth = payload.get("depth")
+                self._set_routing(obj.get("event"), payload.get("figi"), payload.get("interval"),
+                                  str(depth) if depth is not None else None)
+                self._object = obj
+            except (ValueError, KeyError, TypeError, AttributeError):
+                pass
+
+    def _set_routing(self, event: Optional[str], figi: Optional[str], interval: Optional[str],
+                     depth: Optional[str]) -> None:
+        self._event = SubscriptionEventType(event) if event in SubscriptionEventType._value2member_map_ else None
+        self._figi = figi
+        if self._event == SubscriptionEventType.CANDLE:
+            self._parameter = interval
+        elif self._event == SubscriptionEventType.ORDER_BOOK:
+            self._parameter = depth
+        else:
+            self._parameter = ""
+
+    @property
+    def frame(self) -> bytes:
+        return self._frame
+
+    @property
+    def view(self) -> memoryview:
+        return memoryview(self._frame)
+
+    @property
+    def event(self) -> Optional[SubscriptionEventType]:
+        return self._event
+
+    @property
+    def figi(self) -> Optional[str]:
+        return self._figi
+
+    @property
+    def parameter(self) -> Optional[str]:
+        return self._parameter
+
+    @property
+    def is_routable(self) -> bool:
+        return self._event is not None and self._figi is not None and self._parameter is not None
+
+    @property
+    def payload(self) -> dict:
+        if self._object is None:
+            self._object = ujson.loads(self._frame)
+        return self._object["payload"]
+
+    def to_model(self) -> Union[Candle, OrderBook, InstrumentStatus]:
+        assert (self._event is not None), "An unsupported event type"
+        return _MODELS[self._event](self.payload)
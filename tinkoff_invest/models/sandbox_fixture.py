@@ -0,0 +1,36 @@
+from typing import Dict, Optional
+
+from tinkoff_invest.models.types import Currency
+
+
+class SandboxFixture:
+    def __init__(self, raw_data: dict):
+        self._data = raw_data
+
+    @staticmethod
+    def build(currencies: Optional[Dict[Currency, float]] = None,
+              positions: Optional[Dict[str, int]] = None) -> 'SandboxFixture':
+        return SandboxFixture({"currencies": {currency.value: balance for currency, balance in
+                                              (currencies or {}).items()},
+                               "positions": dict(positions or {})})
+
+    @property
+    def currencies(self) -> Dict[Currency, float]:
+        return {Currency(name): float(balance) for name, balance in self._data.get("currencies", {}).items()}
+
+    @property
+    def positions(self) -> Dict[str, int]:
+        return {figi: int(balance) for figi, balance in self._data.get("positions", {}).items()}
+
+    def __len__(self) -> int:
+        return len(self._data.get("currencies", {})) + len(self._data.get("positions", {}))
+
+    def __str__(self) -> str:
+        from prettytable import PrettyTable
+
+        table = PrettyTable(field_names=['Currency / FIGI', 'Balance'])
+        for currency, balance in self.currencies.items():
+            table.add_row([currency.value, balance])
+        for figi, balance in self.positions.items():
+            table.add_row([figi, balance])
+        return str(table)
@@ -0,0 +1,63 @@
+import datetime
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, TypeVar
+
+from tinkoff_invest.base_session import Session
+from tinkoff_invest.config import HTTP_CONNECTIONS_POOL_SIZE
+from tinkoff_invest.models.account import Account
+from tinkoff_invest.models.operation import Operation
+from tinkoff_invest.models.order import Order
+from tinkoff_invest.models.portfolio import Portfolio, CurrencyPortfolio, PositionPortfolio
+from tinkoff_invest.models.types import AccountType
+
+T = TypeVar('T')
+
+
+class MultiAccountSession:
+    def __init__(self, session: Session, account_ids: Optional[List[str]] = None,
+                 workers_count: int = HTTP_CONNECTIONS_POOL_SIZE):
+        self._session: Session = session
+        self._accounts: List[Account] = session.accounts
+        self._account_ids: List[str] = account_ids if account_ids else [acc.id for acc in self._accounts]
+        self._pool: ThreadPoolExecutor = ThreadPoolExecutor(max_workers=workers_count,
+                                                            thread_name_prefix="tinkoff_invest_accounts")
+
+    @property
+    def session(self) -> Session:
+        return self._session
+
+    @property
+    def account_ids(self) -> List[str]:
+        return list(self._account_ids)
+
+    def get_account_id(self, account_type: AccountType) -> Optional[str]:
+        for account in self._accounts:
+            if account.type == account_type and account.id in self._account_ids:
+                return account.id
+        return None
+
+    def get_portfolios(self) -> Dict[str, Portfolio]:
+        return self._map(self._session.get_portfolio)
+
+    def get_portfolio_positions(self) -> Dict[str, List[PositionPortfolio]]:
+        return self._map(self._session.get_portfolio_positions)
+
+    def get_portfolio_currencies(self) -> Dict[str, List[CurrencyPortfolio]]:
+        return self._map(self._session.get_portfolio_currencies)
+
+    def get_orders(self) -> Dict[str, List[Order]]:
+        return self._map(self._session.get_orders)
+
+    def get_operations(self, start_time: datetime, finish_time: datetime,
+                       figi: str = "") -> Dict[str, List[Operation]]:
+        return self._map(lambda account_id: self._session.get_operations(start_time, finish_time, figi, account_id))
+
+    def close(self) -> None:
+        self._pool.shutdown()
+
+    def _map(self, method: Callable[[str], T]) -> Dict[str, T]:
+        futures = self._submit(method)
+        return {account_id: future.result() for account_id, future in futures.items()}
+
+    def _submit(self, method: Callable[[str], T]) -> dict:
+        return {account_id: self._pool.submit(method, account_id) for account_id in self._account_ids}
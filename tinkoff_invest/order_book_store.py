@@ -0,0 +1,366 @@
+import datetime
+import logging
+import mmap
+import os
+import queue
+import struct
+import threading
+import time
+import zlib
+from typing import Dict, Iterator, List, Optional, Tuple, TYPE_CHECKING
+
+import numpy as np
+
+from tinkoff_invest.base_strategy import BaseStrategy
+from tinkoff_invest.config import ORDER_BOOK_CHUNK_SIZE, ORDER_BOOK_COMPRESSION_LEVEL, ORDER_BOOK_FLUSH_INTERVAL_SEC
+from tinkoff_invest.models.order_book import OrderBook
+from tinkoff_invest.models.types import TradingStatus
+
+if TYPE_CHECKING:
+    from tinkoff_invest.subscriptions import SubscriptionManager
+
+MAX_DEPTH = 20
+_MAGIC = b"OBK1"
+# Chunk is a header with the rows count, depth, time range and compressed size followed by the compressed columns
+_CHUNK_HEADER = struct.Struct("<4sIHqqI")
+_FILE_NAME_FORMAT = "%Y%m%d.obk"
+_TRADING_STATUSES = list(TradingStatus)
+_TRADING_STATUS_CODES = {status.value: code for code, status in enumerate(_TRADING_STATUSES)}
+_UNKNOWN_STATUS = -1
+_NANOSECONDS = 10 ** 9
+
+
+def _shuffle(values: np.ndarray) -> bytes:
+    # Bytes of the same significance are stored together, so zlib finds repeated exponents and high bytes of prices
+    return values.view(np.uint8).reshape(-1, values.itemsize).T.tobytes()
+
+
+def _unshuffle(data: bytes, dtype: np.dtype, count: int) -> np.ndarray:
+    return np.frombuffer(data, dtype=np.uint8).reshape(dtype.itemsize, count).T.copy().view(dtype).reshape(-1)
+
+
+def _to_nanoseconds(value: datetime.datetime) -> int:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=datetime.timezone.utc)
+    return int(value.timestamp() * _NANOSECONDS)
+
+
+def _get_day(timestamp_ns: int) -> datetime.date:
+    return datetime.datetime.fromtimestamp(timestamp_ns / _NANOSECONDS, datetime.timezone.utc).date()
+
+
+class OrderBookColumns:
+    def __init__(self, figi: str, timestamps: np.ndarray, depth: np.ndarray, bids: np.ndarray, asks: np.ndarray,
+                 last_price: np.ndarray, close_price: np.ndarray, trading_status: np.ndarray):
+        self._figi: str = figi
+        self.timestamps: np.ndarray = timestamps
+        self.depth: np.ndarray = depth
+        # Price levels are kept as [row, level, (price, quantity)], missing levels are NaN
+        self.bids: np.ndarray = bids
+        self.asks: np.ndarray = asks
+        self.last_price: np.ndarray = last_price
+        self.close_price: np.ndarray = close_price
+        self.trading_status: np.ndarray = trading_status
+
+    @staticmethod
+    def allocate(figi: str, rows: int) -> 'OrderBookColumns':
+        return OrderBookColumns(figi, np.zeros(rows, dtype=np.int64), np.zeros(rows, dtype=np.int16),
+                                np.full((rows, MAX_DEPTH, 2), np.nan), np.full((rows, MAX_DEPTH, 2), np.nan),
+                                np.full(rows, np.nan), np.full(rows, np.nan),
+                                np.full(rows, _UNKNOWN_STATUS, dtype=np.int8))
+
+    @staticmethod
+    def concatenate(figi: str, parts: List['OrderBookColumns']) -> 'OrderBookColumns':
+        if not parts:
+            return OrderBookColumns.allocate(figi, 0)
+        return OrderBookColumns(figi, *[np.concatenate([getattr(part, name) for part in parts]) for name in
+                                        ("timestamps", "depth", "bids", "asks", "last_price", "close_price",
+                                         "trading_status")])
+
+    @property
+    def figi(self) -> str:
+        return self._figi
+
+    @property
+    def times(self) -> np.ndarray:
+        return self.timestamps.astype("datetime64[ns]")
+
+    def slice(self, start: int, stop: int) -> 'OrderBookColumns':
+        return OrderBookColumns(self._figi, self.timestamps[start:stop], self.depth[start:stop],
+                                self.bids[start:stop], self.asks[start:stop], self.last_price[start:stop],
+                                self.close_price[start:stop], self.trading_status[start:stop])
+
+    def get_order_book(self, row: int) -> OrderBook:
+        depth = int(self.depth[row])
+        data = {"figi": self._figi, "depth": depth,
+                "bids": [level for level in self.bids[row, :depth].tolist() if level[0] == level[0]],
+                "asks": [level for level in self.asks[row, :depth].tolist() if level[0] == level[0]]}
+        if not np.isnan(self.last_price[row]):
+            data["lastPrice"] = float(self.last_price[row])
+        if not np.isnan(self.close_price[row]):
+            data["closePrice"] = float(self.close_price[row])
+        if self.trading_status[row] != _UNKNOWN_STATUS:
+            data["tradeStatus"] = _TRADING_STATUSES[self.trading_status[row]].value
+        return OrderBook(data)
+
+    def encode(self, rows: int, compression_level: int) -> bytes:
+        timestamps = self.timestamps[:rows]
+        # Timestamps grow slowly, so differences are stored instead of absolute values
+        deltas = np.diff(timestamps, prepend=timestamps[:1])
+        deltas[0] = timestamps[0]
+        depth = int(self.depth[:rows].max())
+        columns = [_shuffle(deltas), _shuffle(self.depth[:rows]),
+                   _shuffle(np.ascontiguousarray(self.bids[:rows, :depth])),
+                   _shuffle(np.ascontiguousarray(self.asks[:rows, :depth])),
+                   _shuffle(self.last_price[:rows]), _shuffle(self.close_price[:rows]),
+                   self.trading_status[:rows].tobytes()]
+        body = zlib.compress(b"".join(columns), compression_level)
+        return _CHUNK_HEADER.pack(_MAGIC, rows, depth, int(timestamps[0]), int(timestamps[-1]), len(body)) + body
+
+    @staticmethod
+    def decode(figi: str, header: Tuple[int, int], body: bytes) -> 'OrderBookColumns':
+        rows, depth = header
+        data = zlib.decompress(body)
+        offset = 0
+
+        def take(dtype: np.dtype, count: int, shuffled: bool = True) -> np.ndarray:
+            nonlocal offset
+            size = count * np.dtype(dtype).itemsize
+            chunk = data[offset:offset + size]
+            offset += size
+            return _unshuffle(chunk, np.dtype(dtype), count) if shuffled else np.frombuffer(chunk, dtype=dtype).copy()
+
+        timestamps = np.cumsum(take(np.int64, rows))
+        depths = take(np.int16, rows)
+        bids = np.full((rows, MAX_DEPTH, 2), np.nan)
+        asks = np.full((rows, MAX_DEPTH, 2), np.nan)
+        bids[:, :depth] = take(np.float64, rows * depth * 2).reshape(rows, depth, 2)
+        asks[:, :depth] = take(np.float64, rows * depth * 2).reshape(rows, depth, 2)
+        return OrderBookColumns(figi, timestamps, depths, bids, asks, take(np.float64, rows),
+                                take(np.float64, rows), take(np.int8, rows, shuffled=False))
+
+
+class OrderBookStore(BaseStrategy):
+    def __init__(self, directory: str, chunk_size: int = ORDER_BOOK_CHUNK_SIZE,
+                 compression_level: int = ORDER_BOOK_COMPRESSION_LEVEL,
+                 flush_interval_sec: float = ORDER_BOOK_FLUSH_INTERVAL_SEC,
+                 manager: Optional['SubscriptionManager'] = None):
+        assert (chunk_size > 0), "Chunk size should be > 0"
+        assert (flush_interval_sec > 0), "Flush interval should be > 0"
+        os.makedirs(directory, exist_ok=True)
+        self._directory: str = directory
+        self._chunk_size: int = chunk_size
+        self._compression_level: int = compression_level
+        self._flush_interval_sec: float = flush_interval_sec
+        self._manager: Optional['SubscriptionManager'] = manager
+        self._lock: threading.Lock = threading.Lock()
+        # Every buffer keeps its day, columns, rows count and the time its first row was added
+        self._buffers: Dict[str, Tuple[datetime.date, OrderBookColumns, int, float]] = {}
+        self._records_count: int = 0
+        self._is_closed: bool = False
+        # Chunks are compressed and written by a separate thread, so callbacks of market data listeners only copy
+        # order books to the columns
+        self._chunks: queue.Queue = queue.Queue()
+        self._writer: threading.Thread = threading.Thread(target=self._write_chunks, daemon=True,
+                                                          name="tinkoff_invest_order_book_store")
+        self._writer.start()
+
+    @property
+    def directory(self) -> str:
+        return self._directory
+
+    @property
+    def records_count(self) -> int:
+        return self._records_count
+
+    def on_order_book(self, order_book: OrderBook) -> None:
+        self.append(order_book)
+
+    def append(self, order_book: OrderBook, timestamp_ns: Optional[int] = None) -> None:
+        # Streaming order books have no time, so they are stored with the receive time
+        timestamp_ns = time.time_ns() if timestamp_ns is None else timestamp_ns
+        data = order_book._data
+        figi = data["figi"]
+        day = _get_day(timestamp_ns)
+        bids, asks = data["bids"][:MAX_DEPTH], data["asks"][:MAX_DEPTH]
+        with self._lock:
+            if self._is_closed:
+                return
+            buffer = self._buffers.get(figi)
+            if buffer is not None and (buffer[0] != day or buffer[2] == self._chunk_size):
+                self._chunks.put((figi,) + buffer[:3])
+                buffer = None
+            if buffer is None:
+                buffer = (day, OrderBookColumns.allocate(figi, self._chunk_size), 0, time.monotonic())
+            _, columns, row, started = buffer
+            columns.timestamps[row] = timestamp_ns
+            columns.depth[row] = max(len(bids), len(asks), min(int(data.get("depth", 0)), MAX_DEPTH))
+            if bids:
+                columns.bids[row, :len(bids)] = [level[:2] for level in bids]
+            if asks:
+                columns.asks[row, :len(asks)] = [level[:2] for level in asks]
+            columns.last_price[row] = data.get("lastPrice", np.nan)
+            columns.close_price[row] = data.get("closePrice", np.nan)
+            columns.trading_status[row] = _TRADING_STATUS_CODES.get(data.get("tradeStatus"), _UNKNOWN_STATUS)
+            self._buffers[figi] = (day, columns, row + 1, started)
+            self._records_count += 1
+
+    def flush(self) -> None:
+        self._hand_over_buffers(None)
+        self._chunks.join()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._is_closed:
+                return
+            self._is_closed = True
+        if self._manager is not None:
+            self._manager.remove_market_data_listener(self)
+        self.flush()
+        self._chunks.put(None)
+        self._writer.join()
+        logging.info("%d order books have been stored to %s", self._records_count, self._directory)
+
+    def _hand_over_buffers(self, started_before: Optional[float]) -> None:
+        with self._lock:
+            for figi, buffer in list(self._buffers.items()):
+                if started_before is None or buffer[3] <= started_before:
+                    self._chunks.put((figi,) + buffer[:3])
+                    del self._buffers[figi]
+
+    def _write_chunks(self) -> None:
+        # Partial chunks are written once their first row is older than the flush interval,
+        # so a crash loses order books of the last interval only
+        while True:
+            try:
+                chunk = self._chunks.get(timeout=self._flush_interval_sec)
+            except queue.Empty:
+                self._hand_over_buffers(time.monotonic() - self._flush_interval_sec)
+                continue
+            if chunk is None:
+                self._chunks.task_done()
+                return
+            try:
+                self._write_chunk(*chunk)
+            except Exception as err:
+                logging.error("Unable to store order books of %s: %s", chunk[0], err)
+            finally:
+                self._chunks.task_done()
+            self._hand_over_buffers(time.monotonic() - self._flush_interval_sec)
+
+    def _write_chunk(self, figi: str, day: datetime.date, columns: OrderBookColumns, rows: int) -> None:
+        if not rows:
+            return
+        directory = os.path.join(self._directory, figi)
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, day.strftime(_FILE_NAME_FORMAT)), "ab") as file:
+            file.write(columns.encode(rows, self._compression_level))
+
+
+class _ChunkFile:
+    def __init__(self, path: str):
+        self._path: str = path
+        self._size: int = 0
+        self._data: Optional[mmap.mmap] = None
+        # Every chunk is described by its first and last timestamps, offset of the body and its header values
+        self._chunks: List[Tuple[int, int, int, int, int, int]] = []
+
+    @property
+    def chunks(self) -> List[Tuple[int, int, int, int, int, int]]:
+        self._refresh()
+        return self._chunks
+
+    def read(self, figi: str, index: int) -> OrderBookColumns:
+        first_time, last_time, offset, size, rows, depth = self._chunks[index]
+        return OrderBookColumns.decode(figi, (rows, depth), self._data[offset:offset + size])
+
+    def _refresh(self) -> None:
+        # Writer appends complete chunks only, so the index is extended with chunks added since the last query
+        size = os.path.getsize(self._path)
+        if size == self._size:
+            return
+        if self._data is not None:
+            self._data.close()
+        with open(self._path, "rb") as file:
+            self._data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        offset = self._chunks[-1][2] + self._chunks[-1][3] if self._chunks else 0
+        while offset + _CHUNK_HEADER.size <= size:
+            magic, rows, depth, first_time, last_time, body_size = _CHUNK_HEADER.unpack_from(self._data, offset)
+            if magic != _MAGIC:
+                logging.warning("Corrupted order book chunk in %s at %d", self._path, offset)
+                break
+            if offset + _CHUNK_HEADER.size + body_size > size:
+                break
+            self._chunks.append((first_time, last_time, offset + _CHUNK_HEADER.size, body_size, rows, depth))
+            offset += _CHUNK_HEADER.size + body_size
+        self._size = size
+
+    def close(self) -> None:
+        if self._data is not None:
+            self._data.close()
+            self._data = None
+
+
+class OrderBookHistory:
+    def __init__(self, directory: str):
+        self._directory: str = directory
+        self._files: Dict[str, _ChunkFile] = {}
+
+    def get_days(self, figi: str) -> List[datetime.date]:
+        directory = os.path.join(self._directory, figi)
+        if not os.path.isdir(directory):
+            return []
+        days = []
+        for name in os.listdir(directory):
+            try:
+                days.append(datetime.datetime.strptime(name, _FILE_NAME_FORMAT).date())
+            except ValueError:
+                continue
+        return sorted(days)
+
+    def as_of(self, figi: str, moment: datetime.datetime) -> Optional[OrderBook]:
+        moment_ns = _to_nanoseconds(moment)
+        for day in reversed([day for day in self.get_days(figi) if day <= _get_day(moment_ns)]):
+            file = self._get_file(figi, day)
+            chunks = file.chunks
+            # Chunks of a file are ordered by time, so the last one started before the moment holds the answer
+            first_times = [chunk[0] for chunk in chunks]
+            index = int(np.searchsorted(first_times, moment_ns, side="right")) - 1
+            if index < 0:
+                continue
+            columns = file.read(figi, index)
+            row = int(np.searchsorted(columns.timestamps, moment_ns, side="right")) - 1
+            return columns.get_order_book(row)
+        return None
+
+    def range(self, figi: str, start: datetime.datetime, finish: datetime.datetime) -> OrderBookColumns:
+        return OrderBookColumns.concatenate(figi, list(self.iter_chunks(figi, start, finish)))
+
+    def iter_chunks(self, figi: str, start: datetime.datetime,
+                    finish: datetime.datetime) -> Iterator[OrderBookColumns]:
+        start_ns, finish_ns = _to_nanoseconds(start), _to_nanoseconds(finish)
+        for day in self.get_days(figi):
+            if not _get_day(start_ns) <= day <= _get_day(finish_ns):
+                continue
+            file = self._get_file(figi, day)
+            for index, (first_time, last_time, *_) in enumerate(file.chunks):
+                # Chunks outside of the range are skipped without being decompressed
+                if last_time < start_ns or first_time > finish_ns:
+                    continue
+                columns = file.read(figi, index)
+                rows = np.searchsorted(columns.timestamps, [start_ns, finish_ns], side="left")
+                rows[1] = np.searchsorted(columns.timestamps, finish_ns, side="right")
+                yield columns.slice(int(rows[0]), int(rows[1]))
+
+    def close(self) -> None:
+        for file in self._files.values():
+            file.close()
+        self._files = {}
+
+    def _get_file(self, figi: str, day: datetime.date) -> _ChunkFile:
+        path = os.path.join(self._directory, figi, day.strftime(_FILE_NAME_FORMAT))
+        file = self._files.get(path)
+        if file is None:
+            file = _ChunkFile(path)
+            self._files[path] = file
+        return file
@@ -0,0 +1,332 @@
+import datetime
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from tinkoff_invest.base_session import Session, OrderNotification
+from tinkoff_invest.base_strategy import BaseStrategy
+from tinkoff_invest.config import PORTFOLIO_RESYNC_INTERVAL_SEC
+from tinkoff_invest.models.candle import Candle
+from tinkoff_invest.models.operation import Operation, OperationTrade
+from tinkoff_invest.models.order import Order
+from tinkoff_invest.models.order_book import OrderBook
+from tinkoff_invest.models.portfolio import Portfolio, PositionPortfolio
+from tinkoff_invest.models.types import Currency, InstrumentType, OperationType, SubscriptionInterval
+
+_MOSCOW_TIMEZONE = datetime.timezone(datetime.timedelta(hours=3))
+_ORDER_OPERATIONS_WINDOW = datetime.timedelta(days=1)
+_TRADE_SIGNS = {OperationType.BUY: 1, OperationType.BUY_CARD: 1, OperationType.SELL: -1}
+
+# Instrument details needed to open a position: ticker, name, type, currency and lot size
+InstrumentDetails = Tuple[str, str, InstrumentType, Currency, int]
+
+
+class TrackedPosition:
+    def __init__(self, figi: str, ticker: str, name: str, instrument_type: InstrumentType, currency: Currency,
+                 balance: float, lots: int, lot_size: int, blocked: float, average_price: float):
+        self._figi: str = figi
+        self._ticker: str = ticker
+        self._name: str = name
+        self._type: InstrumentType = instrument_type
+        self._currency: Currency = currency
+        self.balance: float = balance
+        self.lots: int = lots
+        self.blocked: float = blocked
+        self.average_price: float = average_price
+        self.last_price: Optional[float] = None
+        self._lot_size: int = lot_size
+
+    @property
+    def figi(self) -> str:
+        return self._figi
+
+    @property
+    def ticker(self) -> str:
+        return self._ticker
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def type(self) -> InstrumentType:
+        return self._type
+
+    @property
+    def currency(self) -> Currency:
+        return self._currency
+
+    @property
+    def lot_size(self) -> int:
+        return self._lot_size
+
+    @property
+    def market_value(self) -> float:
+        return self.balance * (self.last_price if self.last_price is not None else self.average_price)
+
+    @property
+    def expected_yield(self) -> float:
+        if self.last_price is None:
+            return 0.0
+        return (self.last_price - self.average_price) * self.balance
+
+    def __str__(self) -> str:
+        from prettytable import PrettyTable
+
+        table = PrettyTable(field_names=['Ticker', 'Name', 'Type', 'Balance', 'Lots', 'Avg price', 'Last price'])
+        table.add_row([self.ticker, self.name, self.type.value, self.balance, self.lots, self.average_price,
+                       self.last_price])
+        return str(table)
+
+
+def _get_trades(operation: Operation) -> List[OperationTrade]:
+    trades = operation.trades
+    if trades or not operation.quantity:
+        return trades
+    # Operations without trades are booked as a single trade at the average price
+    return [OperationTrade({"tradeId": operation.id, "date": operation._data["date"],
+                            "price": operation.price.value, "quantity": operation.quantity})]
+
+
+def _build_tracked_position(position: PositionPortfolio, currency: Currency) -> TrackedPosition:
+    average_price = position.average_price
+    return TrackedPosition(position.figi, position.ticker, position.name, position.type, currency,
+                           position.balance, position.lots,
+                           int(round(position.balance / position.lots)) if position.lots else 1, position.blocked,
+                           average_price.value)
+
+
+class PortfolioTracker(BaseStrategy, OrderNotification):
+    def __init__(self, session: Session, resync_interval_sec: float = PORTFOLIO_RESYNC_INTERVAL_SEC):
+        self._session: Session = session
+        self._resync_interval_sec: float = resync_interval_sec
+        self._lock: threading.RLock = threading.RLock()
+        self._positions_by_figi: Dict[str, TrackedPosition] = {}
+        self._positions_by_ticker: Dict[str, TrackedPosition] = {}
+        self._currencies: Dict[Currency, float] = {}
+        self._last_prices: Dict[str, float] = {}
+        self._executed_lots: Dict[str, int] = {}
+        # Booked trades and commissions of operations with their times, they are forgotten once a synchronized
+        # portfolio includes them
+        self._booked_trades: Dict[str, datetime.datetime] = {}
+        self._booked_commissions: Dict[str, datetime.datetime] = {}
+        # Trades executed before the last synchronized portfolio was requested are already included in it
+        self._synced_at: datetime.datetime = datetime.datetime.min.replace(tzinfo=datetime.timezone.utc)
+        self._bookings_during_sync: Optional[List[Tuple[datetime.datetime, Callable[..., None], tuple]]] = None
+        self._sync_lock: threading.Lock = threading.Lock()
+        self._last_sync_time: float = 0.0
+        self._resync_thread: Optional[threading.Thread] = None
+
+        self.sync()
+        session.add_market_data_listener(self)
+        session.add_order_listener(self)
+        if resync_interval_sec > 0:
+            self._resync_thread = threading.Thread(target=self._resync, daemon=True)
+            self._resync_thread.start()
+
+    @property
+    def positions(self) -> List[TrackedPosition]:
+        with self._lock:
+            return list(self._positions_by_figi.values())
+
+    @property
+    def currencies(self) -> Dict[Currency, float]:
+        with self._lock:
+            return dict(self._currencies)
+
+    @property
+    def last_sync_time(self) -> float:
+        return self._last_sync_time
+
+    def get_position_by_figi(self, figi: str) -> Optional[TrackedPosition]:
+        return self._positions_by_figi.get(figi)
+
+    def get_position_by_ticker(self, ticker: str) -> Optional[TrackedPosition]:
+        return self._positions_by_ticker.get(ticker)
+
+    def get_currency_balance(self, currency: Currency) -> float:
+        return self._currencies.get(currency, 0.0)
+
+    def track(self, figi: str, interval: SubscriptionInterval = SubscriptionInterval.MINUTES_1) -> None:
+        # Tracker receives candles of every subscription as a market data listener, so it only opens the stream
+        self._session.subscribe_to_candles(figi, interval, BaseStrategy())
+
+    def sync(self) -> None:
+        with self._sync_lock:
+            requested_at = datetime.datetime.now(datetime.timezone.utc)
+            with self._lock:
+                self._bookings_during_sync = []
+            try:
+                portfolio: Portfolio = self._session.get_portfolio()
+                positions = {pos.figi: _build_tracked_position(pos, self._get_position_currency(pos))
+                             for pos in portfolio.positions}
+                currencies = {cur.name: cur.balance.value for cur in portfolio.currencies}
+            except Exception:
+                with self._lock:
+                    self._bookings_during_sync = None
+                raise
+
+            with self._lock:
+                bookings, self._bookings_during_sync = self._bookings_during_sync, None
+                for figi, position in positions.items():
+                    position.last_price = self._last_prices.get(figi)
+                self._positions_by_figi = positions
+                self._positions_by_ticker = {pos.ticker: pos for pos in positions.values()}
+                self._currencies = currencies
+                self._synced_at = requested_at
+                # Trades booked while the portfolio was loaded are kept if they may be missing in the portfolio
+                for booking_time, apply, args in bookings:
+                    if booking_time > requested_at:
+                        apply(*args)
+                # Reported again, trades included in the portfolio are skipped by their time, so their ids are dropped
+                self._booked_trades = {trade_id: trade_time for trade_id, trade_time in self._booked_trades.items()
+                                       if trade_time > requested_at}
+                self._booked_commissions = {operation_id: trade_time for operation_id, trade_time
+                                            in self._booked_commissions.items() if trade_time > requested_at}
+                self._last_sync_time = time.time()
+        logging.debug("Portfolio has been synchronized: %d positions, %d currencies", len(positions),
+                      len(currencies))
+
+    def stop(self) -> None:
+        self._resync_thread = None
+        self._session.remove_market_data_listener(self)
+        self._session.remove_order_listener(self)
+
+    def on_candle(self, candle: Candle) -> None:
+        self._mark_to_market(candle.figi, candle.close_price)
+
+    def on_order_book(self, order_book: OrderBook) -> None:
+        if order_book.bids and order_book.asks:
+            self._mark_to_market(order_book.figi, (order_book.bids[0][0] + order_book.asks[0][0]) / 2)
+
+    def on_order_updated(self, order: Order) -> None:
+        with self._lock:
+            if order.executed_lots <= self._executed_lots.get(order.id, 0):
+                return
+            self._executed_lots[order.id] = order.executed_lots
+        # Orders have limit prices only, so fills are booked with the execution prices of the order operation
+        operation = self._find_operation(order)
+        if operation:
+            self._apply_operation(operation)
+
+    def on_order_completed(self, order: Order, operation: Operation) -> None:
+        with self._lock:
+            self._executed_lots.pop(order.id, None)
+        self._apply_operation(operation)
+
+    def _mark_to_market(self, figi: str, price: float) -> None:
+        self._last_prices[figi] = price
+        position = self._positions_by_figi.get(figi)
+        if position:
+            position.last_price = price
+
+    def _find_operation(self, order: Order) -> Optional[Operation]:
+        now = datetime.datetime.now(_MOSCOW_TIMEZONE).replace(tzinfo=None)
+        try:
+            for operation in self._session.get_operations(now - _ORDER_OPERATIONS_WINDOW, now, order.figi):
+                if operation.id == order.id:
+                    return operation
+        except Exception as err:
+            logging.error("Unable to load operation of order %s: %s", order.id, err)
+            return None
+        logging.warning("Operation of order %s is not available yet, waiting for the next sync", order.id)
+        return None
+
+    def _get_position_currency(self, position: PositionPortfolio) -> Currency:
+        currency = position.average_price.currency
+        if currency is None:
+            # Positions without prices have no currency, it is taken from the instrument
+            currency = self._session.get_instrument_by_figi(position.figi).currency
+        return currency
+
+    def _get_instrument_details(self, figi: str) -> InstrumentDetails:
+        position = self._positions_by_figi.get(figi)
+        if position:
+            return position.ticker, position.name, position.type, position.currency, position.lot_size
+        instrument = self._session.get_instrument_by_figi(figi)
+        return instrument.ticker, instrument.name, instrument.type, instrument.currency, instrument.lot_size
+
+    def _apply_operation(self, operation: Operation) -> None:
+        sign = _TRADE_SIGNS.get(operation.operation)
+        if not operation.figi or not sign:
+            logging.warning("Unable to apply operation %s to portfolio, waiting for the next sync", operation.id)
+            return
+
+        # Instrument is requested before taking the lock, so market data is not blocked by the request
+        details = self._get_instrument_details(operation.figi)
+        trades = _get_trades(operation)
+        commission = operation.commission
+        with self._lock:
+            for trade in trades:
+                # Updates and completion of an order report the same trades, every trade is booked once
+                trade_time = trade.date
+                if trade.id in self._booked_trades or trade_time <= self._synced_at:
+                    continue
+                self._booked_trades[trade.id] = trade_time
+                self._book(trade_time, self._apply_trade, operation.figi, sign, trade.quantity, trade.price, details)
+
+            # Commission is charged once per operation, it is known when the operation is reported with its trades
+            last_trade_time = max((trade.date for trade in trades), default=None)
+            if (commission.value and commission.currency and operation.id not in self._booked_commissions and
+                    last_trade_time and last_trade_time > self._synced_at):
+                self._booked_commissions[operation.id] = last_trade_time
+                self._book(last_trade_time, self._apply_commission, commission.currency, commission.value)
+
+    def _book(self, booking_time: datetime.datetime, apply: Callable[..., None], *args) -> None:
+        apply(*args)
+        if self._bookings_during_sync is not None:
+            self._bookings_during_sync.append((booking_time, apply, args))
+
+    def _apply_commission(self, currency: Currency, value: float) -> None:
+        self._currencies[currency] = self._currencies.get(currency, 0.0) - value
+        logging.debug("Commission applied to portfolio: %f %s", value, currency.value)
+
+    def _apply_trade(self, figi: str, sign: int, quantity: int, price: float, details: InstrumentDetails) -> None:
+        position = self._positions_by_figi.get(figi)
+        if not position:
+            ticker, name, instrument_type, currency, lot_size = details
+            position = TrackedPosition(figi, ticker, name, instrument_type, currency, 0.0, 0, lot_size, 0.0, 0.0)
+            position.last_price = self._last_prices.get(figi)
+            self._positions_by_figi[figi] = position
+            self._positions_by_ticker[position.ticker] = position
+
+        if sign > 0 and position.balance + quantity:
+            position.average_price = (position.average_price * position.balance + price * quantity) / \
+                                     (position.balance + quantity)
+        position.balance += sign * quantity
+        position.lots = int(position.balance // position.lot_size) if position.lot_size else 0
+        self._currencies[position.currency] = self._currencies.get(position.currency, 0.0) - sign * price * quantity
+        logging.debug("Trade applied to portfolio: %d of %s at %f", sign * quantity, figi, price)
+
+        if not position.balance:
+            del self._positions_by_figi[figi]
+            self._positions_by_ticker.pop(position.ticker, None)
+
+    def _resync(self) -> None:
+        current_thread = threading.current_thread()
+        while self._resync_thread is current_thread:
+            time.sleep(self._resync_interval_sec)
+            if self._resync_thread is not current_thread:
+                break
+            try:
+                self.sync()
+            except Exception as err:
+                logging.error("Unable to synchronize portfolio: %s", err)
+
+    def __str__(self) -> str:
+        from prettytable import PrettyTable
+
+        table = PrettyTable(field_names=['Currency', 'Sum'])
+        for currency, balance in self.currencies.items():
+            table.add_row([currency.value, balance])
+
+        result = str(table)
+        result += "\n"
+        table_pos = PrettyTable(field_names=['Ticker', 'Name', 'Type', 'Balance', 'Lots', 'Avg. price',
+                                             'Last price', 'Market value'])
+        for item in self.positions:
+            table_pos.add_row([item.ticker, item.name, item.type.value, item.balance, item.lots, item.average_price,
+                               item.last_price, item.market_value])
+        result += str(table_pos)
+        return result
@@ -0,0 +1,178 @@
+import logging
+import multiprocessing
+import os
+import pickle
+import threading
+import time
+from multiprocessing.connection import Connection
+from typing import Dict, List, Optional, Tuple
+
+from tinkoff_invest.base_strategy import BaseStrategy, STRATEGY_CALLBACKS
+from tinkoff_invest.models.candle import Candle
+from tinkoff_invest.models.instrument_status import InstrumentStatus
+from tinkoff_invest.models.order_book import OrderBook
+from tinkoff_invest.models.types import SubscriptionEventType
+
+_HOST_COMMAND = "host"
+_EVENT_COMMAND = "event"
+_MONITORING_INTERVAL_SEC = 1
+_PROCESS_JOIN_TIMEOUT_SEC = 3
+
+_EVENT_MODELS = {
+    SubscriptionEventType.CANDLE: Candle,
+    SubscriptionEventType.ORDER_BOOK: OrderBook,
+    SubscriptionEventType.INSTRUMENT: InstrumentStatus
+}
+
+
+def _strategy_process(connection: Connection) -> None:
+    strategies: Dict[int, BaseStrategy] = {}
+    while True:
+        try:
+            message = connection.recv()
+        except EOFError:
+            break
+        if message is None:
+            break
+
+        command, strategy_id, *arguments = message
+        try:
+            if command == _HOST_COMMAND:
+                strategies[strategy_id] = pickle.loads(arguments[0])
+            elif command == _EVENT_COMMAND:
+                event_type, payload = arguments
+                getattr(strategies[strategy_id], STRATEGY_CALLBACKS[event_type])(_EVENT_MODELS[event_type](payload))
+            else:
+                raise Exception("An unsupported command '{}'".format(command))
+        except Exception as err:
+            logging.exception(err)
+    connection.close()
+
+
+class HostedStrategy(BaseStrategy):
+    def __init__(self, pool: 'StrategyProcessPool', strategy_id: int, strategy: BaseStrategy):
+        self._pool: StrategyProcessPool = pool
+        self._strategy_id: int = strategy_id
+        self.name: str = getattr(strategy, "name", None) or type(strategy).__name__
+
+    def on_candle(self, candle: Candle) -> None:
+        self._pool.send_event(self._strategy_id, SubscriptionEventType.CANDLE, candle._data)
+
+    def on_order_book(self, order_book: OrderBook) -> None:
+        self._pool.send_event(self._strategy_id, SubscriptionEventType.ORDER_BOOK, order_book._data)
+
+    def on_instrument_info(self, instrument: InstrumentStatus) -> None:
+        self._pool.send_event(self._strategy_id, SubscriptionEventType.INSTRUMENT, instrument._data)
+
+
+class StrategyProcessPool:
+    def __init__(self, processes_count: int = os.cpu_count() or 1):
+        assert (processes_count > 0), "Processes count should be > 0"
+        # Worker processes are spawned since the parent process runs web socket and worker threads
+        self._context = multiprocessing.get_context("spawn")
+        self._processes: List[Optional[multiprocessing.Process]] = [None] * processes_count
+        self._connections: List[Optional[Connection]] = [None] * processes_count
+        self._locks: List[threading.Lock] = [threading.Lock() for _ in range(processes_count)]
+        self._hosted: Dict[int, Tuple[int, bytes]] = {}
+        self._proxies: Dict[int, Tuple[BaseStrategy, HostedStrategy]] = {}
+        self._hosting_lock: threading.Lock = threading.Lock()
+        self._stop_flag: bool = False
+
+        for index in range(processes_count):
+            with self._locks[index]:
+                self._start_process(index)
+        self._monitor: threading.Thread = threading.Thread(target=self._monitor_processes, daemon=True)
+        self._monitor.start()
+        logging.info("%d strategy processes are ready to process events", processes_count)
+
+    @property
+    def processes_count(self) -> int:
+        return len(self._processes)
+
+    def host(self, strategy: BaseStrategy) -> HostedStrategy:
+        with self._hosting_lock:
+            if id(strategy) in self._proxies:
+                return self._proxies[id(strategy)][1]
+
+            # Strategy is copied to the worker process when it is hosted. The worker owns the state from now on,
+            # changes made by callbacks are not visible in the parent process and changes made to the parent object
+            # are not passed to the worker.
+            data = pickle.dumps(strategy)
+            strategy_id = len(self._proxies)
+            index = strategy_id % self.processes_count
+            proxy = HostedStrategy(self, strategy_id, strategy)
+            self._hosted[strategy_id] = (index, data)
+            self._proxies[id(strategy)] = (strategy, proxy)
+        self._send(index, (_HOST_COMMAND, strategy_id, data))
+        logging.info("Strategy %s is hosted by process %d", proxy.name, index)
+        return proxy
+
+    def send_event(self, strategy_id: int, event_type: SubscriptionEventType, payload: dict) -> None:
+        self._send(self._hosted[strategy_id][0], (_EVENT_COMMAND, strategy_id, event_type, payload))
+
+    def shutdown(self) -> None:
+        if self._stop_flag:
+            return
+
+        logging.info("Shutdown strategy processes")
+        self._stop_flag = True
+        for index, process in enumerate(self._processes):
+            with self._locks[index]:
+                try:
+                    self._connections[index].send(None)
+                except (OSError, ValueError):
+                    pass
+                process.join(_PROCESS_JOIN_TIMEOUT_SEC)
+                if process.is_alive():
+                    process.terminate()
+                self._connections[index].close()
+
+    def _send(self, index: int, message: tuple) -> None:
+        with self._locks[index]:
+            if self._stop_flag:
+                return
+            try:
+                self._connections[index].send(message)
+            except (OSError, ValueError) as err:
+                logging.error("Unable to pass %s to strategy process %d: %s", message[0], index, err)
+                self._try_restart_process(index)
+
+    def _start_process(self, index: int) -> None:
+        parent_connection, child_connection = self._context.Pipe()
+        process = self._context.Process(target=_strategy_process, args=(child_connection,), daemon=True,
+                                        name="tinkoff_invest_strategies_{}".format(index))
+        process.start()
+        # Closing the parent copy lets sends fail with a broken pipe once the process dies
+        child_connection.close()
+        self._processes[index] = process
+        self._connections[index] = parent_connection
+
+    def _restart_process(self, index: int) -> None:
+        process = self._processes[index]
+        if process.is_alive():
+            process.terminate()
+        process.join(_PROCESS_JOIN_TIMEOUT_SEC)
+        logging.error("Strategy process %d has stopped with exit code %s, restarting", index, process.exitcode)
+        self._connections[index].close()
+        self._start_process(index)
+
+        # Strategies are restored from the state they had when they were hosted, the state collected by the crashed
+        # process is lost
+        for strategy_id, (process_index, data) in list(self._hosted.items()):
+            if process_index == index:
+                self._connections[index].send((_HOST_COMMAND, strategy_id, data))
+
+    def _try_restart_process(self, index: int) -> None:
+        # Process is checked again by the monitor, so a failed restart is retried instead of stopping the caller
+        try:
+            self._restart_process(index)
+        except Exception as err:
+            logging.error("Unable to restart strategy process %d: %s", index, err)
+
+    def _monitor_processes(self) -> None:
+        while not self._stop_flag:
+            for index, process in enumerate(self._processes):
+                with self._locks[index]:
+                    if not self._stop_flag and not process.is_alive():
+                        self._try_restart_process(index)
+            time.sleep(_MONITORING_INTERVAL_SEC)
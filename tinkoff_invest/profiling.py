@@ -0,0 +1,174 @@
+import logging
+import sys
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, Optional, Tuple
+
+from tinkoff_invest.config import SLOW_CALLBACK_THRESHOLD_SEC
+from tinkoff_invest.models.types import SubscriptionEventType
+
+_LATENCY_SAMPLES_COUNT = 1024
+_SAMPLING_INTERVAL_SEC = 0.005
+
+SlowCallbackHandler = Callable[[str, SubscriptionEventType, str, float], None]
+# Statistics are collected per strategy name, instrument and event type, so instances of a strategy class
+# trading different instruments are measured separately
+StatisticsKey = Tuple[str, str, SubscriptionEventType]
+
+
+def _get_strategy_name(strategy: object) -> str:
+    return getattr(strategy, "name", None) or type(strategy).__name__
+
+
+class CallbackStatistics:
+    def __init__(self):
+        self._count: int = 0
+        self._slow_count: int = 0
+        self._total_time: float = 0.0
+        self._max_time: float = 0.0
+        self._samples: Deque[float] = deque(maxlen=_LATENCY_SAMPLES_COUNT)
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    @property
+    def slow_count(self) -> int:
+        return self._slow_count
+
+    @property
+    def total_time(self) -> float:
+        return self._total_time
+
+    @property
+    def max_time(self) -> float:
+        return self._max_time
+
+    @property
+    def mean_time(self) -> float:
+        return self._total_time / self._count if self._count else 0.0
+
+    def percentile(self, percent: float) -> float:
+        assert (0 <= percent <= 100), "Percent should be in range [0..100]"
+        samples = sorted(self._samples)
+        if not samples:
+            return 0.0
+        return samples[min(len(samples) - 1, int(round(percent / 100 * (len(samples) - 1))))]
+
+    def add(self, duration: float, is_slow: bool) -> None:
+        self._count += 1
+        self._total_time += duration
+        self._max_time = max(self._max_time, duration)
+        self._samples.append(duration)
+        if is_slow:
+            self._slow_count += 1
+
+
+class CallbackProfiler:
+    def __init__(self, slow_threshold_sec: float = SLOW_CALLBACK_THRESHOLD_SEC,
+                 on_slow_callback: Optional[SlowCallbackHandler] = None):
+        self._slow_threshold_sec: float = slow_threshold_sec
+        self._on_slow_callback: Optional[SlowCallbackHandler] = on_slow_callback
+        self._lock: threading.Lock = threading.Lock()
+        self._statistics: Dict[StatisticsKey, CallbackStatistics] = {}
+        self._active_callbacks: Dict[int, Tuple[str, SubscriptionEventType, str]] = {}
+        self._sampled_frames: Dict[Tuple[str, str], int] = {}
+        self._sampler: Optional[threading.Thread] = None
+        self._sampling_interval_sec: float = _SAMPLING_INTERVAL_SEC
+
+    @property
+    def slow_threshold_sec(self) -> float:
+        return self._slow_threshold_sec
+
+    @slow_threshold_sec.setter
+    def slow_threshold_sec(self, value: float) -> None:
+        self._slow_threshold_sec = value
+
+    @property
+    def statistics(self) -> Dict[StatisticsKey, CallbackStatistics]:
+        with self._lock:
+            return dict(self._statistics)
+
+    @property
+    def sampled_frames(self) -> Dict[Tuple[str, str], int]:
+        with self._lock:
+            return dict(self._sampled_frames)
+
+    @property
+    def is_sampling(self) -> bool:
+        return self._sampler is not None
+
+    def measure(self, strategy: object, event_type: SubscriptionEventType, figi: str,
+                callback: Callable[[object], None], event_object: object) -> None:
+        name = _get_strategy_name(strategy)
+        thread_id = threading.get_ident()
+        self._active_callbacks[thread_id] = (name, event_type, figi)
+        start = time.perf_counter()
+        try:
+            callback(event_object)
+        finally:
+            duration = time.perf_counter() - start
+            del self._active_callbacks[thread_id]
+            self._record(name, event_type, figi, duration)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._statistics = {}
+            self._sampled_frames = {}
+
+    def start_sampling(self, interval_sec: float = _SAMPLING_INTERVAL_SEC) -> None:
+        if self._sampler:
+            return
+        self._sampling_interval_sec = interval_sec
+        self._sampler = threading.Thread(target=self._sample, daemon=True)
+        self._sampler.start()
+        logging.info("Strategy callbacks sampling started with %f sec interval", interval_sec)
+
+    def stop_sampling(self) -> None:
+        sampler = self._sampler
+        if not sampler:
+            return
+        self._sampler = None
+        sampler.join(1)
+        logging.info("Strategy callbacks sampling stopped")
+
+    def _record(self, name: str, event_type: SubscriptionEventType, figi: str, duration: float) -> None:
+        is_slow = duration > self._slow_threshold_sec
+        with self._lock:
+            key = (name, figi, event_type)
+            if key not in self._statistics:
+                self._statistics[key] = CallbackStatistics()
+            self._statistics[key].add(duration, is_slow)
+        if not is_slow:
+            return
+
+        logging.warning("Slow %s callback of strategy %s for %s: %.3f sec (threshold %.3f sec)", event_type.value,
+                        name, figi, duration, self._slow_threshold_sec)
+        if self._on_slow_callback:
+            self._on_slow_callback(name, event_type, figi, duration)
+
+    def _sample(self) -> None:
+        current_thread = threading.current_thread()
+        while self._sampler is current_thread:
+            frames = sys._current_frames()
+            with self._lock:
+                for thread_id, (name, _, _) in list(self._active_callbacks.items()):
+                    frame = frames.get(thread_id)
+                    if frame is None:
+                        continue
+                    location = "{}:{} {}".format(frame.f_code.co_filename, frame.f_lineno, frame.f_code.co_name)
+                    self._sampled_frames[(name, location)] = self._sampled_frames.get((name, location), 0) + 1
+            del frames
+            time.sleep(self._sampling_interval_sec)
+
+    def __str__(self) -> str:
+        from prettytable import PrettyTable
+
+        table = PrettyTable(field_names=['Strategy', 'FIGI', 'Event', 'Count', 'Total, s', 'Mean, ms', 'P50, ms',
+                                         'P99, ms', 'Max, ms', 'Slow'])
+        for (name, figi, event_type), stat in sorted(self.statistics.items(), key=lambda item: -item[1].total_time):
+            table.add_row([name, figi, event_type.value, stat.count, round(stat.total_time, 3),
+                           round(stat.mean_time * 1000, 3), round(stat.percentile(50) * 1000, 3),
+                           round(stat.percentile(99) * 1000, 3), round(stat.max_time * 1000, 3), stat.slow_count])
+        return str(table)
@@ -0,0 +1,27 @@
+import threading
+import time
+from collections import deque
+from typing import Deque
+
+
+class RateLimiter:
+    # Times of the requests sent during the last period are kept, so no period ever contains more than
+    # requests_count requests, including the first one after the start
+    def __init__(self, requests_count: int, period_sec: float):
+        assert (requests_count > 0 and period_sec > 0), "Requests count and period should be > 0"
+        self._requests_count: int = requests_count
+        self._period_sec: float = period_sec
+        self._request_times: Deque[float] = deque()
+        self._lock: threading.Lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                while self._request_times and self._request_times[0] <= now - self._period_sec:
+                    self._request_times.popleft()
+                if len(self._request_times) < self._requests_count:
+                    self._request_times.append(now)
+                    return
+                delay = self._request_times[0] + self._period_sec - now
+            time.sleep(delay)
@@ -0,0 +1,177 @@
+import gzip
+import logging
+import os
+import re
+import struct
+import threading
+import time
+import zlib
+from typing import Callable, IO, Iterator, List, Optional, Tuple
+
+from tinkoff_invest.config import RECORDER_MAX_FILE_SIZE, RECORDER_FLUSH_INTERVAL_SEC
+
+_RECORD_HEADER = struct.Struct("<dI")
+_FILE_NAME_FORMAT = "events_{:06d}.bin.gz"
+_FILE_NAME_PATTERN = re.compile(r"^events_(\d{6})\.bin\.gz$")
+
+
+def _list_record_files(directory: str) -> List[Tuple[int, str]]:
+    files = []
+    for name in os.listdir(directory):
+        match = _FILE_NAME_PATTERN.match(name)
+        if match:
+            files.append((int(match.group(1)), os.path.join(directory, name)))
+    return sorted(files)
+
+
+# Every file is a sequence of gzip members. A member is completed at least once per flush interval, so a crash loses
+# only the events of the last interval and the events written before it can still be read.
+class EventRecorder:
+    def __init__(self, directory: str, max_file_size: int = RECORDER_MAX_FILE_SIZE, compression_level: int = 6,
+                 flush_interval_sec: float = RECORDER_FLUSH_INTERVAL_SEC):
+        assert (flush_interval_sec > 0), "Flush interval should be > 0"
+        os.makedirs(directory, exist_ok=True)
+        self._directory: str = directory
+        # Limit is applied to the compressed size of a file, a file is rotated once it has reached the limit
+        self._max_file_size: int = max_file_size
+        self._compression_level: int = compression_level
+        self._flush_interval_sec: float = flush_interval_sec
+        self._lock: threading.Lock = threading.Lock()
+        files = _list_record_files(directory)
+        self._file_index: int = files[-1][0] + 1 if files else 0
+        self._file: Optional[IO[bytes]] = None
+        self._member: Optional[gzip.GzipFile] = None
+        self._member_start: float = 0.0
+        self._records_count: int = 0
+        self._closed: threading.Event = threading.Event()
+        self._open_next_file()
+        self._flusher: threading.Thread = threading.Thread(target=self._flush_periodically, daemon=True,
+                                                           name="tinkoff_invest_recorder")
+        self._flusher.start()
+
+    @property
+    def directory(self) -> str:
+        return self._directory
+
+    @property
+    def records_count(self) -> int:
+        return self._records_count
+
+    def write(self, frame: str, receive_time: Optional[float] = None) -> None:
+        data = frame.encode() if isinstance(frame, str) else frame
+        header = _RECORD_HEADER.pack(time.time() if receive_time is None else receive_time, len(data))
+        with self._lock:
+            if not self._file:
+                return
+            if not self._member:
+                self._member = gzip.GzipFile(mode="wb", compresslevel=self._compression_level, fileobj=self._file)
+                self._member_start = time.monotonic()
+            self._member.write(header)
+            self._member.write(data)
+            self._records_count += 1
+            if self._file.tell() >= self._max_file_size:
+                self._open_next_file()
+
+    @property
+    def file_size(self) -> int:
+        with self._lock:
+            return self._file.tell() if self._file else 0
+
+    def flush(self) -> None:
+        with self._lock:
+            self._complete_member()
+
+    def close(self) -> None:
+        self._closed.set()
+        with self._lock:
+            if self._file:
+                self._complete_member()
+                self._file.close()
+                self._file = None
+        logging.info("%d events have been recorded to %s", self._records_count, self._directory)
+
+    def _complete_member(self) -> None:
+        if self._member:
+            self._member.close()
+            self._member = None
+            self._file.flush()
+
+    def _flush_periodically(self) -> None:
+        while not self._closed.wait(self._flush_interval_sec):
+            with self._lock:
+                if self._member and time.monotonic() - self._member_start >= self._flush_interval_sec:
+                    self._complete_member()
+
+    def _open_next_file(self) -> None:
+        if self._file:
+            self._complete_member()
+            self._file.close()
+        path = os.path.join(self._directory, _FILE_NAME_FORMAT.format(self._file_index))
+        self._file = open(path, "wb")
+        self._file_index += 1
+        logging.info("Recording events to %s", path)
+
+
+class EventReplayer:
+    def __init__(self, path: str):
+        self._files: List[str] = [name for _, name in _list_record_files(path)] if os.path.isdir(path) else [path]
+
+    def __iter__(self) -> Iterator[Tuple[float, str]]:
+        for path in self._files:
+            try:
+                yield from self._read_file(path)
+            except (EOFError, zlib.error, gzip.BadGzipFile) as err:
+                # The last member of a file is incomplete if the recorder has crashed, the events before it are kept
+                logging.warning("Events at the end of %s are lost: %s", path, err)
+
+    @staticmethod
+    def _read_file(path: str) -> Iterator[Tuple[float, str]]:
+        with gzip.open(path, "rb") as file:
+            while True:
+                header = file.read(_RECORD_HEADER.size)
+                if len(header) < _RECORD_HEADER.size:
+                    break
+                receive_time, size = _RECORD_HEADER.unpack(header)
+                data = file.read(size)
+                if len(data) < size:
+                    logging.warning("Truncated event record at the end of %s", path)
+                    break
+                yield receive_time, data.decode()
+
+    def replay(self, handler: Callable[[str], None], speed: Optional[float] = 1.0) -> int:
+        assert (speed is None or speed > 0), "Speed should be > 0"
+        count = 0
+        first_time = None
+        start = time.monotonic()
+        for receive_time, frame in self:
+            if speed is not None:
+                if first_time is None:
+                    first_time = receive_time
+                delay = (receive_time - first_time) / speed - (time.monotonic() - start)
+                if delay > 0:
+                    time.sleep(delay)
+            handler(frame)
+            count += 1
+        return count
+
+
+class ReplayStatistics:
+    def __init__(self, events_count: int, elapsed_sec: float):
+        self._events_count = events_count
+        self._elapsed_sec = elapsed_sec
+
+    @property
+    def events_count(self) -> int:
+        return self._events_count
+
+    @property
+    def elapsed_sec(self) -> float:
+        return self._elapsed_sec
+
+    @property
+    def events_per_sec(self) -> float:
+        return self._events_count / self._elapsed_sec if self._elapsed_sec else 0.0
+
+    def __str__(self) -> str:
+        return "{} events in {:.3f} sec ({:.1f} events/sec)".format(self._events_count, self._elapsed_sec,
+                                                                   self.events_per_sec)
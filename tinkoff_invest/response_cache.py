@@ -0,0 +1,121 @@
+import copy
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Callable, Dict, Optional, Tuple
+
+
+def _get_endpoint(query: str) -> str:
+    return query.split('?', 1)[0]
+
+
+class CacheStatistics:
+    def __init__(self, hits: int, misses: int, coalesced: int, size: int):
+        self._hits = hits
+        self._misses = misses
+        self._coalesced = coalesced
+        self._size = size
+
+    @property
+    def hits(self) -> int:
+        return self._hits
+
+    @property
+    def misses(self) -> int:
+        return self._misses
+
+    @property
+    def coalesced(self) -> int:
+        return self._coalesced
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self._hits + self._misses + self._coalesced
+        return (self._hits + self._coalesced) / total if total else 0.0
+
+    def __str__(self) -> str:
+        return "{} hits, {} coalesced, {} misses ({:.1%} served without a request), {} cached".format(
+            self._hits, self._coalesced, self._misses, self.hit_ratio, self._size)
+
+
+class ResponseCache:
+    def __init__(self, max_size: int, ttl_sec: Dict[str, float]):
+        assert (max_size > 0), "Cache size should be > 0"
+        self._max_size: int = max_size
+        self._ttl_sec: Dict[str, float] = dict(ttl_sec)
+        self._lock: threading.Lock = threading.Lock()
+        self._entries: 'OrderedDict[str, Tuple[float, dict]]' = OrderedDict()
+        self._in_flight: Dict[str, Future] = {}
+        self._hits: int = 0
+        self._misses: int = 0
+        self._coalesced: int = 0
+
+    @property
+    def statistics(self) -> CacheStatistics:
+        with self._lock:
+            return CacheStatistics(self._hits, self._misses, self._coalesced, len(self._entries))
+
+    def get_ttl(self, query: str) -> Optional[float]:
+        endpoint = _get_endpoint(query)
+        while endpoint:
+            if endpoint in self._ttl_sec:
+                return self._ttl_sec[endpoint]
+            endpoint = endpoint.rpartition('/')[0]
+        return None
+
+    def set_ttl(self, endpoint: str, ttl_sec: float) -> None:
+        self._ttl_sec[endpoint] = ttl_sec
+
+    # Every caller gets its own copy of the response, because models and callers may change the dicts they get
+    def get(self, query: str, loader: Callable[[str], dict]) -> dict:
+        ttl = self.get_ttl(query)
+        with self._lock:
+            entry = self._entries.get(query)
+            if entry is not None and ttl is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(query)
+                self._hits += 1
+                return copy.deepcopy(entry[1])
+            future = self._in_flight.get(query)
+            is_owner = future is None
+            if is_owner:
+                future = Future()
+                self._in_flight[query] = future
+                self._misses += 1
+            else:
+                self._coalesced += 1
+
+        if not is_owner:
+            return copy.deepcopy(future.result())
+
+        # Only the first caller sends the request, concurrent identical calls wait for its result or error
+        try:
+            response = loader(query)
+        except BaseException as err:
+            with self._lock:
+                del self._in_flight[query]
+            future.set_exception(err)
+            raise
+        with self._lock:
+            del self._in_flight[query]
+            if ttl:
+                self._entries[query] = (time.monotonic() + ttl, response)
+                self._entries.move_to_end(query)
+                while len(self._entries) > self._max_size:
+                    self._entries.popitem(last=False)
+        future.set_result(response)
+        return copy.deepcopy(response)
+
+    def invalidate(self, endpoint: Optional[str] = None) -> None:
+        with self._lock:
+            if endpoint is None:
+                self._entries.clear()
+            else:
+                for query in [query for query in self._entries if _get_endpoint(query).startswith(endpoint)]:
+                    del self._entries[query]
+        logging.debug("Response cache has been invalidated (%s)", endpoint or "all")
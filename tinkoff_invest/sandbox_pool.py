@@ -0,0 +1,88 @@
+import contextlib
+import logging
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, List, Optional
+
+from tinkoff_invest.config import SANDBOX_SERVER, WEB_SOCKETS_SERVER, SANDBOX_POOL_SIZE
+from tinkoff_invest.models.sandbox_fixture import SandboxFixture
+from tinkoff_invest.session import SandboxSession
+
+
+class SandboxSessionPool:
+    def __init__(self, token: str, size: int = SANDBOX_POOL_SIZE, fixture: Optional[SandboxFixture] = None,
+                 server_address: str = SANDBOX_SERVER, web_socket_server_address: str = WEB_SOCKETS_SERVER):
+        assert (size > 0), "Pool size should be > 0"
+        self._fixture: Optional[SandboxFixture] = fixture
+        self._free: queue.Queue = queue.Queue()
+        self._is_closed: bool = False
+        self._lock: threading.Lock = threading.Lock()
+        # Sessions are registered and seeded in parallel, every one of them gets its own sandbox account
+        self._pool: ThreadPoolExecutor = ThreadPoolExecutor(max_workers=size,
+                                                            thread_name_prefix="tinkoff_invest_sandbox")
+        self._sessions: List[SandboxSession] = list(self._pool.map(
+            lambda _: self._prepare(SandboxSession(token, server_address, web_socket_server_address,
+                                                   bind_account=True)), range(size)))
+        for session in self._sessions:
+            self._free.put(session)
+        logging.info("%d sandbox sessions are ready", size)
+
+    @property
+    def sessions(self) -> List[SandboxSession]:
+        return list(self._sessions)
+
+    @property
+    def free_count(self) -> int:
+        return self._free.qsize()
+
+    def lease(self, timeout: Optional[float] = None) -> SandboxSession:
+        return self._free.get(timeout=timeout)
+
+    def release(self, session: SandboxSession, reset: bool = True) -> None:
+        assert (session in self._sessions), "Session does not belong to the pool"
+        with self._lock:
+            # Sessions leased before the pool was closed are returned as is, their accounts may have been removed
+            if reset and not self._is_closed:
+                # Reset is done in background, the session becomes available to other tests once it is clean
+                self._pool.submit(self._reset_and_release, session)
+                return
+        self._free.put(session)
+
+    @contextlib.contextmanager
+    def leased(self, timeout: Optional[float] = None) -> Iterator[SandboxSession]:
+        session = self.lease(timeout)
+        try:
+            yield session
+        finally:
+            self.release(session)
+
+    def reset_all(self) -> None:
+        list(self._pool.map(self._prepare, self._sessions))
+
+    def close(self, remove: bool = True) -> None:
+        with self._lock:
+            if self._is_closed:
+                return
+            self._is_closed = True
+        if remove:
+            for future in [self._pool.submit(session.remove) for session in self._sessions]:
+                try:
+                    future.result()
+                except Exception as err:
+                    logging.error("Unable to remove sandbox account: %s", err)
+        self._pool.shutdown()
+
+    def _prepare(self, session: SandboxSession) -> SandboxSession:
+        if self._fixture is None:
+            session.clear_all_positions()
+        else:
+            session.load_fixture(self._fixture)
+        return session
+
+    def _reset_and_release(self, session: SandboxSession) -> None:
+        try:
+            self._prepare(session)
+        except Exception as err:
+            logging.error("Unable to reset sandbox account %s: %s", session.account_id, err)
+        self._free.put(session)
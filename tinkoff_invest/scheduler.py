@@ -0,0 +1,136 @@
+import heapq
+import itertools
+import logging
+import threading
+import time
+from typing import Callable, List, Optional, Tuple, TYPE_CHECKING
+
+from tinkoff_invest.executors import DEFAULT_EXECUTOR
+
+if TYPE_CHECKING:
+    from tinkoff_invest.base_strategy import BaseStrategy
+
+
+class Timer:
+    __slots__ = ("_strategy", "_name", "_interval_sec", "_executor", "_deadline", "_is_cancelled")
+
+    def __init__(self, strategy: 'BaseStrategy', name: str, deadline: float, interval_sec: Optional[float] = None,
+                 executor: str = DEFAULT_EXECUTOR):
+        self._strategy: 'BaseStrategy' = strategy
+        self._name: str = name
+        self._interval_sec: Optional[float] = interval_sec
+        self._executor: str = executor
+        self._deadline: float = deadline
+        self._is_cancelled: bool = False
+
+    @property
+    def strategy(self) -> 'BaseStrategy':
+        return self._strategy
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def interval_sec(self) -> Optional[float]:
+        return self._interval_sec
+
+    @property
+    def executor(self) -> str:
+        return self._executor
+
+    @property
+    def deadline(self) -> float:
+        return self._deadline
+
+    @property
+    def is_recurring(self) -> bool:
+        return self._interval_sec is not None
+
+    @property
+    def is_cancelled(self) -> bool:
+        return self._is_cancelled
+
+    def cancel(self) -> None:
+        self._is_cancelled = True
+
+
+TimerHandler = Callable[[Timer], None]
+
+
+class TimerScheduler:
+    def __init__(self, dispatch: TimerHandler):
+        self._dispatch: TimerHandler = dispatch
+        self._condition: threading.Condition = threading.Condition()
+        self._timers: List[Tuple[float, int, Timer]] = []
+        self._sequence = itertools.count()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def timers_count(self) -> int:
+        with self._condition:
+            return sum(1 for _, _, timer in self._timers if not timer.is_cancelled)
+
+    def schedule(self, strategy: 'BaseStrategy', delay_sec: float, name: str = "",
+                 interval_sec: Optional[float] = None,
+                 executor: str = DEFAULT_EXECUTOR) -> Timer:
+        assert (delay_sec >= 0), "Delay should be >= 0"
+        assert (interval_sec is None or interval_sec > 0), "Interval should be > 0"
+        timer = Timer(strategy, name, time.monotonic() + delay_sec, interval_sec, executor)
+        with self._condition:
+            self._push(timer)
+            if not self._thread:
+                self._thread = threading.Thread(target=self._run, daemon=True, name="tinkoff_invest_scheduler")
+                self._thread.start()
+        return timer
+
+    def cancel_all(self, strategy: Optional['BaseStrategy'] = None) -> None:
+        with self._condition:
+            for _, _, timer in self._timers:
+                if strategy is None or timer.strategy is strategy:
+                    timer.cancel()
+
+    def stop(self) -> None:
+        with self._condition:
+            self._thread = None
+            self._condition.notify()
+
+    def _push(self, timer: Timer) -> None:
+        heapq.heappush(self._timers, (timer.deadline, next(self._sequence), timer))
+        # Scheduler thread sleeps until the earliest deadline, so it is woken up when that deadline changes
+        if self._timers[0][2] is timer:
+            self._condition.notify()
+
+    def _run(self) -> None:
+        current_thread = threading.current_thread()
+        while True:
+            with self._condition:
+                due = self._pop_due_timers(current_thread)
+            if due is None:
+                break
+            for timer in due:
+                try:
+                    self._dispatch(timer)
+                except Exception as err:
+                    logging.exception(err)
+
+    def _pop_due_timers(self, current_thread: threading.Thread) -> Optional[List[Timer]]:
+        while self._thread is current_thread:
+            now = time.monotonic()
+            due = []
+            while self._timers and self._timers[0][0] <= now:
+                _, _, timer = heapq.heappop(self._timers)
+                if timer.is_cancelled:
+                    continue
+                due.append(timer)
+                if timer.is_recurring:
+                    # Next deadline is counted from the previous one, so recurring timers do not drift.
+                    # Periods missed while the process was busy are skipped instead of being fired at once.
+                    timer._deadline += timer.interval_sec
+                    if timer.deadline <= now:
+                        timer._deadline = now + timer.interval_sec
+                    heapq.heappush(self._timers, (timer.deadline, next(self._sequence), timer))
+            if due:
+                return due
+            self._condition.wait(self._timers[0][0] - now if self._timers else None)
+        return None
@@ -1,23 +1,33 @@
-from tinkoff_invest.config import SANDBOX_SERVER, PRODUCTION_SERVER, WEB_SOCKETS_SERVER
+from concurrent.futures import ThreadPoolExecutor
+
+from tinkoff_invest.config import SANDBOX_SERVER, PRODUCTION_SERVER, WEB_SOCKETS_SERVER, \
+    EVENTS_PROCESSING_WORKERS_COUNT, HTTP_CONNECTIONS_POOL_SIZE
 from tinkoff_invest.base_session import Session
+from tinkoff_invest.models.sandbox_fixture import SandboxFixture
 from tinkoff_invest.models.types import Currency
 
 
 class ProductionSession(Session):
     def __init__(self, token: str, server_address: str = PRODUCTION_SERVER,
-                 web_socket_server_address: str = WEB_SOCKETS_SERVER, account_id: str = ""):
-        super().__init__(server_address, token, web_socket_server_address, account_id)
+                 web_socket_server_address: str = WEB_SOCKETS_SERVER, account_id: str = "",
+                 workers_count: int = EVENTS_PROCESSING_WORKERS_COUNT):
+        super().__init__(server_address, token, web_socket_server_address, account_id, workers_count)
 
 
 class SandboxSession(Session):
     def __init__(self, token: str, server_address: str = SANDBOX_SERVER,
-                 web_socket_server_address: str = WEB_SOCKETS_SERVER, account_id: str = ""):
-        super().__init__(server_address, token, web_socket_server_address, account_id)
-        self._register()
+                 web_socket_server_address: str = WEB_SOCKETS_SERVER, account_id: str = "",
+                 workers_count: int = EVENTS_PROCESSING_WORKERS_COUNT, bind_account: bool = False):
+        super().__init__(server_address, token, web_socket_server_address, account_id, workers_count)
+        self._register(bind_account)
 
-    def _register(self) -> None:
-        auth_result = self._post('sandbox/register', {"brokerAccountType": "Tinkoff"})
+    def _register(self, bind_account: bool = False) -> None:
+        auth_result = self._post('sandbox/register', {"brokerAccountType": "Tinkoff"}, "")
         assert(auth_result["status"].lower() == "ok"), "Token registration failed"
+        # Every registration creates a new sandbox account. Sessions use the default one unless they are asked
+        # to bind to the created account, as pooled sessions do to keep their balances apart.
+        if bind_account and not self._account_id:
+            self._account_id = auth_result.get("payload", {}).get("brokerAccountId", "")
 
     def set_currency_balance(self, currency: Currency, balance: float) -> None:
         self._post('sandbox/currencies/balance', {"currency": currency.value, "balance": balance})
@@ -30,3 +40,14 @@ class SandboxSession(Session):
 
     def clear_all_positions(self) -> None:
         self._post('sandbox/clear', {})
+
+    def load_fixture(self, fixture: SandboxFixture, clear: bool = True) -> None:
+        if clear:
+            self.clear_all_positions()
+        with ThreadPoolExecutor(max_workers=HTTP_CONNECTIONS_POOL_SIZE) as pool:
+            futures = [pool.submit(self.set_currency_balance, currency, balance)
+                       for currency, balance in fixture.currencies.items()]
+            futures += [pool.submit(self.set_position_balance, figi, balance)
+                        for figi, balance in fixture.positions.items()]
+            for future in futures:
+                future.result()
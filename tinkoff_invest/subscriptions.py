@@ -1,25 +1,43 @@
+import datetime
 import gc
 import logging
+import os
 import threading
 import ujson
-import websocket
 import time
 import random
-from typing import List, Optional, Dict, Union
-from queue import Queue
+from typing import Callable, List, Optional, Dict, Union, Tuple, TYPE_CHECKING
 
-from tinkoff_invest.config import EVENTS_PROCESSING_WORKERS_COUNT
-from tinkoff_invest.base_strategy import BaseStrategy
+from tinkoff_invest.config import EVENTS_PROCESSING_WORKERS_COUNT, SLOW_CALLBACK_THRESHOLD_SEC, \
+    RECORDER_MAX_FILE_SIZE, SNAPSHOT_BATCH_INTERVAL_SEC
+from tinkoff_invest.base_strategy import BaseStrategy, RawSubscriber, STRATEGY_CALLBACKS
+from tinkoff_invest.executors import EventExecutor, DEFAULT_EXECUTOR
+from tinkoff_invest.log_sink import debug_sampled
 from tinkoff_invest.models.candle import Candle
 from tinkoff_invest.models.instrument_status import InstrumentStatus
 from tinkoff_invest.models.types import SubscriptionInterval, SubscriptionEventType
 from tinkoff_invest.models.order_book import OrderBook
+from tinkoff_invest.models.raw_event import RawEvent
+from tinkoff_invest.profiling import CallbackProfiler, SlowCallbackHandler
+from tinkoff_invest.recorder import EventRecorder, EventReplayer, ReplayStatistics
+from tinkoff_invest.scheduler import Timer, TimerScheduler
+
+# Web socket client and process pool are imported on first use, so REST only scripts start faster
+if TYPE_CHECKING:
+    import websocket
+    from tinkoff_invest.market_snapshot import MarketSnapshot
+    from tinkoff_invest.order_book_store import OrderBookStore
+    from tinkoff_invest.process_pool import StrategyProcessPool
 
 _SUBSCRIPTION_RETRIES_COUNT = 15
 _SUBSCRIPTION_TIMEOUT_SEC = 60
+_RESYNC_WORKERS_COUNT = 8
+_CANDLE_VALUES = ("o", "c", "h", "l", "v")
+_DECODER_NAME = "decoder"
+_parse_date: Optional[Callable[[str], datetime.datetime]] = None
 
 
-def _build_subscription_name(figi: str, obj_type: str, param: str) -> str:
+def build_subscription_name(figi: str, obj_type: str, param: str) -> str:
     return "{}_{}_{}".format(figi, obj_type, param)
 
 
@@ -27,50 +45,82 @@ def _parse_subscription_name(name: str) -> (str, str, str):
     return name.split('_')
 
 
+def _get_candle_time(payload: dict) -> datetime.datetime:
+    # Parser is imported with the first candle and kept, so candles do not repeat the import
+    global _parse_date
+    if _parse_date is None:
+        import iso8601
+
+        _parse_date = iso8601.parse_date
+    return _parse_date(payload["time"])
+
+
 class SubscriptionManager:
     MAX_RECONNECT_ATTEMPTS = 5
 
-    def __init__(self, server: str, token: str):
+    def __init__(self, server: str, token: str, workers_count: int = EVENTS_PROCESSING_WORKERS_COUNT):
         self._ws_server: str = server
         self._token: str = token
 
-        self._subscriptions: Dict[str, List[Dict[str, Union[Dict, BaseStrategy]]]] = {}
-        self._web_socket: Optional[websocket.WebSocketApp] = None
-        self._workers: List[threading.Thread] = []
-        self._queue: Queue = Queue()
+        self._subscriptions: Dict[str, List[Dict[str, Union[Dict, BaseStrategy, RawSubscriber, str, bool]]]] = {}
+        self._web_socket: Optional['websocket.WebSocketApp'] = None
+        self._executors: Dict[str, EventExecutor] = {
+            DEFAULT_EXECUTOR: EventExecutor(DEFAULT_EXECUTOR, workers_count)
+        }
+        # Frames are decoded and routed one by one by a lane which runs no strategy code, so a slow strategy of one
+        # executor never delays events of the others
+        self._decoder: EventExecutor = EventExecutor(_DECODER_NAME, 1)
+        self._last_candles: Dict[str, Tuple[datetime.datetime, tuple]] = {}
+        self._held_candles: Dict[str, List[dict]] = {}
+        self._candles_lock: threading.Lock = threading.Lock()
         self._connection_established: bool = False
+        self._was_connected: bool = False
         self._stop_flag: bool = False
         self._shall_reconnect: bool = False
         self._reconnect_retries: int = 0
+        self._profiler: Optional[CallbackProfiler] = None
+        self._process_pool: Optional['StrategyProcessPool'] = None
+        self._recorder: Optional[EventRecorder] = None
+        self._is_offline: bool = False
+        self._market_data_listeners: List[BaseStrategy] = []
+        self._has_raw_subscribers: bool = False
+        self._scheduler: TimerScheduler = TimerScheduler(self._dispatch_timer)
 
     def __del__(self):
+        self._scheduler.stop()
+        if self._recorder:
+            self._recorder.close()
         self._deinitialize_workers()
+        if self._process_pool:
+            self._process_pool.shutdown()
         if self._connection_established:
             self._web_socket.close()
             self._connection_established = False
 
     def _initialize_workers(self) -> None:
-        for i in range(EVENTS_PROCESSING_WORKERS_COUNT):
-            thread = threading.Thread(target=self._worker, daemon=True)
-            thread.start()
-            self._workers.append(thread)
-        logging.info("%d workers are ready to process events", EVENTS_PROCESSING_WORKERS_COUNT)
+        for executor in list(self._executors.values()):
+            executor.start()
+        self._decoder.start()
 
     def _deinitialize_workers(self) -> None:
-        if not self._workers:
+        if not self._decoder.is_running and not any(executor.is_running for executor in self._executors.values()):
             return
 
         logging.info("Shutdown subscription workers")
         self._stop_flag = True
-        for worker in self._workers:
-            try:
-                if worker.is_alive():
-                    worker.join(1)
-            except Exception as err:
-                logging.error("Unable to join tread, {}".format(err))
-        self._workers: List[threading.Thread] = []
+        self._decoder.shutdown()
+        for executor in list(self._executors.values()):
+            executor.shutdown()
+
+    def _wait_until_idle(self) -> None:
+        # Decoder submits events to executors, so it becomes idle first
+        self._decoder.wait_until_idle()
+        for executor in list(self._executors.values()):
+            executor.wait_until_idle()
 
     def _ws_connect(self) -> None:
+        import websocket
+
         while True:
             self._web_socket = websocket.WebSocketApp(self._ws_server, ["Authorization: Bearer " + self._token],
                                                       on_message=self._on_subscription_event, on_error=self._on_error,
@@ -81,10 +131,13 @@ class SubscriptionManager:
             while self._shall_reconnect and self._reconnect_retries < self.MAX_RECONNECT_ATTEMPTS:
                 gc.collect()
                 logging.info("Connection lost, trying to reconnect...")
-                # sleep between reties should increase such as truncated binary exponential backoff with 32 seconds limit
-                sleep_time = 2 ** self._reconnect_retries + random.uniform(0, 1) if self._reconnect_retries < 6 else 32
-                logging.info(f"...sleeping {sleep_time:.2f} seconds before retry...")
-                time.sleep(sleep_time)
+                # the first retry is immediate, sleep between further retries should increase such as truncated
+                # binary exponential backoff with 32 seconds limit
+                if self._reconnect_retries:
+                    sleep_time = 2 ** self._reconnect_retries + random.uniform(0, 1) \
+                        if self._reconnect_retries < 6 else 32
+                    logging.info(f"...sleeping {sleep_time:.2f} seconds before retry...")
+                    time.sleep(sleep_time)
                 self._reconnect_retries += 1
                 self._web_socket.keep_running = True
                 self._web_socket.run_forever()
@@ -107,118 +160,396 @@ class SubscriptionManager:
         self._connection_established = True
         self._reconnect_retries = 0
         logging.info("Web socket connection opened")
-        if self._shall_reconnect:
-            self._restart_workers_and_resubscribe()
+        if self._was_connected:
+            self._resubscribe()
+        self._was_connected = True
 
+    # Workers are kept alive while the connection is restored, so queued events are not lost and
+    # strategies start receiving new events right after resubscription
     def _on_error(self, _, error: Exception) -> None:
         logging.exception(error)
-        self._deinitialize_workers()
         self._connection_established = False
         self._shall_reconnect = True
 
     def _on_close(self, _1, _2, _3) -> None:
         logging.warning("Web socket has been closed")
-        self._deinitialize_workers()
         self._connection_established = False
 
-    def _worker(self) -> None:
-        while True:
+    def _process_event(self, event: str) -> None:
+        obj = ujson.loads(event)
+        payload = obj["payload"]
+        if obj["event"] == SubscriptionEventType.CANDLE.value:
+            name = build_subscription_name(payload["figi"], obj["event"], payload["interval"])
+            self._on_candle_payload(name, payload)
+        elif obj["event"] == SubscriptionEventType.ORDER_BOOK.value:
+            name = build_subscription_name(payload["figi"], obj["event"], payload["depth"])
+            self._notify_strategies(name, SubscriptionEventType.ORDER_BOOK, OrderBook(payload))
+        elif obj["event"] == SubscriptionEventType.INSTRUMENT.value:
+            name = build_subscription_name(payload["figi"], obj["event"], "")
+            self._notify_strategies(name, SubscriptionEventType.INSTRUMENT, InstrumentStatus(payload))
+        else:
+            raise Exception("An unsupported event type '{}'".format(obj["event"]))
+
+    def _on_candle_payload(self, subscription_name: str, payload: dict) -> None:
+        if self._held_candles and self._hold_candle(subscription_name, payload):
+            return
+        self._deliver_candle(subscription_name, payload)
+
+    def _hold_candle(self, subscription_name: str, payload: dict) -> bool:
+        with self._candles_lock:
+            held = self._held_candles.get(subscription_name)
+            if held is None:
+                return False
+            held.append(payload)
+            return True
+
+    def _deliver_candle(self, subscription_name: str, payload: dict) -> None:
+        if self._register_candle(subscription_name, payload):
+            self._notify_strategies(subscription_name, SubscriptionEventType.CANDLE, Candle(payload))
+
+    def _register_candle(self, subscription_name: str, payload: dict) -> bool:
+        candle_time = _get_candle_time(payload)
+        values = tuple(payload.get(key) for key in _CANDLE_VALUES)
+        with self._candles_lock:
+            last = self._last_candles.get(subscription_name)
+            if last and (candle_time < last[0] or (candle_time == last[0] and values == last[1])):
+                return False
+            self._last_candles[subscription_name] = (candle_time, values)
+        return True
+
+    def _notify_strategies(self, subscription_name: str, event_type: SubscriptionEventType,
+                           event_object: Union[Candle, OrderBook, InstrumentStatus]) -> None:
+        # Events of an instrument are delivered in the order of the web socket, even by several workers
+        figi = event_object.figi
+        if self._market_data_listeners:
+            self._executors[DEFAULT_EXECUTOR].submit_ordered(figi, self._notify_listeners, event_type, event_object)
+        for subscription in self._subscriptions[subscription_name]:
+            if subscription['raw']:
+                continue
+            self._executors[subscription['executor']].submit_ordered(figi, self._notify_strategy,
+                                                                     subscription['strategy'], event_type, event_object)
+
+    def _notify_listeners(self, event_type: SubscriptionEventType,
+                          event_object: Union[Candle, OrderBook, InstrumentStatus]) -> None:
+        for listener in self._market_data_listeners:
             try:
-                if self._stop_flag:
-                    logging.info("Shutdown worker")
-                    break
-
-                if self._queue.qsize() > EVENTS_PROCESSING_WORKERS_COUNT - 1:
-                    logging.warning("Too many events to process: {}".format(self._queue.qsize()))
-
-                event = self._queue.get()
-                obj = ujson.loads(event)
-                if obj["event"] == SubscriptionEventType.CANDLE.value:
-                    candle = Candle(obj["payload"])
-                    name = _build_subscription_name(obj["payload"]["figi"], obj["event"], obj["payload"]["interval"])
-                    for subscription in self._subscriptions[name]:
-                        subscription['strategy'].on_candle(candle)
-                elif obj["event"] == SubscriptionEventType.ORDER_BOOK.value:
-                    order_book = OrderBook(obj["payload"])
-                    name = _build_subscription_name(obj["payload"]["figi"], obj["event"], obj["payload"]["depth"])
-                    for subscription in self._subscriptions[name]:
-                        subscription['strategy'].on_order_book(order_book)
-                elif obj["event"] == SubscriptionEventType.INSTRUMENT.value:
-                    info = InstrumentStatus(obj["payload"])
-                    name = _build_subscription_name(obj["payload"]["figi"], obj["event"], "")
-                    for subscription in self._subscriptions[name]:
-                        subscription['strategy'].on_instrument_info(info)
-                else:
-                    raise Exception("An unsupported event type '{}'".format(obj["event"]))
-                logging.debug("Event has been processed: %s", event)
-                self._queue.task_done()
+                getattr(listener, STRATEGY_CALLBACKS[event_type])(event_object)
             except Exception as err:
-                self._on_error(self._ws_server, err)
+                logging.exception(err)
+
+    def _notify_strategy(self, strategy: BaseStrategy, event_type: SubscriptionEventType,
+                         event_object: Union[Candle, OrderBook, InstrumentStatus]) -> None:
+        callback = getattr(strategy, STRATEGY_CALLBACKS[event_type])
+        profiler = self._profiler
+        if profiler is None:
+            callback(event_object)
+        else:
+            profiler.measure(strategy, event_type, event_object.figi, callback, event_object)
 
     def _on_subscription_event(self, _, event: str) -> None:
-        logging.debug("New event: %s", event)
-        if not self._stop_flag:
-            self._queue.put(event)
+        debug_sampled("events", "New event: %s", event)
+        recorder = self._recorder
+        if recorder:
+            recorder.write(event)
+        if self._stop_flag:
+            return
+        # Web socket thread only reads frames, they are parsed by the decoder
+        self._decoder.submit(self._dispatch_event, event)
 
-    def _subscribe(self, argument: dict, subscription_name: str, strategy: BaseStrategy) -> None:
-        if not self._web_socket:
+    def _dispatch_event(self, event: str) -> None:
+        if self._has_raw_subscribers and not self._dispatch_raw_event(event):
+            return
+        self._process_event(event)
+
+    def _dispatch_raw_event(self, event: str) -> bool:
+        raw_event = RawEvent(event)
+        if not raw_event.is_routable:
+            return True
+
+        subscription_name = build_subscription_name(raw_event.figi, raw_event.event.value, raw_event.parameter)
+        is_decoding_required = bool(self._market_data_listeners)
+        for subscription in self._subscriptions.get(subscription_name, []):
+            if not subscription['raw']:
+                is_decoding_required = True
+            else:
+                self._executors[subscription['executor']].submit_ordered(raw_event.figi,
+                                                                         subscription['strategy'].on_raw_event,
+                                                                         raw_event)
+        # Frames consumed by raw subscribers only are never parsed
+        return is_decoding_required
+
+    def _subscribe(self, argument: dict, subscription_name: str, strategy: Union[BaseStrategy, RawSubscriber],
+                   executor: str) -> None:
+        assert (executor in self._executors), "Unknown executor '{}'".format(executor)
+        if not self._web_socket and not self._is_offline:
             self._initialize_web_sockets()
             self._initialize_workers()
 
-        self._web_socket.send(ujson.dumps(argument))
+        is_raw = isinstance(strategy, RawSubscriber)
+        if is_raw:
+            self._has_raw_subscribers = True
+        elif self._process_pool:
+            strategy = self._process_pool.host(strategy)
+
+        if not self._is_offline:
+            self._web_socket.send(ujson.dumps(argument))
         if subscription_name not in self._subscriptions:
             self._subscriptions[subscription_name] = [{'argument': argument,
-                                                      'strategy': strategy}]
+                                                      'strategy': strategy,
+                                                      'executor': executor,
+                                                      'raw': is_raw}]
         else:
             self._subscriptions[subscription_name].append({'argument': argument,
-                                                           'strategy': strategy})
+                                                           'strategy': strategy,
+                                                           'executor': executor,
+                                                           'raw': is_raw})
 
-    def _restart_workers_and_resubscribe(self):
+    def _resubscribe(self) -> None:
         self._shall_reconnect = False
         self._stop_flag = False
         self._initialize_workers()
 
-        for subscription_name, strategies in self._subscriptions.items():
-            logging.info(f"Resubscribing to subscription: {subscription_name}")
-            for strategy_details in strategies:
-                logging.info(f"...using strategy {strategy_details['strategy']} with {strategy_details['argument']}")
-                self._web_socket.send(ujson.dumps(strategy_details['argument']))
+        # The gap starts with the last candle seen before reconnecting. Live candles are held back until the missed
+        # ones are loaded, otherwise the first live candle would make every loaded one look outdated.
+        subscriptions = list(self._subscriptions.items())
+        gap_starts = {}
+        with self._candles_lock:
+            for subscription_name, _ in subscriptions:
+                last = self._last_candles.get(subscription_name)
+                if last:
+                    gap_starts[subscription_name] = last[0]
+                    self._held_candles.setdefault(subscription_name, [])
+
+        # Every subscription is requested once regardless of the number of strategies listening to it
+        for subscription_name, strategies in subscriptions:
+            self._web_socket.send(ujson.dumps(strategies[0]['argument']))
+        logging.info("%d subscriptions have been restored", len(subscriptions))
+        threading.Thread(target=self._resync_subscriptions, args=(subscriptions, gap_starts), daemon=True).start()
+
+    def _resync_subscriptions(self, subscriptions: list, gap_starts: Dict[str, datetime.datetime]) -> None:
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers=_RESYNC_WORKERS_COUNT) as pool:
+            for subscription_name, strategies in subscriptions:
+                argument = strategies[0]['argument']
+                if subscription_name in gap_starts:
+                    pool.submit(self._backfill_candles, subscription_name, argument, gap_starts[subscription_name])
+                elif argument["event"] == "orderbook:subscribe":
+                    pool.submit(self._refresh_order_book, subscription_name, argument)
+
+    def _backfill_candles(self, subscription_name: str, argument: dict, start_time: datetime.datetime) -> None:
+        payloads = []
+        try:
+            payloads = self._load_candles(argument["figi"], SubscriptionInterval(argument["interval"]), start_time)
+            logging.info("%d candles have been loaded to fill the gap in %s subscription", len(payloads),
+                         subscription_name)
+        except Exception as err:
+            logging.error("Unable to load missed candles of %s subscription: %s", subscription_name, err)
+        # Held back candles are released even if loading failed, so the subscription is never stuck
+        self._decoder.submit(self._merge_candles, subscription_name, payloads)
+
+    def _merge_candles(self, subscription_name: str, payloads: List[dict]) -> None:
+        while True:
+            with self._candles_lock:
+                held = self._held_candles.get(subscription_name, [])
+                if not payloads and not held:
+                    # Candles arriving from now on are newer than every delivered one, so they are not held anymore
+                    self._held_candles.pop(subscription_name, None)
+                    return
+                self._held_candles[subscription_name] = []
+            if subscription_name not in self._subscriptions:
+                payloads = []
+                continue
+            # Sorting is stable, so a live update of a loaded candle is delivered after it
+            for payload in sorted(payloads + held, key=_get_candle_time):
+                self._deliver_candle(subscription_name, payload)
+            payloads = []
+
+    def _refresh_order_book(self, subscription_name: str, argument: dict) -> None:
+        try:
+            payload = self._load_order_book(argument["figi"], argument["depth"])
+            if payload and subscription_name in self._subscriptions:
+                # Snapshot is dispatched as a streamed frame, so raw subscribers get it as well
+                payload.update(figi=argument["figi"], depth=argument["depth"])
+                frame = ujson.dumps({"event": SubscriptionEventType.ORDER_BOOK.value, "payload": payload})
+                self._decoder.submit(self._dispatch_event, frame)
+        except Exception as err:
+            logging.error("Unable to refresh order book of %s subscription: %s", subscription_name, err)
+
+    # Subscription manager has no REST client, so sessions override loaders and nothing is resynced without them
+    def _load_candles(self, figi: str, interval: SubscriptionInterval, start_time: datetime.datetime) -> List[dict]:
+        return []
+
+    def _load_order_book(self, figi: str, depth: int) -> Optional[dict]:
+        return None
 
     def _unsubscribe(self, argument: dict, subscription_name: str) -> None:
-        self._web_socket.send(ujson.dumps(argument))
+        if not self._is_offline:
+            self._web_socket.send(ujson.dumps(argument))
         if len(self._subscriptions[subscription_name]) == 1:
             del self._subscriptions[subscription_name]
+            with self._candles_lock:
+                self._last_candles.pop(subscription_name, None)
+                self._held_candles.pop(subscription_name, None)
+            self._has_raw_subscribers = any(subscription['raw'] for subscriptions in self._subscriptions.values()
+                                            for subscription in subscriptions)
         else:
             pass  # TODO: how to remove specific strategy
 
-    def subscribe_to_candles(self, figi: str, interval: SubscriptionInterval, strategy: BaseStrategy) -> None:
-        subscription_name = _build_subscription_name(figi, "candle", interval.value)
+    @property
+    def profiler(self) -> Optional[CallbackProfiler]:
+        return self._profiler
+
+    def enable_callback_profiling(self, slow_threshold_sec: float = SLOW_CALLBACK_THRESHOLD_SEC,
+                                  on_slow_callback: Optional[SlowCallbackHandler] = None) -> CallbackProfiler:
+        if not self._profiler:
+            self._profiler = CallbackProfiler(slow_threshold_sec, on_slow_callback)
+            logging.info("Strategy callbacks profiling enabled, slow threshold is %f sec", slow_threshold_sec)
+        return self._profiler
+
+    def disable_callback_profiling(self) -> None:
+        if not self._profiler:
+            return
+        self._profiler.stop_sampling()
+        self._profiler = None
+        logging.info("Strategy callbacks profiling disabled")
+
+    @property
+    def executors(self) -> Dict[str, EventExecutor]:
+        return dict(self._executors)
+
+    def add_executor(self, name: str, workers_count: int) -> EventExecutor:
+        assert (name not in self._executors), "Executor '{}' already exists".format(name)
+        executor = EventExecutor(name, workers_count)
+        self._executors[name] = executor
+        if self._executors[DEFAULT_EXECUTOR].is_running:
+            executor.start()
+        return executor
+
+    def resize_executor(self, name: str, workers_count: int) -> None:
+        assert (name in self._executors), "Unknown executor '{}'".format(name)
+        self._executors[name].resize(workers_count)
+
+    def add_market_data_listener(self, listener: BaseStrategy) -> None:
+        if listener not in self._market_data_listeners:
+            self._market_data_listeners = self._market_data_listeners + [listener]
+
+    def remove_market_data_listener(self, listener: BaseStrategy) -> None:
+        self._market_data_listeners = [item for item in self._market_data_listeners if item is not listener]
+
+    def schedule(self, strategy: BaseStrategy, delay_sec: float, name: str = "", interval_sec: Optional[float] = None,
+                 executor: str = DEFAULT_EXECUTOR) -> Timer:
+        assert (executor in self._executors), "Unknown executor '{}'".format(executor)
+        assert (not self._process_pool), "Timers are not supported for strategies hosted by worker processes"
+        self._executors[executor].start()
+        return self._scheduler.schedule(strategy, delay_sec, name, interval_sec, executor)
+
+    def schedule_recurring(self, strategy: BaseStrategy, interval_sec: float, name: str = "",
+                           executor: str = DEFAULT_EXECUTOR) -> Timer:
+        return self.schedule(strategy, interval_sec, name, interval_sec, executor)
+
+    def cancel_timers(self, strategy: Optional[BaseStrategy] = None) -> None:
+        self._scheduler.cancel_all(strategy)
+
+    def _dispatch_timer(self, timer: Timer) -> None:
+        # Timers share executors with market events, so a strategy never runs on the scheduler thread
+        self._executors[timer.executor].submit(self._notify_timer, timer)
+
+    def _notify_timer(self, timer: Timer) -> None:
+        if not timer.is_cancelled:
+            timer.strategy.on_timer(timer)
+
+    def create_market_snapshot(self, batch_interval_sec: float = SNAPSHOT_BATCH_INTERVAL_SEC) -> 'MarketSnapshot':
+        from tinkoff_invest.market_snapshot import MarketSnapshot
+
+        # Snapshot is a market data listener, so it is updated by every subscription of this manager
+        snapshot = MarketSnapshot(batch_interval_sec=batch_interval_sec)
+        self.add_market_data_listener(snapshot)
+        return snapshot
+
+    def create_order_book_store(self, directory: str) -> 'OrderBookStore':
+        from tinkoff_invest.order_book_store import OrderBookStore
+
+        # Order books of every subscription are stored, closing the store writes buffered chunks and removes it
+        # from the listeners
+        store = OrderBookStore(directory, manager=self)
+        self.add_market_data_listener(store)
+        return store
+
+    @property
+    def recorder(self) -> Optional[EventRecorder]:
+        return self._recorder
+
+    def start_recording(self, directory: str, max_file_size: int = RECORDER_MAX_FILE_SIZE) -> EventRecorder:
+        if not self._recorder:
+            self._recorder = EventRecorder(directory, max_file_size)
+        return self._recorder
+
+    def stop_recording(self) -> None:
+        recorder, self._recorder = self._recorder, None
+        if recorder:
+            recorder.close()
+
+    def enable_offline_mode(self) -> None:
+        assert (not self._web_socket), "Offline mode should be enabled before any subscription is created"
+        self._is_offline = True
+        logging.info("Subscriptions will be registered without web socket connection")
+
+    def replay(self, path: str, speed: Optional[float] = 1.0) -> ReplayStatistics:
+        self._stop_flag = False
+        self._initialize_workers()
+        start = time.perf_counter()
+        count = EventReplayer(path).replay(lambda frame: self._on_subscription_event(None, frame), speed)
+        self._wait_until_idle()
+        statistics = ReplayStatistics(count, time.perf_counter() - start)
+        logging.info("Replay of %s finished: %s", path, statistics)
+        return statistics
+
+    @property
+    def is_process_isolation_enabled(self) -> bool:
+        return self._process_pool is not None
+
+    def enable_process_isolation(self, processes_count: int = os.cpu_count() or 1) -> None:
+        assert (not self._subscriptions), "Process isolation should be enabled before any subscription is created"
+        if not self._process_pool:
+            from tinkoff_invest.process_pool import StrategyProcessPool
+
+            self._process_pool = StrategyProcessPool(processes_count)
+            logging.info("Strategies will be executed by %d worker processes", processes_count)
+
+    def subscribe_to_candles(self, figi: str, interval: SubscriptionInterval,
+                             strategy: Union[BaseStrategy, RawSubscriber],
+                             executor: str = DEFAULT_EXECUTOR) -> None:
+        subscription_name = build_subscription_name(figi, "candle", interval.value)
         self._subscribe({"event": "candle:subscribe", "figi": figi, "interval": interval.value},
-                        subscription_name, strategy)
+                        subscription_name, strategy, executor)
         logging.info("Candle subscription created (%s, %s)", figi, interval.value)
 
     def unsubscribe_from_candles(self, figi: str, interval: SubscriptionInterval) -> None:
-        subscription_name = _build_subscription_name(figi, "candle", interval.value)
+        subscription_name = build_subscription_name(figi, "candle", interval.value)
         self._unsubscribe({"event": "candle:unsubscribe", "figi": figi, "interval": interval.value}, subscription_name)
         logging.info("Candle subscription removed (%s, %s)", figi, interval.value)
 
-    def subscribe_to_order_book(self, figi: str, depth: int, strategy: BaseStrategy) -> None:
+    def subscribe_to_order_book(self, figi: str, depth: int, strategy: Union[BaseStrategy, RawSubscriber],
+                                executor: str = DEFAULT_EXECUTOR) -> None:
         assert (0 < depth <= 20), "Depth should be > 0 and <= 20"
-        subscription_name = _build_subscription_name(figi, "orderbook", str(depth))
-        self._subscribe({"event": "orderbook:subscribe", "figi": figi, "depth": depth}, subscription_name, strategy)
+        subscription_name = build_subscription_name(figi, "orderbook", str(depth))
+        self._subscribe({"event": "orderbook:subscribe", "figi": figi, "depth": depth}, subscription_name, strategy,
+                        executor)
         logging.info("OrderBook subscription created (%s, %s)", figi, str(depth))
 
     def unsubscribe_from_order_book(self, figi: str, depth: int) -> None:
-        subscription_name = _build_subscription_name(figi, "orderbook", str(depth))
+        subscription_name = build_subscription_name(figi, "orderbook", str(depth))
         self._unsubscribe({"event": "orderbook:unsubscribe", "figi": figi, "depth": depth}, subscription_name)
         logging.info("OrderBook subscription removed (%s, %s)", figi, str(depth))
 
-    def subscribe_to_instrument_info(self, figi: str, strategy: BaseStrategy) -> None:
-        subscription_name = _build_subscription_name(figi, "instrument_info", "")
-        self._subscribe({"event": "instrument_info:subscribe", "figi": figi}, subscription_name, strategy)
+    def subscribe_to_instrument_info(self, figi: str, strategy: Union[BaseStrategy, RawSubscriber],
+                                     executor: str = DEFAULT_EXECUTOR) -> None:
+        subscription_name = build_subscription_name(figi, "instrument_info", "")
+        self._subscribe({"event": "instrument_info:subscribe", "figi": figi}, subscription_name, strategy, executor)
         logging.info("InstrumentInfo subscription created (%s)", figi)
 
     def unsubscribe_from_instrument_info(self, figi: str) -> None:
-        subscription_name = _build_subscription_name(figi, "instrument_info", "")
+        subscription_name = build_subscription_name(figi, "instrument_info", "")
         self._unsubscribe({"event": "instrument_info:unsubscribe", "figi": figi}, subscription_name)
         logging.info("InstrumentInfo subscription removed (%s)", figi)
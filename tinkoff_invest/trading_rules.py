@@ -0,0 +1,146 @@
+import logging
+import threading
+from typing import Dict, Iterable, Optional
+
+from tinkoff_invest.base_strategy import BaseStrategy
+from tinkoff_invest.exceptions import OrderValidationError
+from tinkoff_invest.models.instrument import Instrument
+from tinkoff_invest.models.instrument_status import InstrumentStatus
+from tinkoff_invest.models.money import MONEY_SCALE, Money
+from tinkoff_invest.models.types import OperationType, TradingStatus
+
+_CLOSED_STATUSES = (TradingStatus.TRADING_NOT_AVAILABLE, TradingStatus.TRADING_NOT_AVAILABLE_REST,
+                    TradingStatus.BREAK)
+
+
+class TradingRules:
+    __slots__ = ("_figi", "_tick_units", "_lot_size", "_min_quantity", "limit_up", "limit_down", "trading_status")
+
+    def __init__(self, figi: str, min_price_increment: Optional[float], lot_size: int,
+                 limit_up: Optional[float] = None, limit_down: Optional[float] = None,
+                 trading_status: Optional[TradingStatus] = None, min_quantity: Optional[int] = None):
+        self._figi: str = figi
+        self._tick_units: int = Money.from_float(min_price_increment).units if min_price_increment else 0
+        self._lot_size: int = lot_size
+        self._min_quantity: Optional[int] = min_quantity
+        self.limit_up: Optional[float] = limit_up
+        self.limit_down: Optional[float] = limit_down
+        self.trading_status: Optional[TradingStatus] = trading_status
+
+    @property
+    def figi(self) -> str:
+        return self._figi
+
+    @property
+    def min_price_increment(self) -> float:
+        return self._tick_units / MONEY_SCALE
+
+    @property
+    def lot_size(self) -> int:
+        return self._lot_size
+
+    @property
+    def min_quantity(self) -> Optional[int]:
+        return self._min_quantity
+
+    def round_price(self, price: float, operation: OperationType) -> float:
+        if not self._tick_units:
+            return price
+        # Prices are rounded in integer units, so ticks like 0.01 or 0.0025 do not accumulate float errors.
+        # Buy price is rounded down and sell price up, so the order is never worse than the requested price
+        ticks, remainder = divmod(Money.from_float(price).units, self._tick_units)
+        if remainder and operation == OperationType.SELL:
+            ticks += 1
+        return ticks * self._tick_units / MONEY_SCALE
+
+    def validate(self, price: Optional[float], lots: int, operation: Optional[OperationType] = None) -> Optional[float]:
+        if not isinstance(lots, int) or lots <= 0:
+            raise OrderValidationError(self._figi, "lots count should be an integer > 0, got {}".format(lots))
+        if self._min_quantity and lots * self._lot_size < self._min_quantity:
+            raise OrderValidationError(self._figi, "quantity {} is below the minimum quantity {}".format(
+                lots * self._lot_size, self._min_quantity))
+        if self.trading_status in _CLOSED_STATUSES:
+            raise OrderValidationError(self._figi, "instrument is not available for trading ({})".format(
+                self.trading_status.value))
+        if price is None:
+            return None
+
+        if operation is not None:
+            rounded = self.round_price(price, operation)
+        elif self._tick_units and Money.from_float(price).units % self._tick_units:
+            raise OrderValidationError(self._figi, "price {} is not a multiple of the price increment {}".format(
+                price, self.min_price_increment))
+        else:
+            rounded = price
+        if rounded <= 0:
+            raise OrderValidationError(self._figi, "price {} should be > 0".format(price))
+        if self.limit_up is not None and rounded > self.limit_up:
+            raise OrderValidationError(self._figi, "price {} is above the upper limit {}".format(rounded,
+                                                                                             self.limit_up))
+        if self.limit_down is not None and rounded < self.limit_down:
+            raise OrderValidationError(self._figi, "price {} is below the lower limit {}".format(rounded,
+                                                                                             self.limit_down))
+        return rounded
+
+
+class TradingRulesTable(BaseStrategy):
+    def __init__(self, instruments: Iterable[Instrument] = ()):
+        self._lock: threading.Lock = threading.Lock()
+        self._rules: Dict[str, TradingRules] = {}
+        self.load(instruments)
+
+    def load(self, instruments: Iterable[Instrument]) -> None:
+        count = 0
+        with self._lock:
+            for instrument in instruments:
+                data = instrument._data
+                rules = self._rules.get(instrument.figi)
+                if rules is None:
+                    self._rules[instrument.figi] = TradingRules(instrument.figi, data.get("minPriceIncrement"),
+                                                                instrument.lot_size,
+                                                                min_quantity=data.get("minQuantity"))
+                else:
+                    # Limits and status are known from the stream only, so they survive catalogue reloads
+                    self._rules[instrument.figi] = TradingRules(instrument.figi, data.get("minPriceIncrement"),
+                                                                instrument.lot_size, rules.limit_up,
+                                                                rules.limit_down, rules.trading_status,
+                                                                data.get("minQuantity"))
+                count += 1
+        logging.info("Trading rules have been loaded for %d instruments", count)
+
+    def get(self, figi: str) -> Optional[TradingRules]:
+        return self._rules.get(figi)
+
+    def round_price(self, figi: str, price: float, operation: OperationType) -> float:
+        rules = self._rules.get(figi)
+        return rules.round_price(price, operation) if rules else price
+
+    def validate(self, figi: str, price: Optional[float], lots: int,
+                 operation: Optional[OperationType] = None) -> Optional[float]:
+        rules = self._rules.get(figi)
+        if rules is None:
+            logging.debug("No trading rules for %s, the order is not validated", figi)
+            return price
+        return rules.validate(price, lots, operation)
+
+    def on_instrument_info(self, instrument: InstrumentStatus) -> None:
+        data = instrument._data
+        with self._lock:
+            rules = self._rules.get(instrument.figi)
+            self._rules[instrument.figi] = TradingRules(instrument.figi, data.get("min_price_increment"),
+                                                        int(data.get("lot", 1)), instrument.limit_up,
+                                                        instrument.limit_down, instrument.trading_status,
+                                                        rules.min_quantity if rules else None)
+
+    def __len__(self) -> int:
+        return len(self._rules)
+
+    def __str__(self) -> str:
+        from prettytable import PrettyTable
+
+        table = PrettyTable(field_names=['FIGI', 'Min price increment', 'Lot size', 'Limit Up', 'Limit Down',
+                                         'Status'])
+        for rules in list(self._rules.values()):
+            table.add_row([rules.figi, rules.min_price_increment, rules.lot_size, rules.limit_up, rules.limit_down,
+                           rules.trading_status.name if rules.trading_status else None])
+        return str(table)